@@ -0,0 +1,27 @@
+import { NextResponse } from 'next/server';
+import { auth } from '@clerk/nextjs/server';
+import { BACKEND_URL, signUserToken } from '@/lib/user-token';
+
+// Credits of the signed-in user from the backend usage ledger (lib/useCredits.ts)
+export async function GET() {
+  const { userId } = await auth();
+  if (!userId) {
+    return NextResponse.json({ error: 'Not signed in' }, { status: 401 });
+  }
+
+  const token = signUserToken(userId);
+  if (!token) {
+    return NextResponse.json({ error: 'USER_TOKEN_SECRET is not configured' }, { status: 503 });
+  }
+
+  try {
+    const response = await fetch(`${BACKEND_URL}/api/usage/${encodeURIComponent(userId)}`, {
+      headers: { Authorization: `Bearer ${token}` },
+      cache: 'no-store'
+    });
+    return NextResponse.json(await response.json(), { status: response.status });
+  } catch (error) {
+    console.error('Usage ledger unavailable:', error);
+    return NextResponse.json({ error: 'Usage ledger unavailable' }, { status: 502 });
+  }
+}
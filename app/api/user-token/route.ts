@@ -0,0 +1,22 @@
+import { NextResponse } from 'next/server';
+import { auth } from '@clerk/nextjs/server';
+import { signUserToken } from '@/lib/user-token';
+
+const TTL_SECONDS = 3600;
+
+// Token for calls to the FastAPI backend: Authorization: Bearer <token>, or /ws?token=<token>
+export async function GET() {
+  const { userId } = await auth();
+  if (!userId) {
+    return NextResponse.json({ error: 'Not signed in' }, { status: 401 });
+  }
+
+  const token = signUserToken(userId, TTL_SECONDS);
+  if (!token) {
+    return NextResponse.json({ error: 'USER_TOKEN_SECRET is not configured' }, { status: 503 });
+  }
+  return NextResponse.json(
+    { token, expiresAt: Math.floor(Date.now() / 1000) + TTL_SECONDS },
+    { headers: { 'Cache-Control': 'no-store' } }
+  );
+}
@@ -3,21 +3,64 @@ AI Processor FastAPI Server
 Provides REST API endpoints for AI services
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-import uvicorn
 import asyncio
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any
 import json
+import os
+import sys
+from datetime import datetime, timezone
 
+from config import settings  # loads the .env files once
+from logging_config import configure_logging
+
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_LEVELS,
+                  settings.LOG_SAMPLE_RATES, settings.LOG_QUEUE_SIZE)
+
+from clients import clients
 from ai_service import AIService
+from traffic_capture import TrafficCaptureMiddleware, create_traffic_recorder
+from profiler import RequestProfileMiddleware, create_debug_router
+from tracing import TracingMiddleware, create_tracer
+from compression import CompressionMiddleware
+from readiness import ReadinessChecker, create_health_router, http_check
+from azure_openai_service import create_azure_openai_service
+
+# Shared modules live in src/backend/core
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+from core.exceptions import RedAIException
+from core.identity import authenticated_user, client_ip, parse_networks
+from usage_ledger import UsageLedger, usage_context
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the shared AI service and its connection pool in the background so the server
+    accepts traffic immediately; close pooled connections on shutdown"""
+    warmup = asyncio.ensure_future(clients.aget("ai_service"))
+    await usage_ledger.start()
+    await readiness.start()
+    if traffic_recorder is not None:
+        await traffic_recorder.start()
+    try:
+        yield
+    finally:
+        await asyncio.gather(warmup, return_exceptions=True)
+        await readiness.stop()
+        await usage_ledger.stop()
+        if traffic_recorder is not None:
+            await traffic_recorder.stop()
+        await clients.aclose()
+        tracer.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Red.AI AI Processor",
     description="AI service for interior design assistance",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -29,8 +72,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize AI service
-ai_service = AIService()
+# Response compression (inside tracing, so their headers are untouched)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        offload_size=settings.COMPRESSION_OFFLOAD_SIZE,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL
+    )
+
+# Request tracing: Server-Timing phases for devtools, spans to OpenTelemetry when TRACING_EXPORTER=otlp
+tracer = create_tracer(settings.TRACING_EXPORTER, settings.TRACING_SERVICE_NAME, settings.TRACING_SAMPLE_RATE)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, tracer=tracer, server_timing=settings.SERVER_TIMING_ENABLED)
+
+# Admin-only profiling of live workers (nothing is installed while DEBUG_ADMIN_TOKEN is empty)
+if settings.DEBUG_ADMIN_TOKEN:
+    app.include_router(create_debug_router(
+        settings.DEBUG_ADMIN_TOKEN,
+        max_seconds=settings.DEBUG_PROFILE_MAX_SECONDS,
+        default_rate=settings.DEBUG_PROFILE_RATE
+    ))
+    app.add_middleware(RequestProfileMiddleware, admin_token=settings.DEBUG_ADMIN_TOKEN)
+
+# Azure calls made here count against the same per-user quotas as the main API
+usage_ledger = UsageLedger(
+    database_url=settings.DATABASE_URL,
+    flush_interval=settings.USAGE_FLUSH_INTERVAL,
+    default_plan=settings.USAGE_DEFAULT_PLAN,
+    totals_ttl=settings.USAGE_TOTALS_TTL,
+    admin_users=settings.USAGE_ADMIN_USERS
+)
+
+def create_metered_azure_service():
+    """Shared Azure OpenAI service that reports token usage to the ledger"""
+    service = create_azure_openai_service()
+    service.usage_callback = usage_ledger.record_current
+    return service
+
+clients.register("azure_openai", create_metered_azure_service)
+
+trusted_proxies = parse_networks(settings.TRUSTED_PROXIES)
+
+def quota_key(request: Request) -> str:
+    """Quota bucket of a request: the authenticated user, otherwise the client IP"""
+    user_id = authenticated_user(request.scope, trusted_proxies, settings.USER_TOKEN_SECRET)
+    return user_id or "ip:" + client_ip(request.scope, trusted_proxies)
+
+async def metered(quota: str, endpoint: str):
+    """Check the quota before an Azure call and attribute its tokens to the caller"""
+    await usage_ledger.check_quota(quota)
+    usage_context.set((quota, endpoint))
+
+@app.exception_handler(RedAIException)
+async def redai_exception_handler(request: Request, exc: RedAIException):
+    """Return application errors such as QuotaExceededError with their status code"""
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=exc.headers)
+
+# Readiness checks run in the background; /readyz and /health only read the cached results
+readiness = ReadinessChecker(settings.READINESS_INTERVAL, settings.READINESS_TIMEOUT, settings.READINESS_TTL)
+if settings.AZURE_OPENAI_ENDPOINT.startswith("https://"):
+    readiness.add("azure_openai", http_check(settings.AZURE_OPENAI_ENDPOINT))
+app.include_router(create_health_router(readiness))
+
+# Opt-in traffic capture for benchmarks/replay.py
+traffic_recorder = None
+if settings.TRAFFIC_CAPTURE_ENABLED:
+    traffic_recorder = create_traffic_recorder(
+        settings.TRAFFIC_CAPTURE_DIR,
+        sample_rate=settings.TRAFFIC_CAPTURE_SAMPLE_RATE,
+        max_body=settings.TRAFFIC_CAPTURE_MAX_BODY
+    )
+    app.add_middleware(TrafficCaptureMiddleware, recorder=traffic_recorder)
 
 @app.get("/")
 async def root():
@@ -44,20 +158,25 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    http_pool = clients.peek("http_pool")
     return {
         "status": "healthy",
         "service": "ai-processor",
-        "timestamp": "2025-07-26T14:00:00Z"
+        "readiness": readiness.snapshot()[1],
+        "http_pools": http_pool.stats() if http_pool is not None else {},
+        "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
 @app.post("/analyze-floor-plan")
-async def analyze_floor_plan(file: UploadFile = File(...)):
+async def analyze_floor_plan(file: UploadFile = File(...), quota: str = Depends(quota_key)):
     """Analyze floor plan image"""
+    await metered(quota, "analyze-floor-plan")
     try:
         # Read image data
         image_data = await file.read()
         
         # Analyze with AI service
+        ai_service = await clients.aget("ai_service")
         result = await ai_service.analyze_floor_plan(image_data, file.filename)
         
         return JSONResponse(content=result)
@@ -69,10 +188,13 @@ async def analyze_floor_plan(file: UploadFile = File(...)):
 async def generate_design(
     room_type: str = Form(...),
     style: str = Form(...),
-    budget: int = Form(100000)
+    budget: int = Form(100000),
+    quota: str = Depends(quota_key)
 ):
     """Generate interior design suggestions"""
+    await metered(quota, "generate-design")
     try:
+        ai_service = await clients.aget("ai_service")
         result = await ai_service.generate_design_suggestions(room_type, style, budget)
         return JSONResponse(content=result)
         
@@ -82,9 +204,11 @@ async def generate_design(
 @app.post("/chat")
 async def chat_with_ai(
     message: str = Form(...),
-    context: Optional[str] = Form(None)
+    context: Optional[str] = Form(None),
+    quota: str = Depends(quota_key)
 ):
     """Chat with AI assistant"""
+    await metered(quota, "chat")
     try:
         # Parse context if provided
         parsed_context = None
@@ -94,6 +218,7 @@ async def chat_with_ai(
             except:
                 parsed_context = {"context": context}
         
+        ai_service = await clients.aget("ai_service")
         result = await ai_service.chat_with_ai(message, parsed_context)
         return {"response": result}
         
@@ -103,14 +228,16 @@ async def chat_with_ai(
 @app.get("/mock-analysis")
 async def get_mock_analysis():
     """Get mock floor plan analysis for testing"""
-    return ai_service._mock_analysis()
+    return AIService._mock_analysis()
 
 @app.get("/mock-design")
 async def get_mock_design():
     """Get mock design suggestions for testing"""
-    return ai_service._mock_design_suggestions()
+    return AIService._mock_design_suggestions()
 
 if __name__ == "__main__":
+    import uvicorn
+    
     print("🤖 Starting Red.AI AI Processor Server...")
     print("=" * 50)
     
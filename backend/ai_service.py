@@ -6,20 +6,28 @@ Handles AI interactions for floor plan analysis, design generation, and chat
 import os
 import json
 import base64
-import asyncio
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
 # Import Azure OpenAI service
-from azure_openai_service import create_azure_openai_service
+from azure_openai_service import AzureOpenAIService, create_azure_openai_service, get_azure_openai_service
+from clients import clients
+from logging_config import get_logger
+from tracing import span
+
+logger = get_logger(__name__)
 
 class AIService:
     """AI Service for interior design assistance"""
     
-    def __init__(self, api_key: Optional[str] = None, use_azure_ad: bool = None):
+    def __init__(self, api_key: Optional[str] = None, use_azure_ad: bool = None,
+                 azure_service: Optional[AzureOpenAIService] = None):
         """Initialize AI Service with Azure OpenAI"""
-        # Initialize new Azure OpenAI service
-        self.azure_service = create_azure_openai_service(use_azure_ad=use_azure_ad)
+        # Reuse the process-wide Azure OpenAI service unless a specific auth mode is requested
+        if azure_service is None:
+            azure_service = get_azure_openai_service() if use_azure_ad is None else \
+                create_azure_openai_service(use_azure_ad=use_azure_ad)
+        self.azure_service = azure_service
         
         # Legacy configuration for backward compatibility
         self.azure_api_key = api_key or os.getenv("AZURE_OPENAI_KEY") or os.getenv("AZURE_OPENAI_API_KEY") or "YOUR_AZURE_OPENAI_API_KEY_HERE"
@@ -28,23 +36,24 @@ class AIService:
         try:
             service_info = self.azure_service.get_service_info()
             if service_info.get('config_valid', False):
-                print(f"✅ Azure OpenAI Service initialized")
-                print(f"   Endpoint: {service_info.get('endpoint', 'Not configured')}")
-                print(f"   Authentication: {'Azure AD' if service_info.get('use_azure_ad', False) else 'API Key'}")
-                print(f"   API Version: {service_info.get('api_version', 'Not configured')}")
-                print(f"   Deployment Model: {service_info.get('deployment_name', 'Not configured')}")
+                logger.info(
+                    "ai_service.initialized",
+                    endpoint=service_info.get('endpoint'),
+                    auth="azure_ad" if service_info.get('use_azure_ad', False) else "api_key",
+                    api_version=service_info.get('api_version'),
+                    deployment=service_info.get('deployment_name')
+                )
             else:
-                print("⚠️  Azure OpenAI Service initialized but not properly configured")
-                print("   Some features may not be available until configuration is complete")
+                logger.warning("ai_service.not_configured", detail="AI features use mock responses")
         except Exception as e:
-            print(f"⚠️  Error getting Azure OpenAI service info: {e}")
-            print("   Service initialized but configuration may be incomplete")
+            logger.warning("ai_service.service_info_failed", error=str(e))
 
     async def analyze_floor_plan(self, image_data: bytes, filename: str) -> Dict:
         """Анализ планировки квартиры с помощью ИИ"""
         try:
             # Конвертируем изображение в base64
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
+            with span("encode", **{"image.bytes": len(image_data)}):
+                image_base64 = base64.b64encode(image_data).decode('utf-8')
             
             # Prompt для анализа планировки
             prompt = """
@@ -72,7 +81,7 @@ class AIService:
             return response
             
         except Exception as e:
-            print(f"AI Analysis error: {e}")
+            logger.exception("ai_service.analysis_error")
             return self._mock_analysis()
 
     async def _analyze_with_new_service(self, prompt: str, image_base64: str) -> Dict:
@@ -83,17 +92,18 @@ class AIService:
             if result["success"]:
                 # Парсим JSON из ответа
                 try:
-                    return json.loads(result["analysis"])
+                    with span("parse"):
+                        return json.loads(result["analysis"])
                 except:
                     # Если не JSON, возвращаем мок анализ
-                    print("📝 Response is not JSON, using mock analysis")
+                    logger.info("ai_service.non_json_response", operation="analysis", fallback="mock")
                     return self._mock_analysis()
             else:
-                print(f"❌ Analysis failed: {result['error']}")
+                logger.warning("ai_service.analysis_failed", error=result['error'])
                 return self._mock_analysis()
                 
         except Exception as e:
-            print(f"❌ New service error: {e}")
+            logger.exception("ai_service.analysis_error")
             return self._mock_analysis()
 
     async def generate_design_suggestions(self, room_type: str, style: str, budget: int) -> Dict:
@@ -125,29 +135,22 @@ class AIService:
             
             if result["success"]:
                 try:
-                    return json.loads(result["content"])
+                    with span("parse"):
+                        return json.loads(result["content"])
                 except:
-                    print("📝 Response is not JSON, using mock suggestions")
+                    logger.info("ai_service.non_json_response", operation="design_suggestions", fallback="mock")
                     return self._mock_design_suggestions()
             else:
-                print(f"❌ Design suggestions failed: {result['error']}")
+                logger.warning("ai_service.design_suggestions_failed", error=result['error'])
                 return self._mock_design_suggestions()
         except Exception as e:
-            print(f"Design suggestions error: {e}")
+            logger.exception("ai_service.design_suggestions_error")
             return self._mock_design_suggestions()
 
-    def chat_completion(self, message: str, context: Optional[Dict] = None, conversation_id: Optional[str] = None) -> str:
-        """Chat completion method for backward compatibility (sync version)"""
-        try:
-            # Run async method in sync context
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            response = loop.run_until_complete(self.chat_with_ai(message, context))
-            loop.close()
-            return response
-        except Exception as e:
-            print(f"Chat completion error: {e}")
-            return "Извините, сейчас я не могу ответить. Попробуйте позже."
+    async def chat_completion(self, message: str, context: Optional[Dict] = None,
+                              conversation_id: Optional[str] = None) -> str:
+        """Chat completion method for backward compatibility (alias of chat_with_ai)"""
+        return await self.chat_with_ai(message, context)
 
     async def chat_with_ai(self, message: str, context: Optional[Dict] = None) -> str:
         """Чат с ИИ помощником по дизайну"""
@@ -164,29 +167,31 @@ class AIService:
         """
         
         try:
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            if context:
-                messages.append({
-                    "role": "user", 
-                    "content": f"Контекст: {json.dumps(context, ensure_ascii=False)}"
-                })
-            
-            messages.append({"role": "user", "content": message})
+            with span("prompt"):
+                messages = [{"role": "system", "content": system_prompt}]
+                
+                if context:
+                    messages.append({
+                        "role": "user", 
+                        "content": f"Контекст: {json.dumps(context, ensure_ascii=False)}"
+                    })
+                
+                messages.append({"role": "user", "content": message})
             
             result = await self.azure_service.chat_completion(messages, max_tokens=1000)
             
             if result["success"]:
                 return result["content"]
             else:
-                print(f"❌ Chat AI failed: {result['error']}")
+                logger.warning("ai_service.chat_failed", error=result['error'])
                 return "Извините, сейчас я не могу ответить. Попробуйте позже."
                 
         except Exception as e:
-            print(f"Chat AI error: {e}")
+            logger.exception("ai_service.chat_error")
             return "Извините, сейчас я не могу ответить. Попробуйте позже."
 
-    def _mock_analysis(self) -> Dict:
+    @staticmethod
+    def _mock_analysis() -> Dict:
         """Мок анализ для демо"""
         return {
             "rooms_detected": 3,
@@ -214,7 +219,8 @@ class AIService:
             "estimated_cost": {"min": 800000, "max": 1500000}
         }
 
-    def _mock_design_suggestions(self) -> Dict:
+    @staticmethod
+    def _mock_design_suggestions() -> Dict:
         """Мок дизайн предложения"""
         return {
             "color_scheme": ["#F5F5F5", "#667EEA", "#764BA2"],
@@ -253,20 +259,26 @@ class AIService:
         
         return "Расскажите подробнее о вашем проекте, и я помогу с конкретными рекомендациями."
 
+clients.register("ai_service", AIService)
+
+def get_ai_service() -> AIService:
+    """Shared AI service, created on first use"""
+    return clients.get("ai_service")
+
 # Utility functions for external use
 async def analyze_room_image(image_data: bytes, filename: str) -> Dict:
     """Быстрый анализ изображения комнаты"""
-    service = AIService()
+    service = await clients.aget("ai_service")
     return await service.analyze_floor_plan(image_data, filename)
 
 async def generate_interior_design(room_type: str, style: str, budget: int = 100000) -> Dict:
     """Быстрая генерация дизайна интерьера"""
-    service = AIService()
+    service = await clients.aget("ai_service")
     return await service.generate_design_suggestions(room_type, style, budget)
 
 async def chat_interior_assistant(message: str, context: Optional[Dict] = None) -> str:
     """Быстрый чат с ИИ помощником"""
-    service = AIService()
+    service = await clients.aget("ai_service")
     return await service.chat_with_ai(message, context)
 
 # Example usage
@@ -275,7 +287,7 @@ if __name__ == "__main__":
     print("=" * 50)
     
     # Test the service
-    service = AIService()
+    service = get_ai_service()
     
     # Example: Mock analysis
     print("\n📊 Mock Floor Plan Analysis:")
@@ -0,0 +1,295 @@
+"""
+Analytics Rollups for RED AI
+Business events (payments, generated designs, AI token usage) are appended to an event table
+and rolled up into hourly, daily and weekly buckets by a background task; revenue and growth
+figures read only the buckets
+"""
+
+import asyncio
+import hmac
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, Index, Integer, MetaData, String, Table, create_engine, func, select
+)
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from logging_config import get_logger
+
+GRANULARITIES = ("hour", "day", "week")
+REVENUE_EVENT = "payment"
+
+logger = get_logger(__name__)
+
+metadata = MetaData()
+
+analytics_events = Table(
+    "analytics_events",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("kind", String(64), nullable=False),
+    Column("amount", Float, nullable=False, default=0.0),
+    Column("occurred_at", DateTime, nullable=False),
+    Column("rolled_up", Boolean, nullable=False, default=False),
+    # The rollup task reads only events it has not aggregated yet
+    Index("ix_analytics_events_pending", "rolled_up", "id"),
+)
+
+analytics_rollups = Table(
+    "analytics_rollups",
+    metadata,
+    Column("granularity", String(8), primary_key=True),
+    Column("kind", String(64), primary_key=True),
+    Column("bucket_start", DateTime, primary_key=True),
+    Column("events", Integer, nullable=False),
+    Column("total", Float, nullable=False),
+)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the hour, day or week (Monday) containing moment"""
+    hour = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "hour":
+        return hour
+    day = hour.replace(hour=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def _growth(current: float, previous: float) -> float:
+    """Percent change; 0 without a previous value to compare against"""
+    return round((current - previous) / previous * 100, 1) if previous else 0.0
+
+
+class AnalyticsRollups:
+    """Buffered event ingestion plus incrementally refreshed time-bucket aggregates"""
+
+    def __init__(self, database_url: str, interval: float = 60.0, batch_size: int = 5000,
+                 flush_batch_size: int = 500):
+        """Initialize analytics rollups"""
+        # SQLite serializes writers with a file lock; wait for it instead of failing
+        connect_args = {"check_same_thread": False, "timeout": 30} if database_url.startswith("sqlite") else {}
+        self.engine = create_engine(database_url, connect_args=connect_args, pool_pre_ping=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.flush_batch_size = flush_batch_size
+        self._pending: List[Dict] = []
+        self._summary = {"monthly_revenue": 0.0, "weekly_growth": 0.0}
+        self._refresher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    # ==================== LIFECYCLE ====================
+
+    async def _run(self, fn, *args):
+        """Run blocking database work off the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def start(self):
+        """Create tables, compute the current figures and start the refresh loop"""
+        await self._run(metadata.create_all, self.engine)
+        await self.refresh()
+        self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the refresh loop and write buffered events"""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+        await self.flush()
+        self.engine.dispose()
+
+    # ==================== INGESTION ====================
+
+    def record(self, kind: str, amount: float = 0.0, occurred_at: Optional[datetime] = None):
+        """Buffer an event; it is written with the next flush and counted by the next refresh"""
+        self._pending.append({"kind": kind, "amount": float(amount), "occurred_at": occurred_at or datetime.now(),
+                              "rolled_up": False})
+        if len(self._pending) >= self.flush_batch_size and not self._flush_lock.locked():
+            asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        """Write buffered events in one transaction"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                await self._run(self._insert, batch)
+            except Exception as e:
+                logger.warning("analytics.flush_failed", events=len(batch), error=str(e), retry=True)
+                self._pending = batch + self._pending
+
+    def _insert(self, batch: List[Dict]):
+        with self.engine.begin() as conn:
+            conn.execute(analytics_events.insert(), batch)
+
+    # ==================== ROLLUPS ====================
+
+    async def refresh(self):
+        """Flush, aggregate every event not rolled up yet, then recompute the dashboard figures"""
+        await self.flush()
+        try:
+            while await self._run(self._roll_up) == self.batch_size:
+                pass
+        except OperationalError as e:
+            # Another worker holds the write lock; its rollup covers the same events
+            logger.warning("analytics.rollup_skipped", error=str(e))
+        self._summary = await self._run(self._compute_summary, datetime.now())
+
+    def _roll_up(self) -> int:
+        """Aggregate one batch of pending events into every granularity; returns the batch size"""
+        with self.engine.begin() as conn:
+            # Concurrent workers take disjoint batches on databases with row locks (SQLite serializes them)
+            rows = conn.execute(
+                select(analytics_events.c.id, analytics_events.c.kind, analytics_events.c.amount,
+                       analytics_events.c.occurred_at)
+                .where(analytics_events.c.rolled_up == False)  # noqa: E712
+                .order_by(analytics_events.c.id).limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                return 0
+            buckets: Dict[Tuple[str, str, datetime], List[float]] = {}
+            for row in rows:
+                for granularity in GRANULARITIES:
+                    entry = buckets.setdefault((granularity, row.kind, bucket_start(row.occurred_at, granularity)),
+                                               [0, 0.0])
+                    entry[0] += 1
+                    entry[1] += row.amount
+            for key, (events, total) in buckets.items():
+                self._add_to_bucket(conn, key, events, total)
+            conn.execute(
+                analytics_events.update()
+                .where(analytics_events.c.id.in_([row.id for row in rows]))
+                .values(rolled_up=True)
+            )
+        return len(rows)
+
+    @staticmethod
+    def _add_to_bucket(conn, key: Tuple[str, str, datetime], events: int, total: float):
+        """Increment a bucket, inserting it if it does not exist yet"""
+        granularity, kind, start = key
+        where = (
+            (analytics_rollups.c.granularity == granularity)
+            & (analytics_rollups.c.kind == kind)
+            & (analytics_rollups.c.bucket_start == start)
+        )
+        increment = analytics_rollups.update().where(where).values(
+            events=analytics_rollups.c.events + events, total=analytics_rollups.c.total + total
+        )
+        if conn.execute(increment).rowcount:
+            return
+        try:
+            with conn.begin_nested():
+                conn.execute(analytics_rollups.insert().values(
+                    granularity=granularity, kind=kind, bucket_start=start, events=events, total=total
+                ))
+        except IntegrityError:
+            # Another worker inserted the bucket first
+            conn.execute(increment)
+
+    async def _refresh_loop(self):
+        """Refresh rollups periodically"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("analytics.refresh_failed", error=str(e))
+
+    # ==================== QUERIES ====================
+
+    def _sum(self, conn, granularity: str, kind: str, since: datetime, until: Optional[datetime] = None) -> float:
+        query = select(func.coalesce(func.sum(analytics_rollups.c.total), 0.0)).where(
+            (analytics_rollups.c.granularity == granularity)
+            & (analytics_rollups.c.kind == kind)
+            & (analytics_rollups.c.bucket_start >= since)
+        )
+        if until is not None:
+            query = query.where(analytics_rollups.c.bucket_start < until)
+        return float(conn.execute(query).scalar())
+
+    def _compute_summary(self, now: datetime) -> Dict[str, float]:
+        """Revenue this month (daily buckets) and week-to-date revenue against the same span of
+        last week (one weekly bucket and at most 168 hourly ones)"""
+        month_start = bucket_start(now, "day").replace(day=1)
+        week_start = bucket_start(now, "week")
+        with self.engine.connect() as conn:
+            monthly = self._sum(conn, "day", REVENUE_EVENT, month_start)
+            this_week = self._sum(conn, "week", REVENUE_EVENT, week_start)
+            last_week = self._sum(conn, "hour", REVENUE_EVENT, week_start - timedelta(days=7),
+                                  bucket_start(now, "hour") - timedelta(days=7, hours=-1))
+        return {"monthly_revenue": round(monthly, 2), "weekly_growth": _growth(this_week, last_week)}
+
+    def summary(self) -> Dict[str, float]:
+        """Dashboard figures as of the last refresh"""
+        return dict(self._summary)
+
+    async def series(self, kind: str, granularity: str, since: datetime,
+                     until: Optional[datetime] = None) -> List[Dict]:
+        """Buckets of one event kind between since and until"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        return await self._run(self._series, kind, granularity, since, until)
+
+    def _series(self, kind: str, granularity: str, since: datetime, until: Optional[datetime]) -> List[Dict]:
+        query = (
+            select(analytics_rollups.c.bucket_start, analytics_rollups.c.events, analytics_rollups.c.total)
+            .where((analytics_rollups.c.granularity == granularity) & (analytics_rollups.c.kind == kind)
+                   & (analytics_rollups.c.bucket_start >= bucket_start(since, granularity)))
+            .order_by(analytics_rollups.c.bucket_start)
+        )
+        if until is not None:
+            query = query.where(analytics_rollups.c.bucket_start <= until)
+        with self.engine.connect() as conn:
+            return [
+                {"start": row.bucket_start.isoformat(), "events": row.events, "total": round(row.total, 2)}
+                for row in conn.execute(query)
+            ]
+
+
+# ==================== API ====================
+
+class AnalyticsEvent(BaseModel):
+    """Event pushed by billing or other systems"""
+    kind: str = Field(..., min_length=1, max_length=64)
+    amount: float = 0.0
+    occurred_at: Optional[datetime] = None
+
+
+def create_analytics_router(analytics: AnalyticsRollups, ingest_token: str) -> APIRouter:
+    """Router with event ingestion and rollup series"""
+    router = APIRouter()
+
+    @router.post("/api/analytics/events", status_code=202)
+    async def ingest_events(events: List[AnalyticsEvent], x_ingest_token: Optional[str] = Header(None)):
+        """Accept events (e.g. payments from the billing webhook); disabled while no ingest token is set"""
+        if not ingest_token or not hmac.compare_digest(x_ingest_token or "", ingest_token):
+            raise HTTPException(status_code=401, detail="Invalid ingest token")
+        for event in events:
+            occurred_at = event.occurred_at
+            if occurred_at is not None and occurred_at.tzinfo is not None:
+                # Buckets are in server local time, like every other dashboard timestamp
+                occurred_at = occurred_at.astimezone().replace(tzinfo=None)
+            analytics.record(event.kind, event.amount, occurred_at)
+        return {"accepted": len(events)}
+
+    @router.get("/api/analytics/rollups")
+    async def rollup_series(
+        kind: str = REVENUE_EVENT,
+        granularity: str = Query("day", pattern="^(hour|day|week)$"),
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ):
+        """Pre-aggregated buckets of one event kind (default: daily revenue for the last 30 days)"""
+        since = since or datetime.now() - timedelta(days=30)
+        return {"kind": kind, "granularity": granularity,
+                "buckets": await analytics.series(kind, granularity, since, until)}
+
+    return router
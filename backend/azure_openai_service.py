@@ -4,44 +4,47 @@ Handles Azure OpenAI API interactions with authentication and error handling
 """
 
 import os
-import json
 import asyncio
-from typing import Dict, List, Optional, Any
+import importlib.util
+from typing import Dict, List, Optional, Any, TYPE_CHECKING
 from datetime import datetime
 
+from clients import clients
+from logging_config import get_logger
+from tracing import span
+
+logger = get_logger(__name__)
+
 # Import Azure settings
 try:
     from azure_settings import get_azure_config
-    AZURE_CONFIG = get_azure_config()
 except ImportError:
-    print("⚠️  azure_settings.py not found. Using environment variables only.")
-    AZURE_CONFIG = None
+    logger.debug("azure_openai.no_azure_settings", fallback="environment")
+    get_azure_config = None
 
-# Azure OpenAI imports
-try:
-    from openai import AzureOpenAI
-    from azure.identity import DefaultAzureCredential, get_bearer_token_provider
-    AZURE_AD_AVAILABLE = True
-except ImportError:
-    print("⚠️  Azure AD authentication not available. Using API key authentication only.")
-    from openai import AzureOpenAI
-    AZURE_AD_AVAILABLE = False
+# The openai and azure.identity packages are imported when the client is created,
+# not at import time - together they add most of a second to process startup
+AZURE_AD_AVAILABLE = importlib.util.find_spec("azure") is not None and \
+    importlib.util.find_spec("azure.identity") is not None
+
+if TYPE_CHECKING:
+    from openai import AsyncAzureOpenAI
 
 class AzureOpenAIService:
     """Azure OpenAI service with AD and API key authentication"""
     
-    def __init__(self, use_azure_ad: bool = False):
+    def __init__(self, use_azure_ad: bool = False, http_pool=None):
         """Initialize Azure OpenAI service"""
-        print("🤖 RED AI Service - Interior Design Assistant")
-        print("=" * 50)
-        
+        # Shared connection pool (http_pool.HTTPClientPool); None uses the process-wide pool
+        self.http_pool = http_pool
         # Use Azure config if available, otherwise fall back to environment variables
-        if AZURE_CONFIG:
-            self.endpoint = AZURE_CONFIG["endpoint"]
-            self.api_version = AZURE_CONFIG["api_version"]
-            self.deployment_name = AZURE_CONFIG["gpt_deployment"]
-            self.azure_keys = [AZURE_CONFIG["api_key"], AZURE_CONFIG["backup_key"]]
-            print("✅ Loading Azure configuration from azure_settings.py")
+        azure_config = get_azure_config() if get_azure_config else None
+        if azure_config:
+            self.endpoint = azure_config["endpoint"]
+            self.api_version = azure_config["api_version"]
+            self.deployment_name = azure_config["gpt_deployment"]
+            self.azure_keys = [azure_config["api_key"], azure_config["backup_key"]]
+            config_source = "azure_settings.py"
         else:
             self.endpoint = os.getenv("AZURE_OPENAI_ENDPOINT") or os.getenv("AZURE_ENDPOINT_KEY")
             self.api_version = os.getenv("AZURE_OPENAPI_VERSION") or os.getenv("OPENAI_API_VERSION", "2024-02-01")
@@ -52,7 +55,7 @@ class AzureOpenAIService:
                 os.getenv("AZURE_OPENAI_API_KEY") or os.getenv("AZURE_OPENAI_KEY"),
                 os.getenv("AZURE_OPENAI_API_KEY_2") or os.getenv("AZURE_OPENAI_KEY_2")
             ]
-            print("📋 Loading Azure configuration from environment variables")
+            config_source = "environment"
         
         # Initialize default values for missing configuration
         self.endpoint = self.endpoint or ""
@@ -61,30 +64,29 @@ class AzureOpenAIService:
         self.azure_keys = [key or "" for key in self.azure_keys]
         
         # Validate configuration
-        self.config_valid = self._validate_configuration()
+        self.config_valid = self._validate_configuration(config_source)
         
         self.use_azure_ad = use_azure_ad and AZURE_AD_AVAILABLE
         self.client = None
+        # Called with (prompt_tokens, completion_tokens) after every completion
+        self.usage_callback = None
         
         if self.config_valid:
             try:
                 self.client = self._initialize_client()
-                print("✅ Azure OpenAI client initialized successfully")
+                logger.info("azure_openai.client_initialized", endpoint=self.endpoint,
+                            deployment=self.deployment_name)
             except Exception as e:
-                print(f"❌ Failed to initialize Azure OpenAI client: {e}")
+                logger.error("azure_openai.client_init_failed", error=str(e))
                 self.config_valid = False
         else:
-            print("❌ Azure OpenAI configuration invalid. Service will not be available.")
-            print("💡 Please check your .env file or azure_settings.py configuration")
+            logger.error("azure_openai.unavailable",
+                         hint="check your .env file or azure_settings.py configuration")
     
-    def _validate_configuration(self) -> bool:
+    def _validate_configuration(self, config_source: str = "environment") -> bool:
         """Validate Azure OpenAI configuration"""
         # Validate that we have actual API keys, not placeholder values
-        if not self.azure_keys[0] or self.azure_keys[0].startswith("AZURE_"):
-            print("❌ Azure OpenAI API key not configured")
-        
-        if not self.azure_keys[1] or self.azure_keys[1].startswith("AZURE_"):
-            print("⚠️  Backup Azure OpenAI API key not configured")
+        has_backup_key = bool(self.azure_keys[1] and not self.azure_keys[1].startswith("AZURE_"))
         
         # Ensure endpoint is correctly formatted (only if endpoint exists)
         if self.endpoint and not self.endpoint.endswith('/'):
@@ -102,72 +104,94 @@ class AzureOpenAIService:
             "hasDeployment": has_deployment
         }
         
-        print(f"Azure OpenAI Configuration: {json.dumps(config_status, indent=2)}")
+        logger.info("azure_openai.config", source=config_source, has_backup_key=has_backup_key, **config_status)
         
         if not all(config_status.values()):
-            print("❌ Missing Azure OpenAI configuration:")
-            if not has_api_key:
-                print("   - AZURE_OPENAI_KEY or AZURE_OPENAI_API_KEY not set")
-            if not has_endpoint:
-                print("   - AZURE_OPENAI_ENDPOINT not set")
-            if not has_api_version:
-                print("   - OPENAI_API_VERSION not set")
-            if not has_deployment:
-                print("   - AZURE_OPENAI_DEPLOYMENT_NAME not set")
+            missing = [name for name, present in (
+                ("AZURE_OPENAI_KEY or AZURE_OPENAI_API_KEY", has_api_key),
+                ("AZURE_OPENAI_ENDPOINT", has_endpoint),
+                ("OPENAI_API_VERSION", has_api_version),
+                ("AZURE_OPENAI_DEPLOYMENT_NAME", has_deployment)
+            ) if not present]
+            logger.error("azure_openai.config_missing", missing=missing)
             return False
         
         return True
         
-    def _initialize_client(self) -> Optional[AzureOpenAI]:
+    def _http_client(self):
+        """Pooled keep-alive client for the Azure endpoint host"""
+        if self.http_pool is None:
+            from http_pool import get_http_pool
+            self.http_pool = get_http_pool()
+        return self.http_pool.client_for(self.endpoint)
+    
+    def _initialize_client(self) -> Optional["AsyncAzureOpenAI"]:
         """Initialize Azure OpenAI client with AD or API key authentication"""
         
         if not self.config_valid:
             return None
+        
+        from openai import AsyncAzureOpenAI
             
         if self.use_azure_ad and AZURE_AD_AVAILABLE:
-            print("🔐 Initializing Azure OpenAI with Azure AD authentication...")
+            logger.info("azure_openai.auth", method="azure_ad")
             try:
+                from azure.identity import DefaultAzureCredential, get_bearer_token_provider
                 token_provider = get_bearer_token_provider(
                     DefaultAzureCredential(), 
                     "https://cognitiveservices.azure.com/.default"
                 )
                 
-                client = AzureOpenAI(
+                client = AsyncAzureOpenAI(
                     api_version=self.api_version,
                     azure_endpoint=self.endpoint,
-                    azure_ad_token_provider=token_provider
+                    azure_ad_token_provider=token_provider,
+                    http_client=self._http_client()
                 )
                 
-                print("✅ Azure AD authentication successful")
                 return client
                 
             except Exception as e:
-                print(f"❌ Azure AD authentication failed: {e}")
-                print("🔄 Falling back to API key authentication...")
+                logger.warning("azure_openai.azure_ad_failed", error=str(e), fallback="api_key")
                 
         # Fallback to API key authentication
         if not self.azure_keys[0]:
-            print("❌ No API key available for authentication")
+            logger.error("azure_openai.no_api_key")
             return None
             
-        print("🔑 Initializing Azure OpenAI with API key authentication...")
+        logger.info("azure_openai.auth", method="api_key")
         try:
-            client = AzureOpenAI(
+            client = AsyncAzureOpenAI(
                 api_key=self.azure_keys[0],
                 api_version=self.api_version,
-                azure_endpoint=self.endpoint
+                azure_endpoint=self.endpoint,
+                http_client=self._http_client()
             )
             
-            print("✅ API key authentication successful")
             return client
         except Exception as e:
-            print(f"❌ Failed to initialize Azure OpenAI client: {e}")
+            logger.error("azure_openai.client_init_failed", error=str(e))
             return None
     
     def is_configured(self) -> bool:
         """Check if the service is properly configured"""
         return self.config_valid and self.client is not None
     
+    def _record_usage(self, usage) -> Dict:
+        """Report token usage to the usage callback and return it for the response"""
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        if usage is not None and self.usage_callback is not None:
+            try:
+                self.usage_callback(prompt_tokens, completion_tokens)
+            except Exception as e:
+                logger.warning("azure_openai.usage_record_failed", error=str(e))
+        return {
+            "tokens_used": usage.total_tokens if usage else 0,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens
+        }
+    
     # DALL-E image generation removed - using BFL (Black Forest Labs) instead
     
     async def analyze_image(self, image_base64: str, prompt: str) -> Dict:
@@ -179,11 +203,9 @@ class AzureOpenAIService:
             }
             
         try:
-            print(f"👁️ Analyzing image with GPT-4 Vision...")
-            
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[
+            # Embedding the image as a data URL copies the whole base64 payload
+            with span("prompt", **{"image.base64_chars": len(image_base64)}):
+                messages = [
                     {
                         "role": "user",
                         "content": [
@@ -197,24 +219,32 @@ class AzureOpenAIService:
                             }
                         ]
                     }
-                ],
-                max_tokens=1000
-            )
+                ]
+            
+            with span("upstream", **{"gen_ai.request.model": self.deployment_name}) as upstream:
+                response = await self.client.chat.completions.create(
+                    model=self.deployment_name,
+                    messages=messages,
+                    max_tokens=1000
+                )
+                if upstream is not None and response.usage is not None:
+                    upstream.set(**{"gen_ai.usage.input_tokens": response.usage.prompt_tokens,
+                                    "gen_ai.usage.output_tokens": response.usage.completion_tokens})
             
             content = response.choices[0].message.content
             
-            print(f"✅ Image analysis completed")
-            print(f"📊 Analysis: {content[:200]}...")
+            logger.debug("azure_openai.image_analysis", chars=len(content or ""),
+                         tokens=getattr(response.usage, "total_tokens", None))
             
             return {
                 "success": True,
                 "analysis": content,
-                "tokens_used": response.usage.total_tokens if response.usage else 0
+                **self._record_usage(response.usage)
             }
             
         except Exception as e:
             error_msg = str(e)
-            print(f"❌ Image analysis failed: {e}")
+            logger.warning("azure_openai.image_analysis_failed", error=error_msg)
             
             # Check for common authentication errors
             if "401" in error_msg or "Access denied" in error_msg:
@@ -238,29 +268,31 @@ class AzureOpenAIService:
             }
             
         try:
-            print(f"💬 Generating chat completion...")
-            
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=0.7
-            )
+            with span("upstream", **{"gen_ai.request.model": self.deployment_name}) as upstream:
+                response = await self.client.chat.completions.create(
+                    model=self.deployment_name,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.7
+                )
+                if upstream is not None and response.usage is not None:
+                    upstream.set(**{"gen_ai.usage.input_tokens": response.usage.prompt_tokens,
+                                    "gen_ai.usage.output_tokens": response.usage.completion_tokens})
             
             content = response.choices[0].message.content
             
-            print(f"✅ Chat completion generated")
-            print(f"💬 Response: {content[:200]}...")
+            logger.debug("azure_openai.chat_completion", chars=len(content or ""),
+                         tokens=getattr(response.usage, "total_tokens", None))
             
             return {
                 "success": True,
                 "content": content,
-                "tokens_used": response.usage.total_tokens if response.usage else 0
+                **self._record_usage(response.usage)
             }
             
         except Exception as e:
             error_msg = str(e)
-            print(f"❌ Chat completion failed: {e}")
+            logger.warning("azure_openai.chat_completion_failed", error=error_msg)
             
             # Check for common authentication errors
             if "401" in error_msg or "Access denied" in error_msg:
@@ -278,21 +310,23 @@ class AzureOpenAIService:
     def switch_to_backup_key(self):
         """Switch to backup API key in case of rate limiting"""
         if len(self.azure_keys) > 1 and self.azure_keys[1] and not self.use_azure_ad:
-            print("🔄 Switching to backup API key...")
             backup_key = self.azure_keys[1]
             
             try:
-                self.client = AzureOpenAI(
+                from openai import AsyncAzureOpenAI
+                # Reuses the pooled connections of the primary key
+                self.client = AsyncAzureOpenAI(
                     api_key=backup_key,
                     api_version=self.api_version,
-                    azure_endpoint=self.endpoint
+                    azure_endpoint=self.endpoint,
+                    http_client=self._http_client()
                 )
                 
-                print("✅ Switched to backup key")
+                logger.info("azure_openai.switched_to_backup_key")
             except Exception as e:
-                print(f"❌ Failed to switch to backup key: {e}")
+                logger.error("azure_openai.backup_key_failed", error=str(e))
         else:
-            print("❌ No backup key available")
+            logger.error("azure_openai.no_backup_key")
     
     def get_service_info(self) -> Dict:
         """Get service configuration info"""
@@ -310,21 +344,27 @@ class AzureOpenAIService:
         }
 
 # Factory function to create service instance
-def create_azure_openai_service(use_azure_ad: bool = None) -> AzureOpenAIService:
+def create_azure_openai_service(use_azure_ad: bool = None, http_pool=None) -> AzureOpenAIService:
     """Create Azure OpenAI service instance"""
     if use_azure_ad is None:
         use_azure_ad = os.getenv("USE_AZURE_AD", "false").lower() == "true"
     
-    return AzureOpenAIService(use_azure_ad=use_azure_ad)
+    return AzureOpenAIService(use_azure_ad=use_azure_ad, http_pool=http_pool)
+
+clients.register("azure_openai", create_azure_openai_service)
+
+def get_azure_openai_service() -> AzureOpenAIService:
+    """Shared Azure OpenAI service, created on first use"""
+    return clients.get("azure_openai")
 
 # Global function for backward compatibility
 def generate_image_with_azure_dalle(prompt: str, style: str = "vivid", quality: str = "standard") -> Optional[str]:
     """Generate image with Azure DALL-E (backward compatibility function)"""
     try:
-        service = create_azure_openai_service()
+        service = get_azure_openai_service()
         
         if not service.is_configured():
-            print("❌ Azure OpenAI service not configured")
+            logger.error("azure_openai.unavailable", reason="not configured")
             return None
             
         # This is a sync wrapper for the async function
@@ -341,11 +381,11 @@ def generate_image_with_azure_dalle(prompt: str, style: str = "vivid", quality:
         if result.get("success"):
             return result.get("image_url")
         else:
-            print(f"❌ Image generation failed: {result.get('error')}")
+            logger.error("azure_openai.image_failed", error=result.get("error"))
             return None
             
     except Exception as e:
-        print(f"❌ Error in generate_image_with_azure_dalle: {e}")
+        logger.error("azure_openai.image_failed", error=str(e))
         return None
 
 # ====================
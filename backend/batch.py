@@ -0,0 +1,172 @@
+"""
+Batch Requests for RED AI
+POST /api/batch runs several API requests concurrently inside the process and returns every
+response in one body, so loading the dashboard is one round trip instead of six
+"""
+
+import asyncio
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from response_cache import encode_json
+
+BATCH_PATH = "/api/batch"
+
+# Outer request headers that describe the batch body rather than the caller
+NOT_INHERITED = {
+    b"content-length", b"content-type", b"transfer-encoding", b"accept-encoding",
+    b"if-none-match", b"if-match", b"if-modified-since", b"expect", b"connection",
+}
+# Headers a trusted proxy vouches for; a sub-request inherits them and cannot set its own
+IDENTITY_HEADERS = {b"x-user-id", b"x-real-ip", b"x-forwarded-for"}
+ALLOWED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+
+
+class SubRequest(BaseModel):
+    """One request inside a batch"""
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str  # may include a query string
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None  # sent as JSON
+
+
+class BatchRequest(BaseModel):
+    """Requests to run; they run concurrently, so writes that depend on each other need separate batches"""
+    requests: List[SubRequest]
+
+
+class _ResponseTooLarge(Exception):
+    pass
+
+
+class BatchDispatcher:
+    """Runs sub-requests through the whole app (middleware included, so every sub-request is rate
+    limited, traced and served from caches like a direct call) and multiplexes the responses"""
+
+    def __init__(self, app, max_requests: int = 20, max_response_bytes: int = 5 * 1024 * 1024,
+                 timeout: float = 30.0):
+        self.app = app
+        self.max_requests = max_requests
+        self.max_response_bytes = max_response_bytes
+        self.timeout = timeout
+
+    async def run(self, scope: Dict[str, Any], requests: List[SubRequest]) -> bytes:
+        """Body of the batch response: {"responses": [...]} in request order"""
+        if len(requests) > self.max_requests:
+            raise HTTPException(status_code=413, detail=f"A batch holds at most {self.max_requests} requests")
+        results = await asyncio.gather(*(self._run_one(scope, request) for request in requests))
+        # Every body fits the limit on its own; the sum is enforced here in request order
+        budget = self.max_response_bytes
+        items = []
+        for request, (status, headers, body) in zip(requests, results):
+            if len(body) > budget:
+                status, headers, body = _error(413, "Batch response size limit exceeded")
+            budget -= len(body)
+            items.append(_encode_item(request.id, status, headers, body))
+        return b'{"responses":[' + b",".join(items) + b"]}"
+
+    async def _run_one(self, scope: Dict[str, Any], request: SubRequest) -> Tuple[int, Dict[str, str], bytes]:
+        method = request.method.upper()
+        if method not in ALLOWED_METHODS:
+            return _error(405, f"Method {request.method} is not allowed in a batch")
+        path, _, query = request.path.partition("?")
+        if not path.startswith("/api/") or path.startswith(BATCH_PATH):
+            return _error(400, "Batched paths must be API paths other than /api/batch")
+        try:
+            return await asyncio.wait_for(self._call(scope, method, path, query, request), self.timeout)
+        except asyncio.TimeoutError:
+            return _error(504, "Request timed out")
+        except _ResponseTooLarge:
+            return _error(413, "Batch response size limit exceeded")
+
+    async def _call(self, parent: Dict[str, Any], method: str, path: str, query: str,
+                    request: SubRequest) -> Tuple[int, Dict[str, str], bytes]:
+        overrides = {key.lower().encode("latin-1"): value.encode("latin-1") for key, value in request.headers.items()
+                     if key.lower().encode("latin-1") not in IDENTITY_HEADERS}
+        headers = [(key, value) for key, value in parent["headers"]
+                   if key not in NOT_INHERITED and key not in overrides]
+        headers += list(overrides.items())
+        body = b""
+        if request.body is not None:
+            body = encode_json(request.body)
+            headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        scope = {key: parent[key] for key in ("type", "asgi", "http_version", "scheme", "server", "client",
+                                              "root_path", "state") if key in parent}
+        scope.update(method=method, path=path, raw_path=path.encode(), query_string=query.encode(),
+                     headers=headers)
+
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                # Nothing more will arrive; long-lived handlers see the client go away
+                await asyncio.Event().wait()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        status, response_headers, chunks, size = 500, {}, [], 0
+
+        async def send(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for key, value in message.get("headers", []):
+                    key = key.decode("latin-1").lower()
+                    if key != "content-length":
+                        value = value.decode("latin-1")
+                        response_headers[key] = f"{response_headers[key]}, {value}" if key in response_headers else value
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size > self.max_response_bytes:
+                    raise _ResponseTooLarge()
+                chunks.append(chunk)
+
+        try:
+            await self.app(scope, receive, send)
+        except _ResponseTooLarge:
+            raise
+        except Exception:
+            # The error middleware has already logged it and sent the 500
+            if not chunks:
+                return _error(500, "Internal Server Error")
+        return status, response_headers, b"".join(chunks)
+
+
+def _error(status: int, detail: str) -> Tuple[int, Dict[str, str], bytes]:
+    return status, {"content-type": "application/json"}, encode_json({"detail": detail})
+
+
+def _encode_item(item_id: Optional[str], status: int, headers: Dict[str, str], body: bytes) -> bytes:
+    """One response; JSON bodies are spliced in as they are, other text as a string, binary as base64"""
+    media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    item = encode_json({"id": item_id, "status": status, "headers": headers})[:-1]
+    if not body:
+        value = b"null"
+    elif media_type == "application/json" or media_type.endswith("+json"):
+        value = body
+    elif media_type.startswith("text/") or "json" in media_type:
+        value = encode_json(body.decode("utf-8", errors="replace"))
+    else:
+        item += b',"body_encoding":"base64"'
+        value = encode_json(base64.b64encode(body).decode("ascii"))
+    return item + b',"body":' + value + b"}"
+
+
+def create_batch_router(dispatcher: BatchDispatcher) -> APIRouter:
+    """Router with POST /api/batch"""
+    router = APIRouter()
+
+    @router.post(BATCH_PATH)
+    async def batch(payload: BatchRequest, request: Request):
+        """Run up to max_requests API requests concurrently; each response keeps its own status and headers"""
+        body = await dispatcher.run(request.scope, payload.requests)
+        return Response(content=body, media_type="application/json")
+
+    return router
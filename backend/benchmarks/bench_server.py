@@ -0,0 +1,96 @@
+"""
+Instrumented launcher used by the load test
+
+Serves an app (main:app or ai_server:app) with an extra /__bench__/stats route that
+reports resident memory and event-loop lag measured inside the server process.
+
+    python benchmarks/bench_server.py main:app --port 8000
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import resource
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Event-loop lag sampling period
+LAG_INTERVAL = 0.01
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class BenchApp:
+    """ASGI wrapper adding /__bench__/stats and an event-loop lag sampler"""
+
+    def __init__(self, app):
+        self.app = app
+        self.lags = []
+        self._sampler = None
+
+    async def _sample_lag(self):
+        """Record how late each periodic wake-up is"""
+        while True:
+            expected = time.perf_counter() + LAG_INTERVAL
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(max(0.0, time.perf_counter() - expected))
+
+    def _stats(self, reset: bool) -> dict:
+        lags = sorted(self.lags)
+        if reset:
+            self.lags = []
+
+        def pct(p: float) -> float:
+            return round(lags[min(len(lags) - 1, int(len(lags) * p))] * 1000, 3) if lags else 0.0
+
+        return {
+            "rss_mb": round(rss_mb(), 1),
+            "loop_lag_ms": {"samples": len(lags), "p50": pct(0.50), "p99": pct(0.99),
+                            "max": round(lags[-1] * 1000, 3) if lags else 0.0}
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/__bench__/stats":
+            if self._sampler is None:
+                self._sampler = asyncio.ensure_future(self._sample_lag())
+            body = json.dumps(self._stats(reset=b"reset=1" in scope.get("query_string", b""))).encode()
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        await self.app(scope, receive, send)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an app with benchmark instrumentation")
+    parser.add_argument("app", help="module:attribute, e.g. main:app")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    module_name, attribute = args.app.split(":")
+    app = getattr(importlib.import_module(module_name), attribute)
+
+    import uvicorn
+    uvicorn.run(BenchApp(app), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
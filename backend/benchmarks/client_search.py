@@ -0,0 +1,158 @@
+"""
+Client search benchmark
+
+Lists synthetic clients (Latin and Cyrillic names, companies, tags and emails) to a file and
+builds their segment in a worker process, as ClientSearch does, while timing the longest stall of
+this process's event loop. Then maps the segment and times autocomplete lookups for one- to
+four-character prefixes, two-word queries and matches inside words (results still encoded, as
+the endpoint sends them), plus adding and removing clients over it.
+Prints a JSON report with microseconds per operation, the segment file size, the builder's peak
+memory, and the memory this process added: resident (counting the mapped pages it read, which
+every worker mapping the file shares) and anonymous (its own).
+
+    python benchmarks/client_search.py --clients 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from client_search import ClientSearchSegment, SegmentedClientIndex, _encode, build_segment  # noqa: E402
+
+FIRST = ["Sarah", "José", "Ольга", "Иван", "Anna", "Mikhail", "Zoë", "Дмитрий", "Léa", "Peter", "Мария", "Chen"]
+LAST = ["Wilson", "Álvarez", "Ёлкина", "Petrov", "Johnson", "Smirnova", "Müller", "Kowalski", "Иванов", "Lee"]
+WORDS = ["Design", "Properties", "Студия", "Interiors", "Build", "Ремонт", "Home", "Loft", "Group", "Архитектура"]
+
+
+def synthetic_client(number: int) -> dict:
+    rng = random.Random(number)
+    first, last = rng.choice(FIRST), rng.choice(LAST) + str(rng.randrange(1000))
+    return {
+        "id": str(number),
+        "name": f"{first} {last}",
+        "email": f"{first.lower()}.{number}@example.com",
+        "company": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.randrange(10000)}",
+        "tags": rng.sample(["VIP", "Referral", "Повторный", "New"], 2),
+        "projects_count": rng.randrange(20),
+        "last_contact": (datetime(2026, 1, 1) + timedelta(minutes=rng.randrange(500000))).isoformat(),
+    }
+
+
+def rss_mb() -> int:
+    """Current resident memory of the process"""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 2 ** 20
+
+
+def anonymous_mb() -> int:
+    """Resident memory of the process not backed by a file, which no other worker can share"""
+    with open("/proc/self/smaps_rollup") as smaps:
+        fields = dict(line.split(":", 1) for line in smaps if ":" in line)
+    return int(fields["Anonymous"].split()[0]) // 1024
+
+
+async def build_in_worker(source: str, target: str) -> float:
+    """Build a segment in a worker process; returns the longest the event loop went without running"""
+    stall, last = 0.0, time.perf_counter()
+
+    async def tick():
+        nonlocal stall, last
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            stall, last = max(stall, now - last - 0.01), now
+
+    ticker = asyncio.ensure_future(tick())
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        await asyncio.get_running_loop().run_in_executor(executor, build_segment, source, target, 0)
+    ticker.cancel()
+    return stall
+
+
+def us_per_call(fn, args_list):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for args in args_list:
+            fn(*args)
+        best = min(best, (time.perf_counter() - start) / len(args_list) * 1e6)
+    return round(best, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure client autocomplete lookups and index maintenance")
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    directory = tempfile.mkdtemp(prefix="client-search-benchmark-")
+    source, target = os.path.join(directory, "clients.jsonl"), os.path.join(directory, "clients-0.seg")
+    with open(source, "wb") as lines:
+        lines.writelines(_encode(synthetic_client(number)) + b"\n" for number in range(args.clients))
+    start = time.perf_counter()
+    stall_s = asyncio.run(build_in_worker(source, target))
+    build_s = time.perf_counter() - start
+    os.unlink(source)
+
+    before_rss, before_anonymous = rss_mb(), anonymous_mb()
+    index = SegmentedClientIndex(ClientSearchSegment(target))
+    clients = [synthetic_client(number) for number in rng.sample(range(args.clients), min(args.queries, args.clients))]
+
+    def queries(make):
+        return [(make(rng.choice(clients)), 10) for _ in range(args.queries)]
+
+    lookups = {
+        "prefix_1": queries(lambda client: client["name"][:1]),
+        "prefix_2": queries(lambda client: client["name"][:2]),
+        "prefix_4": queries(lambda client: client["name"][:4]),
+        "two_words": queries(lambda client: client["name"].split()[0][:3] + " " + client["name"].split()[1][:3]),
+        "inside_word": queries(lambda client: client["name"].split()[1][1:5]),
+    }
+    report = {name: us_per_call(index.search_encoded, calls) for name, calls in lookups.items()}
+    searched_rss, searched_anonymous = rss_mb() - before_rss, anonymous_mb() - before_anonymous
+
+    # Removed clients are skipped in the segment's stored top lists, which lookups read past
+    churn = rng.sample(clients, min(args.queries, len(clients)))
+    start = time.perf_counter()
+    for client in churn:
+        index.remove(client["id"])
+        index.search(client["name"][:2], 10)
+    remove_us = (time.perf_counter() - start) / len(churn) * 1e6
+    start = time.perf_counter()
+    for client in churn:
+        index.add(client)
+    add_us = (time.perf_counter() - start) / len(churn) * 1e6
+
+    print(json.dumps({
+        "benchmark": "client_search",
+        "clients": args.clients,
+        "build_s": round(build_s, 1),
+        "max_loop_stall_ms": round(stall_s * 1000, 1),
+        "builder_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // 1024,
+        "segment_mb": os.path.getsize(target) // 2 ** 20,
+        "lookup_us": report,
+        "remove_then_lookup_us": round(remove_us, 1),
+        "add_us": round(add_us, 1),
+        "searched_rss_mb": searched_rss,
+        "searched_anonymous_mb": searched_anonymous,
+        "after_writes_anonymous_mb": anonymous_mb() - before_anonymous,
+    }, indent=2, ensure_ascii=False))
+    del index
+    os.unlink(target)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
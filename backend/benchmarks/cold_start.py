@@ -0,0 +1,83 @@
+"""
+Cold-start benchmark for the RED AI backends
+
+Starts the app in a fresh process several times and measures how long it takes
+until the first request is served. Prints a JSON report.
+
+    python benchmarks/cold_start.py --app main:app --runs 5
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    """Pick an unused local port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_serving(url: str, process: subprocess.Popen, timeout: float) -> bool:
+    """Poll url until it answers with 200"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.005)
+    return False
+
+
+def measure(app: str, path: str, timeout: float) -> float:
+    """Seconds from process spawn to the first successful response"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_until_serving(f"http://127.0.0.1:{port}{path}", process, timeout):
+            raise RuntimeError(f"{app} did not serve {path} within {timeout}s")
+        return time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time to first served request")
+    parser.add_argument("--app", default="main:app", help="ASGI app to start (main:app or ai_server:app)")
+    parser.add_argument("--path", default="/health", help="Path polled until it returns 200")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    samples = [measure(args.app, args.path, args.timeout) for _ in range(args.runs)]
+    print(json.dumps({
+        "benchmark": "cold_start",
+        "app": args.app,
+        "runs": args.runs,
+        "min_ms": round(min(samples) * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Response compression benchmark
+
+Reports bandwidth saved and CPU spent per response for the payloads the apps send: the
+floor-plan analysis, design suggestions, a dashboard task list and a long Russian-language
+analysis. Each payload is compressed with gzip and (if installed) Brotli at several levels,
+then sent through CompressionMiddleware to measure the server-side time it adds per request.
+Prints a JSON report.
+
+    python benchmarks/compression.py
+    python benchmarks/compression.py --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.responses import Response  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from ai_service import AIService  # noqa: E402
+from compression import BROTLI_AVAILABLE, CompressionMiddleware, compress  # noqa: E402
+
+RUSSIAN_ROOM = ("Гостиная площадью около 24 м² с двумя окнами на южную сторону. Рекомендуется светлая "
+                "палитра, мебель в скандинавском стиле и зонирование с помощью ковра и подвесного света. ")
+
+
+def payloads() -> dict:
+    now = datetime(2025, 1, 1, 9, 0)
+    tasks = [{
+        "id": str(index), "title": f"Follow up with client {index}", "description": "Send revised kitchen layout",
+        "priority": ("low", "medium", "high")[index % 3], "status": "pending",
+        "due_date": (now + timedelta(days=index)).isoformat(), "client_id": str(index % 7), "project_id": None
+    } for index in range(50)]
+    analysis_ru = {"success": True, "analysis": {
+        "rooms": [{"name": f"Комната {index}", "description": RUSSIAN_ROOM * 6} for index in range(12)],
+        "recommendations": [RUSSIAN_ROOM * 2 for _ in range(10)]
+    }}
+    return {
+        "floor_plan_analysis": AIService._mock_analysis(),
+        "design_suggestions": AIService._mock_design_suggestions(),
+        "dashboard_tasks_50": tasks,
+        "analysis_ru": analysis_ru,
+    }
+
+
+def encode(content) -> bytes:
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def time_us(fn, min_seconds: float = 0.2) -> float:
+    """Mean microseconds per call over at least min_seconds"""
+    fn()
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1e6
+
+
+def codecs():
+    levels = [("gzip", {"gzip_level": 1}), ("gzip", {"gzip_level": 6}), ("gzip", {"gzip_level": 9})]
+    if BROTLI_AVAILABLE:
+        levels += [("br", {"brotli_quality": 4}), ("br", {"brotli_quality": 6}), ("br", {"brotli_quality": 11})]
+    return levels
+
+
+def codec_table(bodies: dict) -> dict:
+    table = {}
+    for name, body in bodies.items():
+        rows = {}
+        for coding, params in codecs():
+            level = next(iter(params.values()))
+            compressed = compress(body, coding, **params)
+            us = time_us(lambda: compress(body, coding, **params))
+            rows[f"{coding}-{level}"] = {
+                "bytes": len(compressed),
+                "ratio": round(len(compressed) / len(body), 3),
+                "compress_us": round(us, 1),
+                "mb_per_s": round(len(body) / us, 1),
+            }
+        table[name] = {"identity_bytes": len(body), "codecs": rows}
+    return table
+
+
+async def asgi_us_per_request(body: bytes, accept_encoding: bytes, requests: int):
+    """Server-side time per request and bytes sent through CompressionMiddleware"""
+    async def endpoint(request):
+        return Response(body, media_type="application/json")
+
+    app = CompressionMiddleware(Starlette(routes=[Route("/payload", endpoint)]))
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/payload", "raw_path": b"/payload", "root_path": "",
+             "query_string": b"", "headers": [(b"host", b"bench"), (b"accept-encoding", accept_encoding)],
+             "server": ("bench", 80), "client": ("127.0.0.1", 50000)}
+    sent = {"bytes": 0}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            sent["bytes"] += len(message.get("body", b""))
+
+    for _ in range(20):
+        await app(dict(scope), receive, send)
+    sent["bytes"] = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6, sent["bytes"] // requests
+
+
+def middleware_table(bodies: dict, requests: int) -> dict:
+    table = {}
+    for name, body in bodies.items():
+        row = {}
+        for label, accept in (("identity", b"identity"), ("gzip", b"gzip"), ("br", b"br, gzip")):
+            if label == "br" and not BROTLI_AVAILABLE:
+                continue
+            us, size = asyncio.run(asgi_us_per_request(body, accept, requests))
+            row[label] = {"us_per_request": round(us, 1), "bytes_sent": size}
+        table[name] = row
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure compression ratio and CPU cost per response")
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    bodies = {name: encode(content) for name, content in payloads().items()}
+    report = {
+        "benchmark": "compression",
+        "brotli_available": BROTLI_AVAILABLE,
+        "codecs": codec_table(bodies),
+        "middleware": middleware_table(bodies, args.requests),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
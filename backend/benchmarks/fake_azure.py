@@ -0,0 +1,151 @@
+"""
+Fake Azure OpenAI server for benchmarks
+
+Answers chat completion requests the way Azure OpenAI does, with a configurable
+latency distribution, injected 429/5xx errors and token usage, so load tests never
+touch the real service.
+
+    python benchmarks/fake_azure.py --port 9100 --latency lognormal:400:0.6 --errors 429=0.02,503=0.01
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from typing import Callable, Dict
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Latency sampler in seconds from fixed:MS, uniform:MIN:MAX, lognormal:MEDIAN:SIGMA or exponential:MEAN"""
+    kind, *params = spec.split(":")
+    values = [float(p) for p in params]
+    if kind == "fixed":
+        return lambda rng: values[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1]) / 1000
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1 / values[0]) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def parse_errors(spec: str) -> Dict[int, float]:
+    """Error injection rates from 429=0.05,500=0.01"""
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        status, rate = part.split("=")
+        rates[int(status)] = float(rate)
+    if sum(rates.values()) > 1:
+        raise ValueError("Error rates add up to more than 1")
+    return rates
+
+
+class FakeAzureOpenAI:
+    """State and handlers of the fake service"""
+
+    def __init__(self, latency: str = "fixed:0", errors: str = "", completion_tokens: int = 150,
+                 retry_after: int = 1, seed: int = 0):
+        self.sample_latency = parse_latency(latency)
+        self.error_rates = parse_errors(errors)
+        self.completion_tokens = completion_tokens
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "completed": 0, "errors": {}, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def _injected_error(self):
+        """Status code to fail with, if any"""
+        roll = self.rng.random()
+        for status, rate in self.error_rates.items():
+            if roll < rate:
+                return status
+            roll -= rate
+        return None
+
+    async def chat_completions(self, request: Request):
+        """POST /openai/deployments/{deployment}/chat/completions"""
+        self.stats["requests"] += 1
+        body = await request.json()
+        await asyncio.sleep(self.sample_latency(self.rng))
+
+        status = self._injected_error()
+        if status is not None:
+            self.stats["errors"][str(status)] = self.stats["errors"].get(str(status), 0) + 1
+            headers = {"Retry-After": str(self.retry_after)} if status == 429 else {}
+            return JSONResponse(
+                {"error": {"code": str(status), "message": f"Injected {status} from fake Azure OpenAI"}},
+                status_code=status, headers=headers
+            )
+
+        prompt_chars = 0
+        for message in body.get("messages", []):
+            content = message.get("content")
+            if isinstance(content, str):
+                prompt_chars += len(content)
+            elif isinstance(content, list):
+                prompt_chars += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+        prompt_tokens = max(1, prompt_chars // 4)
+        completion_tokens = min(self.completion_tokens, body.get("max_tokens") or self.completion_tokens)
+
+        self.stats["completed"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += completion_tokens
+
+        # JSON content so callers that parse the answer take their normal path
+        content = json.dumps({"fake": True, "text": "lorem " * max(0, completion_tokens - 4)})
+        return JSONResponse({
+            "id": f"chatcmpl-fake-{self.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.path_params["deployment"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content}
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    async def get_stats(self, request: Request):
+        """GET /stats - request and error counters"""
+        return JSONResponse(self.stats)
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/openai/deployments/{deployment}/chat/completions", self.chat_completions, methods=["POST"]),
+            Route("/stats", self.get_stats, methods=["GET"]),
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Azure OpenAI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", default="lognormal:400:0.5",
+                        help="fixed:MS, uniform:MIN:MAX, lognormal:MEDIAN:SIGMA or exponential:MEAN (ms)")
+    parser.add_argument("--errors", default="", help="Injected error rates, e.g. 429=0.05,500=0.01")
+    parser.add_argument("--completion-tokens", type=int, default=150)
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    fake = FakeAzureOpenAI(args.latency, args.errors, args.completion_tokens, args.retry_after, args.seed)
+    uvicorn.run(fake.app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
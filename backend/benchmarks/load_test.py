@@ -0,0 +1,258 @@
+"""
+Endpoint load test against a local fake Azure OpenAI
+
+Starts benchmarks/fake_azure.py and the app under test (through bench_server.py),
+drives each scenario at a fixed concurrency and prints a JSON report with latency
+percentiles, throughput, status codes, server RSS and event-loop lag. Save the JSON
+per commit and pass it back with --baseline to flag regressions.
+
+    python benchmarks/load_test.py --app main --concurrency 32 --duration 20 --output main.json
+    python benchmarks/load_test.py --app ai_server --latency fixed:200 --errors 429=0.05
+    python benchmarks/load_test.py --app main --baseline main.json --max-regression 0.15
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+# Scenario name -> (method, path, request kwargs) per app
+SCENARIOS = {
+    "main": {
+        "dashboard-tasks": ("GET", "/api/dashboard/tasks", {}),
+        "chat": ("POST", "/api/ai/chat", {"json": {"message": "Как визуально расширить маленькую кухню?"}}),
+        "generate-design": ("POST", "/api/ai/generate-design", {
+            "json": {"prompt": "Светлая гостиная", "style": "scandinavian", "room_type": "living"}
+        }),
+    },
+    "ai_server": {
+        "chat": ("POST", "/chat", {"data": {"message": "Как визуально расширить маленькую кухню?",
+                                            "context": '{"room_type": "kitchen"}'}}),
+        "generate-design": ("POST", "/generate-design", {
+            "data": {"room_type": "living", "style": "scandinavian", "budget": "150000"}
+        }),
+    },
+}
+
+# Metrics where a higher value is a regression
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def free_port() -> int:
+    """Pick an unused local port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_serving(url: str, timeout: float = 60.0):
+    """Poll url until it answers with 200"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def get_json(url: str) -> dict:
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+async def drive(base_url: str, scenario: tuple, concurrency: int, duration: float) -> dict:
+    """Run one scenario at fixed concurrency; returns latencies and status counts"""
+    method, path, kwargs = scenario
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(ok / elapsed, 2),
+        "error_rate": round(1 - ok / len(latencies), 4) if latencies else 0.0,
+        "status_counts": statuses,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def start_process(args: list, env: dict) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable] + args, cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+@contextlib.contextmanager
+def local_stack(app: str, latency: str, errors: str = "", completion_tokens: int = 150):
+    """Run the fake Azure OpenAI and `app` behind bench_server.py; yields (app url, fake upstream url)"""
+    fake_port, app_port = free_port(), free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "AZURE_OPENAI_ENDPOINT": f"http://127.0.0.1:{fake_port}",
+            "AZURE_OPENAI_API_KEY": "fake-key",
+            "AZURE_OPENAI_KEY": "fake-key",
+            "AZURE_OPENAI_BACKUP_KEY": "fake-backup-key",
+            "OPENAI_API_VERSION": "2024-02-01",
+            "AZURE_OPENAI_DEPLOYMENT_NAME": "gpt-4.1",
+            "USE_AZURE_AD": "false",
+            "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+            "RATE_LIMIT_ENABLED": "false",
+            "TRAFFIC_CAPTURE_ENABLED": "false",
+            "USAGE_DEFAULT_PLAN": "admin",
+            "JOB_QUEUE_SIZE": "100000",
+        }
+        fake = start_process([os.path.join(BENCH_DIR, "fake_azure.py"), "--port", str(fake_port),
+                              "--latency", latency, "--errors", errors,
+                              "--completion-tokens", str(completion_tokens)], env)
+        server = start_process([os.path.join(BENCH_DIR, "bench_server.py"), f"{app}:app",
+                                "--port", str(app_port)], env)
+        base_url, fake_url = f"http://127.0.0.1:{app_port}", f"http://127.0.0.1:{fake_port}"
+        try:
+            wait_until_serving(fake_url + "/stats")
+            wait_until_serving(base_url + "/health")
+            yield base_url, fake_url
+        finally:
+            server.terminate()
+            fake.terminate()
+            server.wait(timeout=30)
+            fake.wait(timeout=30)
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list:
+    """Scenario metrics that got worse than the baseline by more than max_regression"""
+    previous = {s["name"]: s for s in baseline.get("scenarios", [])}
+    regressions = []
+    for scenario in report["scenarios"]:
+        before = previous.get(scenario["name"])
+        if not before:
+            continue
+        for metric in LOWER_IS_BETTER:
+            if before[metric] and scenario[metric] > before[metric] * (1 + max_regression):
+                regressions.append(f"{scenario['name']}.{metric}: {before[metric]} -> {scenario[metric]}")
+        if before["throughput_rps"] and scenario["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            regressions.append(
+                f"{scenario['name']}.throughput_rps: {before['throughput_rps']} -> {scenario['throughput_rps']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the backend against a fake Azure OpenAI")
+    parser.add_argument("--app", choices=sorted(SCENARIOS), default="main")
+    parser.add_argument("--scenarios", nargs="+", help="Subset of scenarios to run")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--latency", default="lognormal:400:0.5", help="Fake upstream latency distribution")
+    parser.add_argument("--errors", default="", help="Fake upstream error rates, e.g. 429=0.05,503=0.01")
+    parser.add_argument("--completion-tokens", type=int, default=150)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    args = parser.parse_args()
+
+    scenarios = {name: spec for name, spec in SCENARIOS[args.app].items()
+                 if not args.scenarios or name in args.scenarios}
+    results = []
+    with local_stack(args.app, args.latency, args.errors, args.completion_tokens) as (base_url, fake_url):
+        for name, spec in scenarios.items():
+            if args.warmup:
+                asyncio.run(drive(base_url, spec, args.concurrency, args.warmup))
+            before = get_json(base_url + "/__bench__/stats?reset=1")
+            upstream_before = get_json(fake_url + "/stats")
+            result = asyncio.run(drive(base_url, spec, args.concurrency, args.duration))
+            after = get_json(base_url + "/__bench__/stats?reset=1")
+            upstream_after = get_json(fake_url + "/stats")
+            results.append({
+                "name": name,
+                **result,
+                "rss_mb": {"start": before["rss_mb"], "end": after["rss_mb"]},
+                "loop_lag_ms": after["loop_lag_ms"],
+                "upstream_requests": upstream_after["requests"] - upstream_before["requests"],
+            })
+
+    report = {
+        "benchmark": "load_test",
+        "app": args.app,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "latency": args.latency,
+            "errors": args.errors,
+            "completion_tokens": args.completion_tokens,
+            "cpu_count": os.cpu_count(),
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"❌ Regression {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Logging overhead benchmark
+
+Measures what logging costs the event loop per request. The containers run with
+PYTHONUNBUFFERED=1, so the old print() calls were one write() each to the stdout pipe;
+when the log collector reads slower than the service writes, the pipe fills and the
+event loop blocks in write(). Each mode runs the same open-loop request rate against a
+pipe drained by a reader thread limited to --drain-kbps:
+
+    print          the three prints the old analyze path made per request (incl. content[:200])
+    structlog      the structured events at LOG_LEVEL=INFO (debug event filtered out)
+    structlog-all  the same events at LOG_LEVEL=DEBUG, all rendered on the listener thread
+
+Prints a JSON report with the logging time per request on the loop (mean and p99) and
+the achieved request rate.
+
+    python benchmarks/logging_overhead.py --rps 2000 --seconds 3
+    python benchmarks/logging_overhead.py --drain-kbps 64
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from logging_config import configure_logging, get_logger, shutdown_logging  # noqa: E402
+
+CONTENT = ("The living room is a rectangular space of about 24 m² with two windows facing south. "
+           "The kitchen opens onto it through a wide archway; the bedroom and bathroom ") * 4
+
+
+class ThrottledReader(threading.Thread):
+    """Drains a pipe at a limited rate, like a log collector that falls behind"""
+
+    def __init__(self, fd: int, kbps: float):
+        super().__init__(name="log-collector", daemon=True)
+        self.fd = fd
+        self.bytes_per_second = kbps * 1024
+        self.total = 0
+
+    def run(self):
+        started = time.perf_counter()
+        while True:
+            chunk = os.read(self.fd, 4096)
+            if not chunk:
+                return
+            self.total += len(chunk)
+            if self.bytes_per_second:
+                delay = started + self.total / self.bytes_per_second - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+
+def old_request(content: str, tokens: int):
+    print("👁️ Analyzing image with GPT-4 Vision...")
+    print("✅ Image analysis completed")
+    print(f"📊 Analysis: {content[:200]}...")
+
+
+def new_request(logger, content: str, tokens: int):
+    logger.debug("azure_openai.image_analysis", chars=len(content), tokens=tokens)
+
+
+async def run_load(log_request, rps: float, seconds: float):
+    """Open-loop requests at `rps`; returns the per-request logging time on the loop in µs"""
+    costs = []
+    interval = 1.0 / rps
+    deadline = time.perf_counter() + seconds
+    next_at = time.perf_counter()
+    while next_at < deadline:
+        started = time.perf_counter()
+        log_request()
+        costs.append((time.perf_counter() - started) * 1e6)
+        next_at += interval
+        delay = next_at - time.perf_counter()
+        await asyncio.sleep(delay if delay > 0 else 0)
+    return costs
+
+
+def measure(mode: str, rps: float, seconds: float, drain_kbps: float) -> dict:
+    read_fd, write_fd = os.pipe()
+    reader = ThrottledReader(read_fd, drain_kbps)
+    reader.start()
+    # Unbuffered text stream over the pipe, like stdout under PYTHONUNBUFFERED=1
+    pipe = io.TextIOWrapper(os.fdopen(write_fd, "wb", buffering=0), encoding="utf-8", write_through=True)
+
+    if mode == "print":
+        saved, sys.stdout = sys.stdout, pipe
+        log_request = lambda: old_request(CONTENT, 150)  # noqa: E731
+    else:
+        configure_logging("DEBUG" if mode == "structlog-all" else "INFO", "json",
+                          sample_rates="debug=1", stream=pipe)
+        logger = get_logger("azure_openai_service")
+        log_request = lambda: new_request(logger, CONTENT, 150)  # noqa: E731
+
+    started = time.perf_counter()
+    try:
+        costs = asyncio.run(run_load(log_request, rps, seconds))
+    finally:
+        elapsed = time.perf_counter() - started
+        if mode == "print":
+            sys.stdout = saved
+        else:
+            shutdown_logging()
+        pipe.close()
+        reader.join(timeout=30)
+
+    costs.sort()
+    return {
+        "requests": len(costs),
+        "achieved_rps": round(len(costs) / elapsed, 1),
+        "log_us_mean": round(sum(costs) / len(costs), 2),
+        "log_us_p99": round(costs[int(len(costs) * 0.99) - 1], 2),
+        "log_us_max": round(costs[-1], 2),
+        "bytes_written": reader.total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure logging cost per request on the event loop")
+    parser.add_argument("--rps", type=float, default=2000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--drain-kbps", type=float, default=256,
+                        help="Log collector read rate in KiB/s (0 = unlimited)")
+    parser.add_argument("--modes", default="print,structlog,structlog-all")
+    args = parser.parse_args()
+
+    results = {mode: measure(mode, args.rps, args.seconds, args.drain_kbps) for mode in args.modes.split(",")}
+    report = {"benchmark": "logging_overhead", "rps": args.rps, "drain_kbps": args.drain_kbps, "modes": results}
+    if "print" in results and "structlog" in results:
+        report["saved_us_per_request"] = round(results["print"]["log_us_mean"] - results["structlog"]["log_us_mean"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
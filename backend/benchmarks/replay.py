@@ -0,0 +1,169 @@
+"""
+Accelerated replay of captured production traffic
+
+Re-issues requests recorded by the traffic capture middleware (TRAFFIC_CAPTURE_ENABLED=true)
+with their original route mix, body sizes, prompt lengths and inter-arrival times, compressed
+by --speed. Requests are sent on schedule whether or not earlier ones have finished, so
+queueing in the server shows up as it did in production. Prints a JSON report per route.
+
+    python benchmarks/replay.py traffic-captures/*.jsonl --summary
+    python benchmarks/replay.py traffic-captures/*.jsonl --target http://staging:8000 --speed 5
+    python benchmarks/replay.py traffic-captures/*.jsonl --local main --speed 10 --latency lognormal:400:0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from load_test import BACKEND_DIR, git_commit, local_stack, percentile
+
+sys.path.insert(0, BACKEND_DIR)
+from traffic_capture import load_captures, synthesize_request  # noqa: E402
+
+
+def summarize(records: list) -> dict:
+    """Request mix of a capture: count, body size and prompt length per route"""
+    routes = {}
+    for record in records:
+        routes.setdefault(f"{record['method']} {record['route']}", []).append(record)
+
+    span = records[-1]["ts"] - records[0]["ts"] if records else 0.0
+    summary = {"requests": len(records), "span_s": round(span, 1),
+               "mean_rps": round(len(records) / span, 2) if span else None, "routes": {}}
+    for route, items in sorted(routes.items(), key=lambda item: -len(item[1])):
+        sizes = sorted(r["body_size"] for r in items)
+        chars = sorted(r["text_chars"] for r in items)
+        durations = sorted(r["duration_ms"] for r in items)
+        summary["routes"][route] = {
+            "count": len(items),
+            "share": round(len(items) / len(records), 4),
+            "body_size_p50": percentile(sizes, 0.50),
+            "body_size_p95": percentile(sizes, 0.95),
+            "text_chars_p50": percentile(chars, 0.50),
+            "text_chars_p95": percentile(chars, 0.95),
+            "captured_p95_ms": percentile(durations, 0.95),
+        }
+    return summary
+
+
+async def replay(records: list, target: str, speed: float, max_in_flight: int, seed: int) -> dict:
+    """Send the records on their (accelerated) schedule; returns per-route results"""
+    rng = random.Random(seed)
+    users = {}
+    results = {}
+    lags = []
+    in_flight = asyncio.Semaphore(max_in_flight)
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+
+    async with httpx.AsyncClient(base_url=target, limits=limits, timeout=300) as client:
+        async def send(record, method, path, kwargs):
+            route = results.setdefault(f"{method} {record['route']}", {"latencies": [], "statuses": {}})
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            finally:
+                in_flight.release()
+            route["latencies"].append(time.perf_counter() - started)
+            route["statuses"][status] = route["statuses"].get(status, 0) + 1
+
+        first = records[0]["ts"]
+        start = time.perf_counter()
+        tasks = []
+        for record in records:
+            due = start + (record["ts"] - first) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await in_flight.acquire()
+            # How far behind schedule the request went out (client or in-flight cap saturation)
+            lags.append(max(0.0, time.perf_counter() - due))
+            method, path, kwargs = synthesize_request(record, rng, users)
+            tasks.append(asyncio.create_task(send(record, method, path, kwargs)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    lags.sort()
+    routes = {}
+    for route, data in sorted(results.items(), key=lambda item: -len(item[1]["latencies"])):
+        latencies = sorted(data["latencies"])
+        routes[route] = {
+            "requests": len(latencies),
+            "status_counts": data["statuses"],
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "achieved_rps": round(len(records) / elapsed, 2) if elapsed else None,
+        "schedule_lag_ms": {"p50": round(percentile(lags, 0.50) * 1000, 2),
+                            "p99": round(percentile(lags, 0.99) * 1000, 2),
+                            "max": round(lags[-1] * 1000, 2) if lags else 0.0},
+        "routes": routes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured traffic at an accelerated rate")
+    parser.add_argument("captures", nargs="+", help="Capture files (one per worker, merged by arrival time)")
+    parser.add_argument("--summary", action="store_true", help="Only print the request mix of the capture")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--target", help="Base URL of a staging instance backed by the fake upstream")
+    target.add_argument("--local", choices=["main", "ai_server"],
+                        help="Start the fake upstream and this app locally and replay against them")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed-up, e.g. 1 (real time) to 20")
+    parser.add_argument("--limit", type=int, help="Replay only the first N requests")
+    parser.add_argument("--max-in-flight", type=int, default=512, help="Cap on concurrent replayed requests")
+    parser.add_argument("--latency", default="lognormal:400:0.5", help="Fake upstream latency with --local")
+    parser.add_argument("--errors", default="", help="Fake upstream error rates with --local")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    records = load_captures(args.captures)[:args.limit]
+    if not records:
+        parser.error("no requests in the capture files")
+
+    report = {
+        "benchmark": "replay",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "captures": [os.path.basename(path) for path in args.captures],
+        "capture": summarize(records),
+    }
+    if not args.summary:
+        if args.local:
+            with local_stack(args.local, args.latency, args.errors) as (base_url, fake_url):
+                report["replay"] = asyncio.run(
+                    replay(records, base_url, args.speed, args.max_in_flight, args.seed)
+                )
+        elif args.target:
+            report["replay"] = asyncio.run(
+                replay(records, args.target, args.speed, args.max_in_flight, args.seed)
+            )
+        else:
+            parser.error("--target or --local is required unless --summary is given")
+        report["replay"]["speed"] = args.speed
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
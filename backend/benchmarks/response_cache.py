@@ -0,0 +1,114 @@
+"""
+Response cache benchmark
+
+Compares the catalog endpoints as they used to be written (a handler returning a freshly built
+dict that FastAPI encodes on every call) with the cached bodies from response_cache, served by
+a route handler and by ResponseCacheMiddleware ahead of routing. Everything runs on a bare
+FastAPI app called directly through ASGI, so the numbers are the endpoint's own cost without
+other middleware or client overhead. Prints a JSON report.
+
+    python benchmarks/response_cache.py --requests 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi import FastAPI, Request  # noqa: E402
+
+from main import DESIGN_SUGGESTIONS, FEATURES  # noqa: E402
+from response_cache import ORJSON_AVAILABLE, ResponseCache, ResponseCacheMiddleware  # noqa: E402
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    cache = ResponseCache()
+    suggestions = cache.register("/api/ai/suggestions", lambda: {"success": True, "suggestions": DESIGN_SUGGESTIONS},
+                                 volatile={"timestamp": lambda: datetime.now().isoformat()})
+    features = cache.register("/api/features", lambda: {**FEATURES, "ai_configured": True})
+
+    @app.get("/dict/suggestions")
+    async def dict_suggestions():
+        # The old handler rebuilt the literal on every call
+        return {
+            "success": True,
+            "suggestions": [dict(group, items=[dict(item) for item in group["items"]]) for group in DESIGN_SUGGESTIONS],
+            "timestamp": datetime.now().isoformat()
+        }
+
+    @app.get("/dict/features")
+    async def dict_features():
+        return {**{key: dict(value) if isinstance(value, dict) else value for key, value in FEATURES.items()},
+                "ai_configured": True}
+
+    @app.get("/cached/suggestions")
+    async def cached_suggestions(request: Request):
+        return suggestions.response(request)
+
+    @app.get("/cached/features")
+    async def cached_features(request: Request):
+        return features.response(request)
+
+    app.add_middleware(ResponseCacheMiddleware, cache=cache)
+    return app
+
+
+async def us_per_request(app, path: str, accept_encoding: bytes, requests: int):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+             "headers": [(b"host", b"bench"), (b"accept-encoding", accept_encoding)],
+             "server": ("bench", 80), "client": ("127.0.0.1", 50000)}
+    sent = {"bytes": 0}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            sent["bytes"] = len(message.get("body", b""))
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await app(dict(scope), receive, send)
+        best = min(best, (time.perf_counter() - start) / requests * 1e6)
+    return best, sent["bytes"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cached catalog endpoints against per-call encoding")
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    app = build_app()
+    endpoints = {}
+    for name, cached_path in (("suggestions", "/api/ai/suggestions"), ("features", "/api/features")):
+        row = {}
+        for label, accept in (("identity", b"identity"), ("br", b"gzip, deflate, br")):
+            old_us, old_bytes = asyncio.run(us_per_request(app, f"/dict/{name}", accept, args.requests))
+            route_us, _ = asyncio.run(us_per_request(app, f"/cached/{name}", accept, args.requests))
+            middleware_us, new_bytes = asyncio.run(us_per_request(app, cached_path, accept, args.requests))
+            row[label] = {
+                "dict_us": round(old_us, 1),
+                "cached_route_us": round(route_us, 1),
+                "cached_middleware_us": round(middleware_us, 1),
+                "speedup": round(old_us / middleware_us, 1),
+                "dict_bytes": old_bytes,
+                "cached_bytes": new_bytes,
+            }
+        endpoints[name] = row
+    print(json.dumps({"benchmark": "response_cache", "orjson": ORJSON_AVAILABLE, "endpoints": endpoints}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Tracing overhead benchmark
+
+Measures the cost of the tracing instrumentation in-process: a span() call outside any
+trace (what instrumented code pays with TRACING_ENABLED=false), a span inside a trace,
+a whole request trace with the four analyze-floor-plan phases, and the per-request cost
+of TracingMiddleware with Server-Timing on a minimal ASGI app. Prints a JSON report.
+
+    python benchmarks/tracing_overhead.py --iterations 200000 --requests 5000
+    python benchmarks/tracing_overhead.py --max-request-overhead-us 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from tracing import NoopExporter, Tracer, TracingMiddleware, current_trace, span  # noqa: E402
+
+PHASES = ("decode", "prompt", "upstream", "parse")
+
+
+def per_call_ns(fn, iterations: int) -> float:
+    """Best-of-3 mean nanoseconds per call"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            fn()
+        best = min(best, (time.perf_counter_ns() - start) / iterations)
+    return best
+
+
+def micro(iterations: int) -> dict:
+    tracer = Tracer(NoopExporter())
+
+    def baseline():
+        pass
+
+    def untraced_span():
+        with span("upstream"):
+            pass
+
+    def request_trace():
+        with tracer.trace("POST /api/ai/analyze-floor-plan"):
+            for phase in PHASES:
+                with span(phase):
+                    pass
+
+    base = per_call_ns(baseline, iterations)
+    with tracer.trace("bench"):
+        trace = current_trace()
+
+        def traced_span():
+            with span("upstream"):
+                pass
+            # Keep the trace from growing without bound while timing spans inside it
+            del trace.spans[1:]
+
+        traced = per_call_ns(traced_span, iterations)
+
+    return {
+        "span_outside_trace_ns": round(per_call_ns(untraced_span, iterations) - base, 1),
+        "span_inside_trace_ns": round(traced - base, 1),
+        "request_trace_4_spans_us": round((per_call_ns(request_trace, iterations // 10) - base) / 1000, 2),
+    }
+
+
+def build_app(traced: bool):
+    async def endpoint(request):
+        for phase in PHASES:
+            with span(phase):
+                pass
+        return JSONResponse({"ok": True})
+
+    app = Starlette(routes=[Route("/analyze", endpoint, methods=["POST"])])
+    return TracingMiddleware(app, Tracer(NoopExporter())) if traced else app
+
+
+async def asgi_us_per_request(traced: bool, requests: int) -> float:
+    """Server-side time per request, calling the ASGI app directly so no client cost is included"""
+    app = build_app(traced)
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": "/analyze", "raw_path": b"/analyze", "root_path": "",
+             "query_string": b"", "headers": [(b"host", b"bench"), (b"content-length", b"0")],
+             "server": ("bench", 80), "client": ("127.0.0.1", 50000)}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure tracing overhead")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--max-request-overhead-us", type=float, default=None,
+                        help="Exit with status 1 if the middleware adds more than this per request")
+    args = parser.parse_args()
+
+    plain = min(asyncio.run(asgi_us_per_request(False, args.requests)) for _ in range(3))
+    traced = min(asyncio.run(asgi_us_per_request(True, args.requests)) for _ in range(3))
+    report = {
+        "benchmark": "tracing_overhead",
+        "micro": micro(args.iterations),
+        "asgi": {
+            "requests": args.requests,
+            "plain_us_per_request": round(plain, 1),
+            "traced_us_per_request": round(traced, 1),
+            "overhead_us_per_request": round(traced - plain, 1),
+            "overhead_ratio": round(traced / plain - 1, 4),
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.max_request_overhead_us is not None and \
+            report["asgi"]["overhead_us_per_request"] > args.max_request_overhead_us:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Throughput scaling benchmark for multi-worker deployments
+
+Starts serve.py with 1, 2, 4... workers against a shared dashboard store, drives
+GET load from several client processes and reports requests/second and scaling
+efficiency (rps_N / (N * rps_1)). Prints a JSON report.
+
+    python benchmarks/worker_scaling.py --workers 1 2 4 --duration 10 --min-efficiency 0.7
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    """Pick an unused local port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_serving(url: str, timeout: float = 60.0):
+    """Poll url until it answers with 200"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+async def drive(url: str, concurrency: int, duration: float) -> tuple:
+    """Issue requests from `concurrency` tasks for `duration` seconds; returns (ok, errors)"""
+    counts = [0, 0]
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+        async def loop():
+            while time.monotonic() < deadline:
+                try:
+                    response = await client.get(url)
+                    counts[0 if response.status_code == 200 else 1] += 1
+                except httpx.HTTPError:
+                    counts[1] += 1
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return tuple(counts)
+
+
+def load_process(url: str, concurrency: int, duration: float, results):
+    """Entry point of one load generator process"""
+    results.put(asyncio.run(drive(url, concurrency, duration)))
+
+
+def measure(workers: int, args, env: dict) -> dict:
+    """Requests/second served by `workers` worker processes"""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "serve.py"), "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        wait_until_serving(base + "/health")
+        # Let every worker finish its startup before measuring
+        time.sleep(1.0)
+
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(
+                target=load_process, args=(base + args.path, args.concurrency, args.duration, results)
+            )
+            for _ in range(args.load_processes)
+        ]
+        for process in clients:
+            process.start()
+        totals = [results.get() for _ in clients]
+        for process in clients:
+            process.join()
+
+        ok = sum(t[0] for t in totals)
+        errors = sum(t[1] for t in totals)
+        return {"workers": workers, "requests": ok, "errors": errors, "rps": round(ok / args.duration, 1)}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure throughput scaling with worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--path", default="/api/dashboard/tasks")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent requests per load process")
+    parser.add_argument("--load-processes", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--store", default="sql", choices=["sql", "redis"])
+    parser.add_argument("--min-efficiency", type=float, default=None,
+                        help="Exit with status 1 if scaling efficiency falls below this value")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DASHBOARD_STORE": args.store,
+            "DATABASE_URL": os.environ.get("DATABASE_URL", f"sqlite:///{tmp}/scaling.db"),
+            "RATE_LIMIT_ENABLED": "false",
+        }
+        runs = [measure(workers, args, env) for workers in args.workers]
+
+    baseline = runs[0]["rps"] / runs[0]["workers"] if runs[0]["rps"] else 0
+    for run in runs:
+        run["efficiency"] = round(run["rps"] / (run["workers"] * baseline), 3) if baseline else None
+
+    print(json.dumps({
+        "benchmark": "worker_scaling",
+        "path": args.path,
+        "store": args.store,
+        "cpu_count": os.cpu_count(),
+        "runs": runs
+    }, indent=2))
+
+    if args.min_efficiency is not None and any(
+        run["efficiency"] is None or run["efficiency"] < args.min_efficiency for run in runs
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,853 @@
+"""
+Client Search for RED AI
+Autocomplete over favorite clients (name, email, company, tags). Text is folded (case,
+diacritics) so "Ольга", "ОЛЬГА" and "Jose" find "José".
+
+The clients as of one store version are indexed in a segment: a file of sorted words, postings
+and trigram postings, built in a separate process and mapped into memory, so workers sharing
+its directory keep one copy of it in the page cache. Writes since then go to a small in-process
+index (a prefix trie plus trigram postings) layered over it, which every worker keeps in step
+from a change feed until the next segment replaces both.
+"""
+
+import asyncio
+import bisect
+import heapq
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+import unicodedata
+import uuid
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from itertools import accumulate, islice
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from realtime import InMemoryPubSub
+
+# One segment builder at a time across the workers sharing a directory (Unix only)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SEARCH_FIELDS = ("name", "email", "company", "tags")
+# Best-ranked clients kept per trie node; the most an autocomplete request can ask for
+TOP_K = 20
+# Trie depth; the node of a longer prefix is the node of its first MAX_DEPTH characters
+MAX_DEPTH = 6
+# Substring (trigram) matching is skipped when even the rarest trigram is this common
+MAX_TRIGRAM_CANDIDATES = 10000
+# Segment prefixes matching more than this many words keep a stored list of their best clients;
+# smaller word ranges are merged from their postings when searched
+SEGMENT_RANGE = 32
+# Length of those lists: twice TOP_K, so writes since the segment was built rarely exhaust them
+SEGMENT_TOP = 2 * TOP_K
+
+Item = Dict[str, Any]
+# Smaller is better: more projects first, then the most recent contact, then id
+Rank = Tuple[int, float, str]
+
+_WORD = re.compile(r"\w+")
+# Sorts after every word with a given prefix (no word contains it)
+_LAST_CHAR = "\U0010ffff"
+_SEGMENT_MAGIC = b"REDAI-CLIENT-SEGMENT-1\n"
+
+
+def fold(text: str) -> str:
+    """Lowercase without diacritics (é -> e, ё -> е); Cyrillic and Latin stay as they are"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokens(text: str) -> List[str]:
+    """Folded words of a text; emails split into their parts (sarah, wilson, example, com)"""
+    return _WORD.findall(fold(text))
+
+
+def _encode(client: Item) -> bytes:
+    return json.dumps(client, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass
+    return 0.0
+
+
+def rank(client: Item) -> Rank:
+    """Sort key of a client: projects_count, then last_contact, both descending"""
+    return -int(client.get("projects_count") or 0), -_timestamp(client.get("last_contact")), client["id"]
+
+
+def client_tokens(client: Item) -> Tuple[str, ...]:
+    """Distinct folded words of the searchable fields; interned, since most recur across clients"""
+    found: Set[str] = set()
+    for field in SEARCH_FIELDS:
+        value = client.get(field)
+        for text in (value if isinstance(value, list) else [value]):
+            if isinstance(text, str):
+                found.update(tokens(text))
+    return tuple(sys.intern(word) for word in found)
+
+
+class _Node:
+    """Trie node: `ends` holds (rank, id) of the clients with a word whose trie key ends here, in
+    rank order; `top` the TOP_K best clients anywhere below. A removal marks `top` stale and it is
+    rebuilt from the children's tops when next read."""
+    __slots__ = ("children", "ends", "top", "stale", "size")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.ends: List[Tuple[Rank, str]] = []
+        self.top: List[Tuple[Rank, str]] = []
+        self.stale = False
+        self.size = 0  # (word, client) pairs below, to pick the most selective word of a query
+
+    def offer(self, entry: Tuple[Rank, str]):
+        """Add a client to the top list if it ranks high enough"""
+        top = self.top
+        if self.stale or (len(top) >= TOP_K and entry >= top[-1]) or entry in top:
+            return
+        bisect.insort(top, entry)
+        del top[TOP_K:]
+
+    def refresh(self) -> List[Tuple[Rank, str]]:
+        """Top list, rebuilt first if it is stale"""
+        if self.stale:
+            candidates = self.ends[:TOP_K]
+            for child in self.children.values():
+                candidates += child.refresh()
+            self.top, seen = [], set()
+            for entry in sorted(candidates):
+                if entry[1] not in seen:
+                    seen.add(entry[1])
+                    self.top.append(entry)
+                    if len(self.top) == TOP_K:
+                        break
+            self.stale = False
+        return self.top
+
+    def nodes(self) -> List["_Node"]:
+        """This node and every node below"""
+        found, stack = [], [self]
+        while stack:
+            node = stack.pop()
+            found.append(node)
+            stack.extend(node.children.values())
+        return found
+
+    def ranked(self) -> Iterator[str]:
+        """Client ids below in rank order, lazily (with repeats for clients with several words here)"""
+        for _, client_id in heapq.merge(*(node.ends for node in self.nodes() if node.ends)):
+            yield client_id
+
+
+class ClientSearchIndex:
+    """Prefix trie plus trigram index over clients, maintained on every add and remove. The trie
+    stops at MAX_DEPTH characters, so longer words share the node of their first MAX_DEPTH
+    characters; that bounds its size and longer query words are checked on the client.
+
+    Each indexed version of a client gets a document number; trigram postings are compact arrays
+    of those numbers. A removal only clears its document, so postings keep `removed` dead entries
+    until the next rebuild. The rebuild numbers documents in rank order, so a substring search can
+    stop at the first matches; documents added later are numbered after them and always checked.
+    Clients are kept JSON-encoded and decoded only for results.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._trigrams: Dict[str, array] = {}
+        self._docs: List[Optional[str]] = []
+        self._doc_of: Dict[str, int] = {}
+        self._clients: Dict[str, bytes] = {}
+        self._ranks: Dict[str, Rank] = {}
+        self._words: Dict[str, Tuple[str, ...]] = {}
+        # Documents below this number were numbered in rank order by the last rebuild
+        self._ordered = 0
+        self.removed = 0
+        # Store version the index reflects; None until it is built
+        self.version: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @property
+    def added(self) -> int:
+        """Documents added since the last rebuild, outside its rank order"""
+        return len(self._docs) - self._ordered
+
+    def rebuild(self, clients: Iterable[Item], version: Optional[int] = None):
+        """Replace the whole index; every list is sorted once at the end instead of on each insert,
+        and documents are numbered in rank order so postings list the best clients first"""
+        self._root, self._trigrams, self._clients, self._ranks, self._words = _Node(), {}, {}, {}, {}
+        self._docs, self._doc_of, self.removed = [], {}, 0
+        for client in clients:
+            self._insert(client, bulk=True)
+        for client_id in sorted(self._ranks, key=self._ranks.__getitem__):
+            self._post(client_id)
+        self._ordered = len(self._docs)
+        for node in self._root.nodes():
+            node.ends.sort()
+            node.stale = True
+        self._root.refresh()
+        self.version = version
+
+    def add(self, client: Item):
+        """Index a client, replacing an earlier version of it"""
+        self.remove(client["id"])
+        self._insert(client, bulk=False)
+        self._post(client["id"])
+
+    def _insert(self, client: Item, bulk: bool):
+        client_id = client["id"]
+        entry = rank(client), client_id
+        words = client_tokens(client)
+        self._clients[client_id] = _encode(client)
+        self._ranks[client_id], self._words[client_id] = entry[0], words
+        for key in {word[:MAX_DEPTH] for word in words}:
+            node = self._root
+            for char in key:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                node = child
+                node.size += 1
+                if not bulk:
+                    node.offer(entry)
+            if bulk:
+                node.ends.append(entry)
+            else:
+                bisect.insort(node.ends, entry)
+
+    def _post(self, client_id: str):
+        """Give a client the next document number and add it to its trigrams' postings"""
+        doc = len(self._docs)
+        self._docs.append(client_id)
+        self._doc_of[client_id] = doc
+        # Words of one client can share trigrams
+        for gram in set().union(*(_trigrams(word) for word in self._words[client_id])):
+            postings = self._trigrams.get(gram)
+            if postings is None:
+                postings = self._trigrams[gram] = array("I")
+            postings.append(doc)
+
+    def remove(self, client_id: str) -> Optional[Item]:
+        """Drop a client from the index"""
+        data = self._clients.pop(client_id, None)
+        if data is None:
+            return None
+        entry, words = (self._ranks.pop(client_id), client_id), self._words.pop(client_id)
+        for key in {word[:MAX_DEPTH] for word in words}:
+            path = [self._root]
+            for char in key:
+                path.append(path[-1].children[char])
+            ends = path[-1].ends
+            del ends[bisect.bisect_left(ends, entry)]
+            for parent, char, child in zip(path, key, path[1:]):
+                child.size -= 1
+                if child.size == 0:
+                    # Nothing left below; the rest of the path goes with it
+                    del parent.children[char]
+                    break
+                if entry in child.top:
+                    child.stale = True
+        self._docs[self._doc_of.pop(client_id)] = None
+        self.removed += 1
+        return json.loads(data)
+
+    def _node(self, prefix: str) -> Optional[_Node]:
+        node = self._root
+        for char in prefix[:MAX_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _matches(self, client_id: str, terms: List[str], substring: bool) -> bool:
+        words = self._words[client_id]
+        if substring:
+            return all(any(term in word for word in words) for term in terms)
+        return all(any(word.startswith(term) for word in words) for term in terms)
+
+    def search(self, query: str, limit: int = 10) -> List[Item]:
+        """Clients with a word starting with each query word, best ranked first; when there are fewer
+        than limit, clients containing every query word inside a word follow"""
+        return [json.loads(data) for data in self.search_encoded(query, limit)]
+
+    def search_encoded(self, query: str, limit: int = 10) -> List[bytes]:
+        """search() results as the JSON they are kept in, for responses that pass them through"""
+        terms = tokens(query)
+        limit = min(limit, TOP_K)
+        if not terms or limit <= 0:
+            return []
+        found = self._prefix_matches(terms, limit)
+        if len(found) < limit:
+            found += self._substring_matches(terms, limit - len(found), set(found))
+        return [self._clients[client_id] for client_id in found]
+
+    def _prefix_matches(self, terms: List[str], limit: int) -> List[str]:
+        nodes = [self._node(term) for term in terms]
+        if any(node is None for node in nodes):
+            return []
+        if len(terms) == 1 and len(terms[0]) <= MAX_DEPTH:
+            return [client_id for _, client_id in nodes[0].refresh()[:limit]]
+        # Walk the most selective word's clients in rank order until enough match every word
+        found: List[str] = []
+        seen: Set[str] = set()
+        for client_id in min(nodes, key=lambda node: node.size).ranked():
+            if client_id not in seen:
+                seen.add(client_id)
+                if self._matches(client_id, terms, False):
+                    found.append(client_id)
+                    if len(found) == limit:
+                        break
+        return found
+
+    def _substring_matches(self, terms: List[str], limit: int, exclude: Set[str]) -> List[str]:
+        grams = set().union(*(_trigrams(term) for term in terms))
+        if not grams:
+            return []
+        postings = [self._trigrams.get(gram) for gram in grams]
+        if any(doc_numbers is None for doc_numbers in postings):
+            return []
+        # Clients with the rarest trigram are checked against every word
+        rarest = min(postings, key=len)
+        if len(rarest) > MAX_TRIGRAM_CANDIDATES:
+            return []
+
+        def matching(docs: Iterable[int]) -> Iterator[str]:
+            for client_id in map(self._docs.__getitem__, docs):
+                if client_id is not None and client_id not in exclude and self._matches(client_id, terms, True):
+                    yield client_id
+
+        # The rebuild numbered its documents in rank order, so the first matches among them are their
+        # best; documents added since are all checked
+        ordered = bisect.bisect_left(rarest, self._ordered)
+        found = list(islice(matching(rarest[:ordered]), limit)) + list(matching(rarest[ordered:]))
+        return heapq.nsmallest(limit, found, key=self._ranks.__getitem__)
+
+
+def _table(items: List[bytes]) -> Tuple[array, bytes]:
+    """Offsets (one past each item) and the items concatenated"""
+    return array("Q", accumulate(map(len, items), initial=0)), b"".join(items)
+
+
+def _postings(lists: List[array]) -> Tuple[array, array]:
+    """Offsets in document numbers and the document numbers concatenated"""
+    concatenated = array("I")
+    for doc_numbers in lists:
+        concatenated += doc_numbers
+    return array("Q", accumulate(map(len, lists), initial=0)), concatenated
+
+
+def _stored_tops(terms: List[str], postings: Dict[str, array]) -> Dict[str, List[int]]:
+    """SEGMENT_TOP best documents of every prefix that matches more than SEGMENT_RANGE words"""
+    tops: Dict[str, List[int]] = {}
+
+    def best(prefix: str, lo: int, hi: int) -> List[int]:
+        if hi - lo <= SEGMENT_RANGE:
+            return sorted(set().union(*(postings[terms[i]][:SEGMENT_TOP] for i in range(lo, hi))))[:SEGMENT_TOP]
+        candidates: List[int] = []
+        i = lo
+        if terms[i] == prefix:
+            candidates.extend(postings[prefix][:SEGMENT_TOP])
+            i += 1
+        while i < hi:
+            child = terms[i][:len(prefix) + 1]
+            j = bisect.bisect_left(terms, child + _LAST_CHAR, i, hi)
+            candidates.extend(best(child, i, j))
+            i = j
+        tops[prefix] = sorted(set(candidates))[:SEGMENT_TOP]
+        return tops[prefix]
+
+    if terms:
+        best("", 0, len(terms))
+        tops.pop("", None)
+    return tops
+
+
+def build_segment(source: str, target: str, version: int) -> str:
+    """Write the segment of the clients in source, one JSON-encoded client per line (runs inside a
+    worker process)"""
+    documents = []
+    with open(source, "rb") as lines:
+        for line in lines:
+            client = json.loads(line)
+            documents.append((rank(client), line.rstrip(b"\\n"), client_tokens(client)))
+    # Document numbers in rank order, so every posting lists the best clients first
+    documents.sort(key=lambda document: document[0])
+
+    postings: Dict[str, array] = {}
+    grams: Dict[str, array] = {}
+    for doc, (_, _, words) in enumerate(documents):
+        for word in words:
+            doc_numbers = postings.get(word)
+            if doc_numbers is None:
+                doc_numbers = postings[word] = array("I")
+            doc_numbers.append(doc)
+        for gram in set().union(*(_trigrams(word) for word in words)):
+            doc_numbers = grams.get(gram)
+            if doc_numbers is None:
+                doc_numbers = grams[gram] = array("I")
+            doc_numbers.append(doc)
+    terms, gram_keys = sorted(postings), sorted(grams)
+    tops = _stored_tops(terms, postings)
+    top_keys = sorted(tops)
+    ids = [entry[0][2] for entry in documents]
+
+    sections: Dict[str, Any] = {}
+    sections["json_offsets"], sections["json"] = _table([data for _, data, _ in documents])
+    sections["id_offsets"], sections["ids"] = _table([client_id.encode() for client_id in ids])
+    sections["by_id"] = array("I", sorted(range(len(ids)), key=ids.__getitem__))
+    sections["projects"] = array("q", (entry[0][0] for entry in documents))
+    sections["contacts"] = array("d", (entry[0][1] for entry in documents))
+    sections["word_offsets"], sections["words"] = _table([" ".join(words).encode() for _, _, words in documents])
+    del documents
+    sections["term_offsets"], sections["terms"] = _table([term.encode() for term in terms])
+    sections["posting_offsets"], sections["postings"] = _postings([postings[term] for term in terms])
+    del postings
+    sections["gram_offsets"], sections["grams"] = _table([gram.encode() for gram in gram_keys])
+    sections["gram_posting_offsets"], sections["gram_postings"] = _postings([grams[gram] for gram in gram_keys])
+    del grams
+    sections["top_key_offsets"], sections["top_keys"] = _table([key.encode() for key in top_keys])
+    sections["top_offsets"], sections["tops"] = _postings([array("I", tops[key]) for key in top_keys])
+
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    layout: Dict[str, Tuple[int, int, str]] = {}
+    with open(tmp_path, "wb") as segment:
+        segment.write(_SEGMENT_MAGIC)
+        for name, data in sections.items():
+            segment.write(b"\\0" * (-segment.tell() % 8))
+            layout[name] = (segment.tell(), len(data) * getattr(data, "itemsize", 1),
+                            data.typecode if isinstance(data, array) else "B")
+            segment.write(data)
+        footer = segment.tell()
+        segment.write(json.dumps({"version": version, "count": len(ids), "sections": layout}).encode())
+        segment.write(struct.pack("<Q", footer))
+    # Atomic rename so other workers never map a partial file
+    os.replace(tmp_path, target)
+    return target
+
+
+class _Table:
+    """Sequence of the items of a segment section: offsets (one past each item) and their data"""
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self.offsets, self.data = offsets, data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> memoryview:
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def span(self, lo: int, hi: int) -> int:
+        """Total length of items lo to hi"""
+        return self.offsets[hi] - self.offsets[lo]
+
+
+class _Strings(_Table):
+    """Table of UTF-8 strings; sorted ones are searched with bisect"""
+    __slots__ = ()
+
+    def __getitem__(self, i: int) -> str:
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def find(self, key: str) -> Optional[int]:
+        i = bisect.bisect_left(self, key)
+        return i if i < len(self) and self[i] == key else None
+
+
+class _ByKey:
+    """Documents in key order, read through their keys for bisect"""
+    __slots__ = ("order", "keys")
+
+    def __init__(self, order: memoryview, keys: _Strings):
+        self.order, self.keys = order, keys
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, i: int) -> str:
+        return self.keys[self.order[i]]
+
+
+def _after(doc_numbers: memoryview, after: int) -> memoryview:
+    return doc_numbers[bisect.bisect_right(doc_numbers, after):]
+
+
+class ClientSearchSegment:
+    """Read-only index of the clients as of one store version, mapped from a file written by
+    build_segment. Documents are numbered in rank order and every posting lists them ascending, so
+    the first documents out of a merge of postings are the best ranked. Only the mapped pages a
+    search touches are read, and workers mapping the same file share them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as segment:
+            self._map = mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if view[:len(_SEGMENT_MAGIC)] != _SEGMENT_MAGIC:
+            raise ValueError(f"Not a client search segment: {path}")
+        footer = struct.unpack("<Q", view[-8:])[0]
+        header = json.loads(bytes(view[footer:-8]))
+        self.version: int = header["version"]
+        self._count: int = header["count"]
+
+        def section(name: str) -> memoryview:
+            offset, size, typecode = header["sections"][name]
+            return view[offset:offset + size].cast(typecode)
+
+        self._json = _Table(section("json_offsets"), section("json"))
+        self._ids = _Strings(section("id_offsets"), section("ids"))
+        self._by_id = _ByKey(section("by_id"), self._ids)
+        self._projects, self._contacts = section("projects"), section("contacts")
+        self._words = _Strings(section("word_offsets"), section("words"))
+        self._terms = _Strings(section("term_offsets"), section("terms"))
+        self._postings = _Table(section("posting_offsets"), section("postings"))
+        self._grams = _Strings(section("gram_offsets"), section("grams"))
+        self._gram_postings = _Table(section("gram_posting_offsets"), section("gram_postings"))
+        self._top_keys = _Strings(section("top_key_offsets"), section("top_keys"))
+        self._tops = _Table(section("top_offsets"), section("tops"))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def client(self, doc: int) -> bytes:
+        """A document's client, JSON-encoded"""
+        return bytes(self._json[doc])
+
+    def rank(self, doc: int) -> Rank:
+        return self._projects[doc], self._contacts[doc], self._ids[doc]
+
+    def doc_of(self, client_id: str) -> Optional[int]:
+        i = bisect.bisect_left(self._by_id, client_id)
+        if i < len(self._by_id) and self._by_id[i] == client_id:
+            return self._by_id.order[i]
+        return None
+
+    def matches(self, doc: int, terms: List[str], substring: bool) -> bool:
+        words = self._words[doc].split(" ")
+        if substring:
+            return all(any(term in word for word in words) for term in terms)
+        return all(any(word.startswith(term) for word in words) for term in terms)
+
+    def _range(self, prefix: str, lo: int = 0, hi: Optional[int] = None) -> Tuple[int, int]:
+        """Words starting with prefix, as a range of the sorted words"""
+        hi = len(self._terms) if hi is None else hi
+        lo = bisect.bisect_left(self._terms, prefix, lo, hi)
+        return lo, bisect.bisect_left(self._terms, prefix + _LAST_CHAR, lo, hi)
+
+    def ranked(self, prefix: str, after: int = -1, bounds: Optional[Tuple[int, int]] = None) -> Iterator[int]:
+        """Documents after `after` with a word starting with prefix, best ranked first, each once"""
+        key = self._top_keys.find(prefix)
+        if key is not None:
+            top = self._tops[key]
+            yield from _after(top, after)
+            if len(top) < SEGMENT_TOP:
+                return
+            after = max(after, top[-1])
+        lo, hi = bounds or self._range(prefix)
+        if key is None:
+            # At most SEGMENT_RANGE words
+            streams = [_after(self._postings[i], after) for i in range(lo, hi)]
+        else:
+            # Past the stored list: merge the next character's prefixes, each with its own list
+            streams = []
+            if self._terms[lo] == prefix:
+                streams.append(_after(self._postings[lo], after))
+                lo += 1
+            while lo < hi:
+                child = self._terms[lo][:len(prefix) + 1]
+                child_bounds = self._range(child, lo, hi)
+                streams.append(self.ranked(child, after, child_bounds))
+                lo = child_bounds[1]
+        last = after
+        for doc in heapq.merge(*streams):
+            if doc != last:
+                last = doc
+                yield doc
+
+    def prefix_matches(self, terms: List[str]) -> Iterator[int]:
+        """Documents with a word starting with each term, best ranked first"""
+        if len(terms) == 1:
+            yield from self.ranked(terms[0])
+            return
+        ranges = [self._range(term) for term in terms]
+        if any(lo == hi for lo, hi in ranges):
+            return
+        # Walk the most selective word's documents until enough match every word
+        selective = min(range(len(terms)), key=lambda i: self._postings.span(*ranges[i]))
+        for doc in self.ranked(terms[selective], bounds=ranges[selective]):
+            if self.matches(doc, terms, False):
+                yield doc
+
+    def substring_matches(self, terms: List[str]) -> Iterator[int]:
+        """Documents containing each term inside a word, best ranked first"""
+        grams = set().union(*(_trigrams(term) for term in terms))
+        if not grams:
+            return
+        keys = [self._grams.find(gram) for gram in grams]
+        if any(key is None for key in keys):
+            return
+        # Documents with the rarest trigram are checked against every word
+        rarest = min((self._gram_postings[key] for key in keys), key=len)
+        if len(rarest) > MAX_TRIGRAM_CANDIDATES:
+            return
+        for doc in rarest:
+            if self.matches(doc, terms, True):
+                yield doc
+
+
+class SegmentedClientIndex:
+    """A segment with the writes made since it was built layered over it: clients added or changed
+    since are indexed in a small ClientSearchIndex, and their documents in the segment, like those
+    of removed clients, are skipped. Results of both are merged in rank order.
+    """
+
+    def __init__(self, segment: ClientSearchSegment):
+        self.segment = segment
+        self.recent = ClientSearchIndex()
+        self._skipped: Set[int] = set()
+        # Writes applied since the segment was built
+        self.changes = 0
+        self.version: int = segment.version
+
+    def __len__(self) -> int:
+        return len(self.segment) - len(self._skipped) + len(self.recent)
+
+    def add(self, client: Item):
+        """Index a client, replacing an earlier version of it"""
+        self.remove(client["id"])
+        self.recent.add(client)
+
+    def remove(self, client_id: str):
+        """Drop a client from the index"""
+        doc = self.segment.doc_of(client_id)
+        if doc is not None:
+            self._skipped.add(doc)
+        self.recent.remove(client_id)
+        self.changes += 1
+
+    def search(self, query: str, limit: int = 10) -> List[Item]:
+        """Same results as ClientSearchIndex.search over the same clients"""
+        return [json.loads(data) for data in self.search_encoded(query, limit)]
+
+    def search_encoded(self, query: str, limit: int = 10) -> List[bytes]:
+        """search() results as the JSON they are kept in, for responses that pass them through"""
+        terms = tokens(query)
+        limit = min(limit, TOP_K)
+        if not terms or limit <= 0:
+            return []
+        docs = self._live(self.segment.prefix_matches(terms), limit, set())
+        client_ids = self.recent._prefix_matches(terms, limit)
+        found = self._merge(docs, client_ids, limit)
+        if len(found) < limit:
+            need = limit - len(found)
+            docs = self._live(self.segment.substring_matches(terms), need, set(docs))
+            found += self._merge(docs, self.recent._substring_matches(terms, need, set(client_ids)), need)
+        return found
+
+    def _live(self, docs: Iterator[int], limit: int, exclude: Set[int]) -> List[int]:
+        skipped = self._skipped
+        return list(islice((doc for doc in docs if doc not in skipped and doc not in exclude), limit))
+
+    def _merge(self, docs: List[int], client_ids: List[str], limit: int) -> List[bytes]:
+        recent = self.recent
+        ranked = [(self.segment.rank(doc), self.segment.client(doc)) for doc in docs]
+        ranked += [(recent._ranks[client_id], recent._clients[client_id]) for client_id in client_ids]
+        return [data for _, data in heapq.nsmallest(limit, ranked)]
+
+
+class IndexNotReadyError(Exception):
+    """Search before the first index of this worker is built"""
+
+
+class ClientSearch:
+    """Index kept in step with the dashboard store's clients.
+
+    The store's clients are listed to a file and indexed by a separate process into a segment named
+    after the store version (clients-<version>.seg); a worker finding the segment of the current
+    version in its directory (built by another worker sharing it) maps that one instead. Searches
+    before the first segment is mapped raise IndexNotReadyError rather than wait for it.
+
+    Writes made through this worker are applied here and published on a change feed (pub/sub
+    shared by the workers), from which every other worker applies them; each applied change
+    advances the index version by one, like the store's. A search that finds the index behind
+    the store for catch_up_after seconds (a change that never reached the feed) builds a new
+    segment in the background, as do more than max_changes writes since the last one, which
+    bounds the memory of the in-process part; searches use the current index meanwhile.
+    """
+
+    def __init__(self, store, feed=None, collection: str = "clients", catch_up_after: float = 5.0,
+                 directory: Optional[str] = None, max_changes: int = 20000):
+        self.store = store
+        self.feed = feed if feed is not None else InMemoryPubSub()
+        self.collection = collection
+        self.catch_up_after = catch_up_after
+        self.max_changes = max_changes
+        # Without a directory to share, segments go to one of this instance's own, removed on stop
+        self._tmp = tempfile.TemporaryDirectory(prefix="client-search-") if directory is None else None
+        self.directory = Path(directory or self._tmp.name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index: Optional[SegmentedClientIndex] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._origin = uuid.uuid4().hex
+        self._rebuild: Optional[asyncio.Task] = None
+        # Changes applied while a rebuild runs, replayed onto the new index
+        self._replay: Optional[List[Tuple[str, Optional[Item]]]] = None
+        self._behind_since: Optional[float] = None
+
+    async def start(self):
+        """Follow the change feed and build the index in the background"""
+        await self.feed.start(self._receive)
+        self._schedule_rebuild()
+
+    async def stop(self):
+        """Stop following the feed, any rebuild in progress and the builder process"""
+        await self.feed.stop()
+        if self._rebuild is not None:
+            self._rebuild.cancel()
+            await asyncio.gather(self._rebuild, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._tmp is not None:
+            self.index = None
+            self._tmp.cleanup()
+
+    def _receive(self, message: str):
+        change = json.loads(message)
+        if change["origin"] != self._origin:
+            self._apply(change["id"], change["client"])
+
+    def _apply(self, client_id: str, client: Optional[Item]):
+        if self._replay is not None:
+            self._replay.append((client_id, client))
+        if self.index is None:
+            return
+        if client is None:
+            self.index.remove(client_id)
+        else:
+            self.index.add(client)
+        self.index.version += 1
+        if self.index.changes > self.max_changes:
+            self._schedule_rebuild()
+
+    def _schedule_rebuild(self):
+        if self._rebuild is None or self._rebuild.done():
+            self._rebuild = asyncio.create_task(self._rebuild_index())
+
+    async def _rebuild_index(self):
+        """Map the segment of the store's current version, building it first if no worker has, then
+        swap it in"""
+        self._replay = []
+        try:
+            async with self._build_lock():
+                version = await self.store.version(self.collection)
+                path = self.directory / f"clients-{version}.seg"
+                if not path.exists():
+                    await self._build_segment(version, path)
+                fresh = SegmentedClientIndex(ClientSearchSegment(str(path)))
+            # Changes received meanwhile; one the listing already had is applied again harmlessly, and if
+            # it was counted twice the next searches see the index ahead of the store and rebuild again
+            for client_id, client in self._replay:
+                if client is None:
+                    fresh.remove(client_id)
+                else:
+                    fresh.add(client)
+                fresh.version += 1
+            self.index, self._behind_since = fresh, None
+            self._remove_old_segments(path)
+        finally:
+            self._replay = None
+
+    @asynccontextmanager
+    async def _build_lock(self) -> AsyncIterator[None]:
+        """Held by one worker of those sharing the directory at a time; the others poll for it, and
+        then usually find the segment it built"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.directory / "build.lock", "wb") as lock:
+            while True:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(0.5)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    async def _build_segment(self, version: int, path: Path):
+        """Page the clients out to a file, so neither the whole listing is held nor the event loop kept
+        for long, and index them in the builder process, which leaves this one's GIL alone"""
+        source = path.with_name(f"{path.name}.{self._origin}.jsonl")
+        try:
+            with open(source, "wb") as lines:
+                cursor: Optional[int] = 0
+                while cursor is not None:
+                    clients, cursor = await self.store.page(self.collection, limit=1000, after=cursor)
+                    lines.writelines(_encode(client) + b"\n" for client in clients)
+                    await asyncio.sleep(0)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=1)
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, build_segment, str(source), str(path), version
+            )
+        finally:
+            source.unlink(missing_ok=True)
+
+    def _remove_old_segments(self, current: Path):
+        """Keep the current segment and the one before it, which another worker may still be mapping;
+        a worker that has mapped a removed one keeps reading it until it maps a new one"""
+        segments = sorted(self.directory.glob("clients-*.seg"), key=lambda path: path.stat().st_mtime)
+        for path in segments[:-2]:
+            if path != current:
+                path.unlink(missing_ok=True)
+
+    async def search(self, query: str, limit: int = 10) -> List[Item]:
+        """Autocomplete results for a query"""
+        return [json.loads(data) for data in await self.search_encoded(query, limit)]
+
+    async def search_encoded(self, query: str, limit: int = 10) -> List[bytes]:
+        """Autocomplete results for a query, each JSON-encoded"""
+        if self.index is None:
+            self._schedule_rebuild()
+            raise IndexNotReadyError("Client search index is being built")
+        if await self.store.version(self.collection) == self.index.version:
+            self._behind_since = None
+        elif self._behind_since is None:
+            self._behind_since = time.monotonic()
+        elif time.monotonic() - self._behind_since >= self.catch_up_after:
+            self._schedule_rebuild()
+        return self.index.search_encoded(query, limit)
+
+    async def write(self, client_id: str, client: Optional[Item]):
+        """Apply a write this worker made to the store (client None for a removal) and publish it to the
+        other workers"""
+        self._apply(client_id, client)
+        await self.feed.publish(json.dumps({"origin": self._origin, "id": client_id, "client": client},
+                                           ensure_ascii=False, default=str))
@@ -0,0 +1,77 @@
+"""
+Client Registry for RED AI
+Process-wide registry of shared clients that are created lazily on first use
+"""
+
+import asyncio
+import inspect
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ClientRegistry:
+    """Holds one instance per client name for the whole process"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._closers: Dict[str, Optional[Callable[[Any], Any]]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any],
+                 close: Optional[Callable[[Any], Any]] = None):
+        """Register how to build (and optionally close) a client; replaces a factory not yet used"""
+        with self._lock:
+            if name in self._instances:
+                raise RuntimeError(f"Client {name} is already initialized")
+            self._factories[name] = factory
+            self._closers[name] = close
+
+    def get(self, name: str) -> Any:
+        """Return the shared client, creating it on first use"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown client: {name}")
+                instance = self._factories[name]()
+                self._instances[name] = instance
+            return instance
+
+    async def aget(self, name: str) -> Any:
+        """Like get(), but builds the client in a thread so the event loop never blocks on it"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, name)
+
+    def peek(self, name: str) -> Optional[Any]:
+        """Return the client only if it has already been created"""
+        return self._instances.get(name)
+
+    async def aclose(self):
+        """Close and forget every created client, newest first"""
+        with self._lock:
+            instances = list(self._instances.items())
+            self._instances.clear()
+        for name, instance in reversed(instances):
+            close = self._closers.get(name)
+            if close is None:
+                continue
+            try:
+                result = close(instance)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning("clients.close_failed", client=name, error=str(e))
+
+
+# Shared by every module in the process
+clients = ClientRegistry()
@@ -0,0 +1,178 @@
+"""
+Response Compression for RED AI
+Negotiated Brotli/gzip for JSON and text responses, streamed bodies included
+"""
+
+import asyncio
+import gzip
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from tracing import span
+
+# Brotli is optional; without it responses are gzip-compressed
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+COMPRESSIBLE_MARKERS = ("json", "javascript", "xml")
+
+
+def is_compressible(content_type: str) -> bool:
+    """Text and JSON-like media types (application/json, application/x-ndjson, text/event-stream, ...)"""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or any(marker in media_type for marker in COMPRESSIBLE_MARKERS)
+
+
+def negotiate(accept_encoding: str, brotli_enabled: bool = BROTLI_AVAILABLE) -> Optional[str]:
+    """Best supported coding in an Accept-Encoding header (br, then gzip), or None for identity"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding] = quality
+    wildcard = accepted.get("*", 0.0)
+    candidates = (("br", "gzip") if brotli_enabled else ("gzip",))
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, coding: str, brotli_quality: int = 4, gzip_level: int = 6) -> bytes:
+    """Compress a whole body"""
+    if coding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class _StreamCompressor:
+    """Incremental compressor; every chunk is flushed so streamed events reach the client right away"""
+
+    def __init__(self, coding: str, brotli_quality: int, gzip_level: int):
+        if coding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes, last: bool) -> bytes:
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if last else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _weaken_etag(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """A compressed body is a different representation, so a strong ETag becomes weak"""
+    return [(k, b"W/" + v if k.lower() == b"etag" and v.startswith(b'"') else v) for k, v in headers]
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return headers + [(b"vary", b"Accept-Encoding")]
+    if b"accept-encoding" in vary.lower():
+        return headers
+    return [(k, v + b", Accept-Encoding" if k.lower() == b"vary" else v) for k, v in headers]
+
+
+class CompressionMiddleware:
+    """Compresses JSON/text responses the client accepts; bodies above offload_size are compressed
+    in the thread pool so large analyses do not stall the event loop"""
+
+    def __init__(self, app, minimum_size: int = 1024, offload_size: int = 65536,
+                 brotli_quality: int = 4, gzip_level: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = _header(scope["headers"], b"accept-encoding")
+        coding = negotiate(accept.decode("latin-1")) if accept else None
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+                cache_control = (_header(headers, b"cache-control") or b"").lower()
+                if (message["status"] in (204, 304) or _header(headers, b"content-encoding") is not None
+                        or not is_compressible(content_type) or b"no-transform" in cache_control):
+                    passthrough = True
+                    await send(message)
+                    return
+                # Wait for the first body chunk to decide between whole-body and streaming compression
+                start_message = dict(message, headers=_add_vary(headers))
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None and start_message is not None:
+                headers = start_message["headers"]
+                if not more_body:
+                    if len(body) >= self.minimum_size:
+                        body = await self._compress(body, coding)
+                        headers = [(k, v) for k, v in _weaken_etag(headers) if k.lower() != b"content-length"] + [
+                            (b"content-encoding", coding.encode()),
+                            (b"content-length", str(len(body)).encode())
+                        ]
+                    await send(dict(start_message, headers=headers))
+                    start_message = None
+                    await send({"type": "http.response.body", "body": body, "more_body": False})
+                    return
+                compressor = _StreamCompressor(coding, self.brotli_quality, self.gzip_level)
+                headers = [(k, v) for k, v in _weaken_etag(headers) if k.lower() != b"content-length"]
+                await send(dict(start_message, headers=headers + [(b"content-encoding", coding.encode())]))
+                start_message = None
+
+            await send({"type": "http.response.body", "body": compressor.chunk(body, not more_body),
+                        "more_body": more_body})
+
+        await self.app(scope, receive, compressing_send)
+
+    async def _compress(self, body: bytes, coding: str) -> bytes:
+        with span("compress", encoding=coding, size=len(body)):
+            if len(body) >= self.offload_size:
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, compress, body, coding, self.brotli_quality, self.gzip_level
+                )
+            return compress(body, coding, self.brotli_quality, self.gzip_level)
+
@@ -4,57 +4,176 @@ Loads environment variables and provides configuration classes
 """
 
 import os
-from typing import List
-from dotenv import load_dotenv
+from pathlib import Path
+from typing import Callable, List
+from dotenv import dotenv_values, load_dotenv
 
-# Load environment variables from .env file
-load_dotenv("dotenv/.env")
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# Load environment variables once per process; earlier files win over later ones
+ENV_FILES = (Path(".env"), BACKEND_DIR / "dotenv" / ".env", Path(".env.local"))
+# Variables set by the process environment always win over the files, also on reload
+_PROCESS_ENV = frozenset(os.environ)
+_reload_listeners: List[Callable[[], None]] = []
+for env_file in ENV_FILES:
+    if env_file.is_file():
+        load_dotenv(env_file)
 
 class Settings:
     """Application settings from environment variables"""
     
-    # API Configuration
-    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
-    API_PORT: int = int(os.getenv("API_PORT", "8000"))
-    DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
-    
-    # Azure OpenAI Configuration
-    AZURE_OPENAI_API_KEY: str = os.getenv("AZURE_OPENAI_KEY") or os.getenv("AZURE_OPENAI_API_KEY", "AZURE_OPENAI_KEY_1")
-    AZURE_OPENAI_BACKUP_KEY: str = os.getenv("AZURE_OPENAI_BACKUP_KEY", "AZURE_OPENAI_BACKUP_KEY")
-    AZURE_OPENAI_ENDPOINT: str = os.getenv("AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_ENDPOINT")
-    AZURE_OPENAI_API_VERSION: str = os.getenv("AZURE_OPENAI_API_VERSION", "2024-05-01-preview")
-    AZURE_OPENAI_DEPLOYMENT_NAME: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4.1")
-    USE_AZURE_AD: bool = os.getenv("USE_AZURE_AD", "false").lower() == "true"
-    # DALL-E deployment removed - using BFL for image generation
+    def __init__(self):
+        """Evaluate every setting from the current environment"""
+        
+        # API Configuration
+        self.API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
+        self.API_PORT: int = int(os.getenv("API_PORT", "8000"))
+        self.DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
+        
+        # Azure OpenAI Configuration
+        self.AZURE_OPENAI_API_KEY: str = os.getenv("AZURE_OPENAI_KEY") or os.getenv("AZURE_OPENAI_API_KEY", "AZURE_OPENAI_KEY_1")
+        self.AZURE_OPENAI_BACKUP_KEY: str = os.getenv("AZURE_OPENAI_BACKUP_KEY", "AZURE_OPENAI_BACKUP_KEY")
+        self.AZURE_OPENAI_ENDPOINT: str = os.getenv("AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_ENDPOINT")
+        self.AZURE_OPENAI_API_VERSION: str = os.getenv("AZURE_OPENAI_API_VERSION", "2024-05-01-preview")
+        self.AZURE_OPENAI_DEPLOYMENT_NAME: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4.1")
+        self.USE_AZURE_AD: bool = os.getenv("USE_AZURE_AD", "false").lower() == "true"
+        # DALL-E deployment removed - using BFL for image generation
 
-    # Legacy OpenAI for backward compatibility (deprecated)
-    AI_MODEL: str = os.getenv("AI_MODEL", "gpt-4")
-    AI_TEMPERATURE: float = float(os.getenv("AI_TEMPERATURE", "0.7"))
-    AI_MAX_TOKENS: int = int(os.getenv("AI_MAX_TOKENS", "1000"))
-    
-    # CORS Configuration
-    ALLOWED_ORIGINS: List[str] = os.getenv(
-        "ALLOWED_ORIGINS", 
-        "http://localhost:3000,https://redai.site"
-    ).split(",")
-    
-    # Database Configuration
-    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./red_ai.db")
-    
-    # Redis Configuration
-    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
-    
-    # Logging Configuration
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-    LOG_FILE: str = os.getenv("LOG_FILE", "red_ai.log")
-    
-    # File Upload Configuration
-    MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
-    ALLOWED_FILE_TYPES: List[str] = os.getenv(
-        "ALLOWED_FILE_TYPES", 
-        "image/jpeg,image/png,image/gif,image/webp"
-    ).split(",")
-    
+        # Legacy OpenAI for backward compatibility (deprecated)
+        self.AI_MODEL: str = os.getenv("AI_MODEL", "gpt-4")
+        self.AI_TEMPERATURE: float = float(os.getenv("AI_TEMPERATURE", "0.7"))
+        self.AI_MAX_TOKENS: int = int(os.getenv("AI_MAX_TOKENS", "1000"))
+        
+        # CORS Configuration
+        self.ALLOWED_ORIGINS: List[str] = os.getenv(
+            "ALLOWED_ORIGINS", 
+            "http://localhost:3000,https://redai.site"
+        ).split(",")
+        
+        # Database Configuration
+        self.DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./red_ai.db")
+        
+        # Dashboard State (memory is per worker; use sql or redis when running several workers)
+        self.DASHBOARD_STORE: str = os.getenv("DASHBOARD_STORE", "memory")  # memory, sql or redis
+        self.WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+        
+        # Redis Configuration
+        self.REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+        
+        # Logging Configuration
+        self.LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+        self.LOG_FORMAT: str = os.getenv("LOG_FORMAT", "console")  # console or json
+        self.LOG_LEVELS: str = os.getenv("LOG_LEVELS", "")  # per module, e.g. azure_openai_service=DEBUG,uvicorn.access=WARNING
+        self.LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "debug=0.01")  # fraction of events kept per level
+        self.LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records are dropped, not awaited, when full
+        self.LOG_FILE: str = os.getenv("LOG_FILE", "red_ai.log")
+        
+        # File Upload Configuration
+        self.MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
+        self.ALLOWED_FILE_TYPES: List[str] = os.getenv(
+            "ALLOWED_FILE_TYPES", 
+            "image/jpeg,image/png,image/gif,image/webp"
+        ).split(",")
+        
+        # Thumbnail Configuration
+        self.GENERATED_IMAGES_DIR: str = os.getenv("GENERATED_IMAGES_DIR", "generated-images")
+        self.THUMBNAIL_CACHE_DIR: str = os.getenv("THUMBNAIL_CACHE_DIR", "thumbnail-cache")
+        self.THUMBNAIL_WORKERS: int = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+        
+        # Client Search (segments mapped by every worker; empty dir = a temporary one per worker)
+        self.CLIENT_SEARCH_DIR: str = os.getenv("CLIENT_SEARCH_DIR", "")
+        self.CLIENT_SEARCH_MAX_CHANGES: int = int(os.getenv("CLIENT_SEARCH_MAX_CHANGES", "20000"))
+        
+        # Upstream HTTP Connection Pool (shared per host by all Azure OpenAI calls)
+        self.HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+        self.HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+        self.HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+        self.HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+        self.DNS_CACHE_TTL: float = float(os.getenv("DNS_CACHE_TTL", "300"))
+        self.HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "60"))
+        
+        # Background Job Configuration
+        self.JOB_STORE: str = os.getenv("JOB_STORE", "memory")  # memory or redis
+        self.MAX_CONCURRENT_TASKS: int = int(os.getenv("MAX_CONCURRENT_TASKS", "5"))
+        self.JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+        self.JOB_RESULT_TTL: int = int(os.getenv("JOB_RESULT_TTL", "3600"))
+        self.JOB_TIMEOUT: float = float(os.getenv("JOB_TIMEOUT", "300"))
+        
+        # Client Identity (X-User-Id, X-Real-IP and X-Forwarded-For are trusted only from these proxies)
+        # Must list nginx's address when deployed behind it (docker-compose.prod.yml sets it)
+        self.TRUSTED_PROXIES: List[str] = [proxy.strip() for proxy in os.getenv("TRUSTED_PROXIES", "").split(",") if proxy.strip()]
+        self.USER_TOKEN_SECRET: str = os.getenv("USER_TOKEN_SECRET", "")  # signs user tokens minted by Next.js; empty disables them
+        
+        # Rate Limiting Configuration
+        self.RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory or redis
+        self.RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
+        self.RATE_LIMIT_PERIOD: int = int(os.getenv("RATE_LIMIT_PERIOD") or os.getenv("RATE_LIMIT_WINDOW", "60"))
+        self.RATE_LIMIT_AI_REQUESTS: int = int(os.getenv("RATE_LIMIT_AI_REQUESTS", "20"))
+        
+        # Token Quota Configuration
+        self.USAGE_DEFAULT_PLAN: str = os.getenv("USAGE_DEFAULT_PLAN", "free")
+        self.USAGE_ADMIN_USERS: List[str] = [u.strip() for u in os.getenv("USAGE_ADMIN_USERS", "").split(",") if u.strip()]
+        self.USAGE_FLUSH_INTERVAL: float = float(os.getenv("USAGE_FLUSH_INTERVAL", "10"))
+        self.USAGE_TOTALS_TTL: float = float(os.getenv("USAGE_TOTALS_TTL", "2"))  # seconds a quota check reuses stored totals
+        # Credits in lib/useCredits.ts units: a design generation costs GENERATION_CREDIT_COST credits
+        self.TOKENS_PER_GENERATION: int = int(os.getenv("TOKENS_PER_GENERATION", "2000"))
+        self.GENERATION_CREDIT_COST: int = int(os.getenv("GENERATION_CREDIT_COST", "10"))
+        self.BILLING_WEBHOOK_TOKEN: str = os.getenv("BILLING_WEBHOOK_TOKEN", "")  # sets plans via PUT /api/usage/{user_id}/plan
+        
+        # WebSocket Event Configuration
+        self.EVENTS_BACKEND: str = os.getenv("EVENTS_BACKEND", "memory")  # memory or redis
+        self.WS_MAX_CONNECTIONS: int = int(os.getenv("WS_MAX_CONNECTIONS", "10000"))
+        self.WS_IDLE_TIMEOUT: float = float(os.getenv("WS_IDLE_TIMEOUT", "300"))
+        self.WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+        self.WS_MAX_SUBSCRIPTIONS: int = int(os.getenv("WS_MAX_SUBSCRIPTIONS", "50"))
+        self.BFL_WEBHOOK_SECRET: str = os.getenv("BFL_WEBHOOK_SECRET", "")
+        
+        # Tracing Configuration (Server-Timing header and optional OpenTelemetry export)
+        self.TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+        self.TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "none")  # none or otlp
+        self.TRACING_SERVICE_NAME: str = os.getenv("TRACING_SERVICE_NAME", "red-ai-backend")
+        self.TRACING_SAMPLE_RATE: float = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+        self.SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+        
+        # Response Compression (Brotli when the brotli package is installed, otherwise gzip)
+        self.COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+        self.COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # smaller bodies are sent as is
+        self.COMPRESSION_OFFLOAD_SIZE: int = int(os.getenv("COMPRESSION_OFFLOAD_SIZE", "65536"))  # larger bodies compress in a thread
+        self.COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+        self.COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+        
+        # Batch Requests (POST /api/batch runs several API requests in one round trip)
+        self.BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+        self.BATCH_MAX_RESPONSE_BYTES: int = int(os.getenv("BATCH_MAX_RESPONSE_BYTES", "5242880"))  # all bodies together
+        self.BATCH_TIMEOUT: float = float(os.getenv("BATCH_TIMEOUT", "30"))  # seconds per sub-request
+        
+        # Analytics Rollups (revenue and growth read hourly, daily and weekly buckets)
+        self.ANALYTICS_ROLLUP_INTERVAL: float = float(os.getenv("ANALYTICS_ROLLUP_INTERVAL", "60"))  # seconds between refreshes
+        self.ANALYTICS_ROLLUP_BATCH_SIZE: int = int(os.getenv("ANALYTICS_ROLLUP_BATCH_SIZE", "5000"))  # events per transaction
+        self.ANALYTICS_INGEST_TOKEN: str = os.getenv("ANALYTICS_INGEST_TOKEN", "")  # empty disables POST /api/analytics/events
+        
+        # Readiness Checks (/readyz serves results cached by a background loop)
+        self.READINESS_INTERVAL: float = float(os.getenv("READINESS_INTERVAL", "10"))  # seconds between check rounds
+        self.READINESS_TIMEOUT: float = float(os.getenv("READINESS_TIMEOUT", "3"))
+        self.READINESS_TTL: float = float(os.getenv("READINESS_TTL", "30"))  # older results count as failed
+        
+        # Event Loop Monitor (lag histogram and blocking-call stacks on /metrics)
+        self.LOOP_MONITOR_ENABLED: bool = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+        self.LOOP_MONITOR_INTERVAL: float = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))  # seconds between heartbeats
+        self.LOOP_BLOCK_THRESHOLD: float = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.1"))  # seconds before a stack is captured
+        
+        # Debug Profiling Configuration (/debug/profile and X-Profile are disabled without a token)
+        self.DEBUG_ADMIN_TOKEN: str = os.getenv("DEBUG_ADMIN_TOKEN", "")
+        self.DEBUG_PROFILE_MAX_SECONDS: float = float(os.getenv("DEBUG_PROFILE_MAX_SECONDS", "60"))
+        self.DEBUG_PROFILE_RATE: float = float(os.getenv("DEBUG_PROFILE_RATE", "100"))  # samples per second
+        
+        # Traffic Capture Configuration (sanitized request shapes for offline replay)
+        self.TRAFFIC_CAPTURE_ENABLED: bool = os.getenv("TRAFFIC_CAPTURE_ENABLED", "false").lower() == "true"
+        self.TRAFFIC_CAPTURE_DIR: str = os.getenv("TRAFFIC_CAPTURE_DIR", "traffic-captures")
+        self.TRAFFIC_CAPTURE_SAMPLE_RATE: float = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", "1.0"))
+        self.TRAFFIC_CAPTURE_MAX_BODY: int = int(os.getenv("TRAFFIC_CAPTURE_MAX_BODY", "10485760"))  # 10MB
+        
     @property
     def is_azure_openai_configured(self) -> bool:
         """Check if Azure OpenAI API key is configured"""
@@ -73,3 +192,24 @@ class Settings:
 
 # Global settings instance
 settings = Settings()
+
+
+def on_reload(listener: Callable[[], None]):
+    """Call listener after reload_settings(), e.g. to drop caches derived from settings"""
+    _reload_listeners.append(listener)
+
+
+def reload_settings() -> Settings:
+    """Re-read the .env files and re-evaluate settings in place (sent SIGHUP by operators)"""
+    values = {}
+    for env_file in reversed(ENV_FILES):
+        if env_file.is_file():
+            values.update(dotenv_values(env_file))
+    for key, value in values.items():
+        if key not in _PROCESS_ENV and value is not None:
+            os.environ[key] = value
+    # Keep the object every module imported, with the freshly evaluated values
+    vars(settings).update(vars(Settings()))
+    for listener in list(_reload_listeners):
+        listener()
+    return settings
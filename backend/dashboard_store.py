@@ -0,0 +1,1176 @@
+"""
+Dashboard Store for RED AI
+Shared storage for dashboard tasks, clients, designs and interactions so every
+uvicorn worker sees the same state. Each collection has a version that grows on
+every mutation, for ETags on list endpoints. Lists are paged by insertion order
+(keyset on the sequence number) and can be filtered on indexed fields; range indexes
+keep items grouped by one field and sorted by another (e.g. a client's interactions by time).
+Counters (items per collection and per indexed field value) change in the same write as the
+items, so statistics are a single read.
+"""
+
+import json
+import asyncio
+import bisect
+import itertools
+import math
+import secrets
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column, Index, Integer, MetaData, String, Table, Text, bindparam, create_engine, select
+)
+from sqlalchemy.exc import IntegrityError
+
+from logging_config import get_logger
+
+# Redis is optional - the SQL and in-memory stores work without it
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+Item = Dict[str, Any]
+Modifier = Callable[[Item], None]
+# (items, cursor of the next page or None on the last page)
+Page = Tuple[List[Item], Optional[int]]
+
+# Fields each collection can be filtered on; every store keeps an index per field
+INDEXED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "tasks": ("category", "priority", "completed"),
+    "clients": ("is_favorite",),
+    "designs": ("style", "room_type", "is_favorite", "status"),
+    "interactions": ("interaction_type",),
+}
+
+
+@dataclass(frozen=True)
+class RangeIndex:
+    """Items grouped by `partition` and sorted by `key`; with `present`, only items where that field is set"""
+    partition: str
+    key: str
+    present: Optional[str] = None
+
+
+RANGE_INDEXES: Dict[str, Dict[str, RangeIndex]] = {
+    "interactions": {
+        "timeline": RangeIndex("client_id", "created_at"),
+        "next_actions": RangeIndex("client_id", "created_at", present="next_action"),
+    },
+}
+
+
+def _sequence(item_id: str, default: int) -> int:
+    """Insertion order of a seeded item: its numeric id when it has one"""
+    return int(item_id) if str(item_id).isdigit() else default
+
+
+def _index_value(value: Any) -> str:
+    """Index key of a field value; JSON keeps True, "true" and 1 apart"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _index_entries(collection: str, item: Item) -> List[Tuple[str, str]]:
+    """(field, value key) pairs under which an item is indexed"""
+    return [(field, _index_value(item.get(field))) for field in INDEXED_FIELDS.get(collection, ())]
+
+
+def counter_key(field: str, value: Any) -> str:
+    """Name of the counter of items whose field has this value, e.g. completed=true"""
+    return f"{field}={_index_value(value)}"
+
+
+def _counter_deltas(collection: str, old: Optional[Item], new: Optional[Item]) -> Dict[str, int]:
+    """Counter changes for an item going from old to new (None for absent)"""
+    deltas: Dict[str, int] = {}
+    for item, sign in ((old, -1), (new, 1)):
+        if item is None:
+            continue
+        for name in ["total"] + [f"{field}={value}" for field, value in _index_entries(collection, item)]:
+            deltas[name] = deltas.get(name, 0) + sign
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+def _range_key(value: Any) -> Optional[str]:
+    """Sortable form of a range key; datetimes (and ISO strings) get a fixed width in local time"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value.isoformat(timespec="microseconds")
+    return str(value)
+
+
+def _range_entries(collection: str, item: Item) -> List[Tuple[str, str, str]]:
+    """(index name, partition, sort key) under which an item is range-indexed"""
+    entries = []
+    for name, index in RANGE_INDEXES.get(collection, {}).items():
+        key = _range_key(item.get(index.key))
+        if key is None or (index.present and not item.get(index.present)):
+            continue
+        entries.append((name, _index_value(item.get(index.partition)), key))
+    return entries
+
+
+def _check_range(collection: str, name: str):
+    if name not in RANGE_INDEXES.get(collection, {}):
+        raise ValueError(f"{collection} has no range index {name}")
+
+
+def _check_filters(collection: str, filters: Optional[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """Filters as index entries; only indexed fields can be filtered on"""
+    entries = []
+    for field, value in (filters or {}).items():
+        if field not in INDEXED_FIELDS.get(collection, ()):
+            raise ValueError(f"{collection} cannot be filtered by {field}")
+        entries.append((field, _index_value(value)))
+    return entries
+
+
+def _discard(seqs: List[int], seq: int):
+    """Remove seq from a sorted list"""
+    position = bisect.bisect_left(seqs, seq)
+    if position < len(seqs) and seqs[position] == seq:
+        del seqs[position]
+
+
+# ==================== IN-MEMORY STORE ====================
+
+class InMemoryDashboardStore:
+    """Process-local store; only correct with a single worker"""
+
+    def __init__(self):
+        self._items: Dict[str, Dict[str, Item]] = {}
+        self._counters: Dict[str, itertools.count] = {}
+        self._versions: Dict[str, int] = {}
+        # Sequence numbers: item id -> seq, seq -> item id, and sorted seqs per collection and per index entry
+        self._seqs: Dict[str, Dict[str, int]] = {}
+        self._ids: Dict[str, Dict[int, str]] = {}
+        self._order: Dict[str, List[int]] = {}
+        self._index: Dict[str, Dict[Tuple[str, str], List[int]]] = {}
+        # (index name, partition) -> sorted (sort key, seq) pairs
+        self._ranges: Dict[str, Dict[Tuple[str, str], List[Tuple[str, int]]]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        # Versions restart with the process, so the epoch keeps old ETags from matching
+        self.epoch = secrets.token_hex(4)
+
+    async def start(self):
+        """Nothing to prepare for the in-memory store"""
+
+    async def seed(self, collection: str, items: List[Item]):
+        """Load initial items unless the collection already exists"""
+        if collection in self._items:
+            return
+        self._items[collection] = {}
+        for index, item in enumerate(items):
+            self._add(collection, _sequence(item["id"], index), dict(item))
+        last = max((_sequence(item["id"], 0) for item in items), default=0)
+        self._counters[collection] = itertools.count(last + 1)
+        self._bump(collection)
+
+    def _add(self, collection: str, seq: int, item: Item):
+        self._items.setdefault(collection, {})[item["id"]] = item
+        self._seqs.setdefault(collection, {})[item["id"]] = seq
+        self._ids.setdefault(collection, {})[seq] = item["id"]
+        bisect.insort(self._order.setdefault(collection, []), seq)
+        self._index_item(collection, seq, item)
+
+    def _count(self, collection: str, deltas: Dict[str, int]):
+        counts = self._counts.setdefault(collection, {})
+        for name, delta in deltas.items():
+            counts[name] = counts.get(name, 0) + delta
+
+    def _index_item(self, collection: str, seq: int, item: Item):
+        self._count(collection, _counter_deltas(collection, None, item))
+        index = self._index.setdefault(collection, {})
+        for entry in _index_entries(collection, item):
+            bisect.insort(index.setdefault(entry, []), seq)
+        ranges = self._ranges.setdefault(collection, {})
+        for name, partition, key in _range_entries(collection, item):
+            bisect.insort(ranges.setdefault((name, partition), []), (key, seq))
+
+    def _unindex_item(self, collection: str, seq: int, item: Item):
+        self._count(collection, _counter_deltas(collection, item, None))
+        index = self._index.get(collection, {})
+        for entry in _index_entries(collection, item):
+            _discard(index.get(entry, []), seq)
+        ranges = self._ranges.get(collection, {})
+        for name, partition, key in _range_entries(collection, item):
+            _discard(ranges.get((name, partition), []), (key, seq))
+
+    def _bump(self, collection: str):
+        self._versions[collection] = self._versions.get(collection, 0) + 1
+
+    async def version(self, collection: str) -> int:
+        """Mutation counter of a collection"""
+        return self._versions.get(collection, 0)
+
+    async def counts(self, collection: str) -> Dict[str, int]:
+        """Counters of a collection: "total" and one per indexed field value (see counter_key)"""
+        return dict(self._counts.get(collection, {}))
+
+    async def increment(self, collection: str, name: str, amount: int = 1):
+        """Add to a counter that is not derived from items, e.g. AI jobs completed"""
+        self._count(collection, {name: amount})
+
+    async def list(self, collection: str) -> List[Item]:
+        """All items in insertion order"""
+        return [dict(item) for item in self._items.get(collection, {}).values()]
+
+    async def page(self, collection: str, limit: Optional[int] = None, after: int = 0,
+                   filters: Optional[Dict[str, Any]] = None) -> Page:
+        """Items after the cursor in insertion order, matching every filter"""
+        entries = _check_filters(collection, filters)
+        index = self._index.get(collection, {})
+        # Walk the shortest index list; the other filters are checked on the item itself
+        candidates = min((index.get(entry, []) for entry in entries), key=len,
+                         default=self._order.get(collection, []))
+        ids, items = self._ids.get(collection, {}), self._items.get(collection, {})
+        page: List[Item] = []
+        for position in range(bisect.bisect_right(candidates, after), len(candidates)):
+            item = items[ids[candidates[position]]]
+            if all(_index_value(item.get(field)) == value for field, value in entries):
+                if limit is not None and len(page) == limit:
+                    return page, self._seqs[collection][page[-1]["id"]]
+                page.append(dict(item))
+        return page, None
+
+    async def range(self, collection: str, name: str, partition: Any, since: Any = None, until: Any = None,
+                    limit: Optional[int] = None, descending: bool = False,
+                    filters: Optional[Dict[str, Any]] = None) -> List[Item]:
+        """Items of one partition with since <= key <= until, in key order, matching every filter"""
+        _check_range(collection, name)
+        entries = _check_filters(collection, filters)
+        keys = self._ranges.get(collection, {}).get((name, _index_value(partition)), [])
+        low = bisect.bisect_left(keys, (_range_key(since),)) if since is not None else 0
+        high = bisect.bisect_right(keys, (_range_key(until), math.inf)) if until is not None else len(keys)
+        positions = range(high - 1, low - 1, -1) if descending else range(low, high)
+        ids, items = self._ids.get(collection, {}), self._items.get(collection, {})
+        found: List[Item] = []
+        for position in positions:
+            if limit is not None and len(found) == limit:
+                break
+            item = items[ids[keys[position][1]]]
+            if all(_index_value(item.get(field)) == value for field, value in entries):
+                found.append(dict(item))
+        return found
+
+    async def get(self, collection: str, item_id: str) -> Optional[Item]:
+        """Single item by id"""
+        item = self._items.get(collection, {}).get(item_id)
+        return dict(item) if item is not None else None
+
+    async def create(self, collection: str, item: Item) -> Item:
+        """Store a new item under the next free id"""
+        counter = self._counters.setdefault(collection, itertools.count(1))
+        seq = next(counter)
+        item = {**item, "id": str(seq)}
+        self._add(collection, seq, item)
+        self._bump(collection)
+        return dict(item)
+
+    async def replace(self, collection: str, item_id: str, item: Item) -> Optional[Item]:
+        """Overwrite an existing item; None if it does not exist"""
+        items = self._items.get(collection, {})
+        if item_id not in items:
+            return None
+        seq = self._seqs[collection][item_id]
+        self._unindex_item(collection, seq, items[item_id])
+        items[item_id] = {**item, "id": item_id}
+        self._index_item(collection, seq, items[item_id])
+        self._bump(collection)
+        return dict(items[item_id])
+
+    async def modify(self, collection: str, item_id: str, modifier: Modifier) -> Optional[Item]:
+        """Apply modifier to an item in place; None if it does not exist"""
+        item = self._items.get(collection, {}).get(item_id)
+        if item is None:
+            return None
+        seq = self._seqs[collection][item_id]
+        self._unindex_item(collection, seq, item)
+        try:
+            modifier(item)
+        finally:
+            self._index_item(collection, seq, item)
+        self._bump(collection)
+        return dict(item)
+
+    async def modify_many(self, collection: str, changes: Dict[str, Optional[Modifier]]) -> Dict[str, Optional[Item]]:
+        """Apply a modifier to each item, or delete it where the modifier is None, all or nothing and
+        with one version bump; returns the new (or deleted) item per id, None for missing ids"""
+        items = self._items.get(collection, {})
+        # Run every modifier on a copy first so a failing one leaves the collection untouched
+        modified: Dict[str, Item] = {}
+        for item_id, modifier in changes.items():
+            if item_id in items and modifier is not None:
+                modified[item_id] = dict(items[item_id])
+                modifier(modified[item_id])
+        results: Dict[str, Optional[Item]] = {}
+        for item_id, modifier in changes.items():
+            if item_id not in items:
+                results[item_id] = None
+            elif modifier is None:
+                results[item_id] = self._remove(collection, item_id)
+            else:
+                seq = self._seqs[collection][item_id]
+                self._unindex_item(collection, seq, items[item_id])
+                items[item_id] = modified[item_id]
+                self._index_item(collection, seq, items[item_id])
+                results[item_id] = dict(items[item_id])
+        if any(result is not None for result in results.values()):
+            self._bump(collection)
+        return results
+
+    def _remove(self, collection: str, item_id: str) -> Item:
+        item = self._items[collection].pop(item_id)
+        seq = self._seqs[collection].pop(item_id)
+        del self._ids[collection][seq]
+        _discard(self._order[collection], seq)
+        self._unindex_item(collection, seq, item)
+        return item
+
+    async def delete(self, collection: str, item_id: str) -> Optional[Item]:
+        """Remove an item and return it"""
+        if item_id not in self._items.get(collection, {}):
+            return None
+        item = self._remove(collection, item_id)
+        self._bump(collection)
+        return item
+
+    async def close(self):
+        """Nothing to release for the in-memory store"""
+
+
+# ==================== SQL STORE ====================
+
+metadata = MetaData()
+
+dashboard_items = Table(
+    "dashboard_items",
+    metadata,
+    Column("collection", String(64), primary_key=True),
+    Column("id", String(64), primary_key=True),
+    Column("seq", Integer, nullable=False),
+    Column("data", Text, nullable=False),
+)
+
+# Keyset pages walk a collection in seq order
+dashboard_items_order = Index("ix_dashboard_items_order", dashboard_items.c.collection, dashboard_items.c.seq)
+
+# One row per indexed field of an item; seq is repeated so a filtered page is a single index range scan
+dashboard_fields = Table(
+    "dashboard_fields",
+    metadata,
+    Column("collection", String(64), primary_key=True),
+    Column("id", String(64), primary_key=True),
+    Column("field", String(64), primary_key=True),
+    Column("value", String(255), nullable=False),
+    Column("seq", Integer, nullable=False),
+    Index("ix_dashboard_fields_lookup", "collection", "field", "value", "seq"),
+)
+
+# One row per range index of an item; a range query is a scan of the lookup index
+dashboard_ranges = Table(
+    "dashboard_ranges",
+    metadata,
+    Column("collection", String(64), primary_key=True),
+    Column("name", String(64), primary_key=True),
+    Column("id", String(64), primary_key=True),
+    Column("partition_value", String(255), nullable=False),
+    Column("sort_key", String(64), nullable=False),
+    Index("ix_dashboard_ranges_lookup", "collection", "name", "partition_value", "sort_key"),
+)
+
+dashboard_collections = Table(
+    "dashboard_collections",
+    metadata,
+    Column("collection", String(64), primary_key=True),
+    Column("next_id", Integer, nullable=False),
+)
+
+# Separate table so databases created before versions existed only gain a table
+dashboard_versions = Table(
+    "dashboard_versions",
+    metadata,
+    Column("collection", String(64), primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+# Counters updated in the same transaction as the items they count
+dashboard_counters = Table(
+    "dashboard_counters",
+    metadata,
+    Column("collection", String(64), primary_key=True),
+    Column("name", String(255), primary_key=True),
+    Column("value", Integer, nullable=False),
+)
+
+
+class SQLDashboardStore:
+    """Store in DATABASE_URL; writes are transactional so workers never hand out the same id"""
+
+    def __init__(self, database_url: str):
+        """Initialize SQL dashboard store"""
+        # SQLite serializes writers with a file lock; wait for it instead of failing
+        connect_args = {"check_same_thread": False, "timeout": 30} if database_url.startswith("sqlite") else {}
+        self.engine = create_engine(database_url, connect_args=connect_args, pool_pre_ping=True)
+        # Versions persist with the data
+        self.epoch = "sql"
+
+    async def _run(self, fn, *args):
+        """Run blocking database work off the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def start(self):
+        """Create tables and indexes if needed, then index items stored before their fields were indexed"""
+        await self._run(self._start)
+
+    def _start(self):
+        metadata.create_all(self.engine)
+        # create_all skips indexes of tables that already exist
+        dashboard_items_order.create(self.engine, checkfirst=True)
+        for collection, fields in INDEXED_FIELDS.items():
+            self._backfill(collection, fields)
+        for collection, ranges in RANGE_INDEXES.items():
+            self._backfill_ranges(collection, tuple(ranges))
+        self._backfill_counters()
+
+    def _backfill(self, collection: str, fields: Tuple[str, ...]):
+        with self.engine.connect() as conn:
+            indexed = set(conn.execute(
+                select(dashboard_fields.c.field).where(dashboard_fields.c.collection == collection).distinct()
+            ).scalars())
+        missing = [field for field in fields if field not in indexed]
+        if not missing:
+            return
+        try:
+            with self.engine.begin() as conn:
+                rows = conn.execute(
+                    select(dashboard_items.c.id, dashboard_items.c.seq, dashboard_items.c.data)
+                    .where(dashboard_items.c.collection == collection)
+                ).all()
+                if rows:
+                    conn.execute(dashboard_fields.insert(), [
+                        {"collection": collection, "id": row.id, "field": field, "seq": row.seq,
+                         "value": _index_value(json.loads(row.data).get(field))}
+                        for row in rows for field in missing
+                    ])
+        except IntegrityError:
+            # Another worker indexed the collection first
+            pass
+
+    def _backfill_ranges(self, collection: str, names: Tuple[str, ...]):
+        with self.engine.connect() as conn:
+            indexed = set(conn.execute(
+                select(dashboard_ranges.c.name).where(dashboard_ranges.c.collection == collection).distinct()
+            ).scalars())
+        missing = [name for name in names if name not in indexed]
+        if not missing:
+            return
+        try:
+            with self.engine.begin() as conn:
+                rows = conn.execute(
+                    select(dashboard_items.c.id, dashboard_items.c.data)
+                    .where(dashboard_items.c.collection == collection)
+                ).all()
+                entries = [
+                    {"collection": collection, "name": name, "id": row.id, "partition_value": partition,
+                     "sort_key": key}
+                    for row in rows for name, partition, key in _range_entries(collection, json.loads(row.data))
+                    if name in missing
+                ]
+                if entries:
+                    conn.execute(dashboard_ranges.insert(), entries)
+        except IntegrityError:
+            # Another worker indexed the collection first
+            pass
+
+    def _backfill_counters(self):
+        """Count collections stored before counters existed"""
+        with self.engine.connect() as conn:
+            counted = set(conn.execute(select(dashboard_counters.c.collection).distinct()).scalars())
+            stored = set(conn.execute(select(dashboard_items.c.collection).distinct()).scalars())
+        for collection in stored - counted:
+            try:
+                with self.engine.begin() as conn:
+                    counts: Dict[str, int] = {}
+                    for data in conn.execute(
+                        select(dashboard_items.c.data).where(dashboard_items.c.collection == collection)
+                    ).scalars():
+                        for name, delta in _counter_deltas(collection, None, json.loads(data)).items():
+                            counts[name] = counts.get(name, 0) + delta
+                    conn.execute(dashboard_counters.insert(), [
+                        {"collection": collection, "name": name, "value": value} for name, value in counts.items()
+                    ])
+            except IntegrityError:
+                # Another worker counted the collection first
+                pass
+
+    @staticmethod
+    def _index(conn, collection: str, seq: int, old: Optional[Item], new: Optional[Item]):
+        """Move the index rows and counters of an item from old to new (None for absent)
+        inside the caller's transaction"""
+        item_id = (new or old)["id"]
+        if old is not None:
+            for table in (dashboard_fields, dashboard_ranges):
+                conn.execute(table.delete().where((table.c.collection == collection) & (table.c.id == item_id)))
+        entries = _index_entries(collection, new) if new is not None else []
+        if entries:
+            conn.execute(dashboard_fields.insert(), [
+                {"collection": collection, "id": item_id, "field": field, "value": value, "seq": seq}
+                for field, value in entries
+            ])
+        ranges = _range_entries(collection, new) if new is not None else []
+        if ranges:
+            conn.execute(dashboard_ranges.insert(), [
+                {"collection": collection, "name": name, "id": item_id, "partition_value": partition,
+                 "sort_key": key}
+                for name, partition, key in ranges
+            ])
+        SQLDashboardStore._count(conn, collection, _counter_deltas(collection, old, new))
+
+    @staticmethod
+    def _count(conn, collection: str, deltas: Dict[str, int]):
+        for name, delta in deltas.items():
+            updated = conn.execute(
+                dashboard_counters.update()
+                .where((dashboard_counters.c.collection == collection) & (dashboard_counters.c.name == name))
+                .values(value=dashboard_counters.c.value + delta)
+            ).rowcount
+            if not updated:
+                conn.execute(dashboard_counters.insert().values(collection=collection, name=name, value=delta))
+
+    async def seed(self, collection: str, items: List[Item]):
+        """Load initial items unless the collection already exists (first worker wins)"""
+        await self._run(self._seed, collection, items)
+
+    def _seed(self, collection: str, items: List[Item]):
+        last = max((_sequence(item["id"], 0) for item in items), default=0)
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(dashboard_collections.insert().values(collection=collection, next_id=last + 1))
+                if items:
+                    conn.execute(dashboard_items.insert(), [
+                        {
+                            "collection": collection,
+                            "id": item["id"],
+                            "seq": _sequence(item["id"], index),
+                            "data": json.dumps(item, ensure_ascii=False),
+                        }
+                        for index, item in enumerate(items)
+                    ])
+                for index, item in enumerate(items):
+                    self._index(conn, collection, _sequence(item["id"], index), None, item)
+                self._bump(conn, collection)
+        except IntegrityError:
+            # Another worker seeded the collection first
+            pass
+
+    @staticmethod
+    def _bump(conn, collection: str):
+        """Increment the collection version inside the caller's transaction"""
+        updated = conn.execute(
+            dashboard_versions.update()
+            .where(dashboard_versions.c.collection == collection)
+            .values(version=dashboard_versions.c.version + 1)
+        ).rowcount
+        if not updated:
+            conn.execute(dashboard_versions.insert().values(collection=collection, version=1))
+
+    async def version(self, collection: str) -> int:
+        """Mutation counter of a collection"""
+        return await self._run(self._version, collection)
+
+    def _version(self, collection: str) -> int:
+        with self.engine.connect() as conn:
+            version = conn.execute(
+                select(dashboard_versions.c.version).where(dashboard_versions.c.collection == collection)
+            ).scalar()
+        return version or 0
+
+    async def counts(self, collection: str) -> Dict[str, int]:
+        """Counters of a collection: "total" and one per indexed field value (see counter_key)"""
+        return await self._run(self._counts, collection)
+
+    def _counts(self, collection: str) -> Dict[str, int]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(dashboard_counters.c.name, dashboard_counters.c.value)
+                .where(dashboard_counters.c.collection == collection)
+            ).all()
+        return {row.name: row.value for row in rows}
+
+    async def increment(self, collection: str, name: str, amount: int = 1):
+        """Add to a counter that is not derived from items, e.g. AI jobs completed"""
+        await self._run(self._increment, collection, {name: amount})
+
+    def _increment(self, collection: str, deltas: Dict[str, int]):
+        with self.engine.begin() as conn:
+            self._count(conn, collection, deltas)
+
+    async def list(self, collection: str) -> List[Item]:
+        """All items in insertion order"""
+        return await self._run(self._list, collection)
+
+    def _list(self, collection: str) -> List[Item]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(dashboard_items.c.data)
+                .where(dashboard_items.c.collection == collection)
+                .order_by(dashboard_items.c.seq)
+            ).all()
+        return [json.loads(row.data) for row in rows]
+
+    async def page(self, collection: str, limit: Optional[int] = None, after: int = 0,
+                   filters: Optional[Dict[str, Any]] = None) -> Page:
+        """Items after the cursor in insertion order, matching every filter"""
+        return await self._run(self._page, collection, limit, after, _check_filters(collection, filters))
+
+    def _page(self, collection: str, limit: Optional[int], after: int, entries: List[Tuple[str, str]]) -> Page:
+        query = select(dashboard_items.c.seq, dashboard_items.c.data)
+        # The first filter's index drives the scan in seq order; the others are primary key lookups
+        order = dashboard_items.c.seq
+        for field, value in entries:
+            fields = dashboard_fields.alias()
+            query = query.join(fields, (fields.c.collection == dashboard_items.c.collection)
+                               & (fields.c.id == dashboard_items.c.id)
+                               & (fields.c.field == field) & (fields.c.value == value))
+            if order is dashboard_items.c.seq:
+                order = fields.c.seq
+        query = query.where((dashboard_items.c.collection == collection) & (order > after)).order_by(order)
+        if limit is not None:
+            query = query.limit(limit + 1)
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        if limit is not None and len(rows) > limit:
+            return [json.loads(row.data) for row in rows[:limit]], rows[limit - 1].seq
+        return [json.loads(row.data) for row in rows], None
+
+    async def range(self, collection: str, name: str, partition: Any, since: Any = None, until: Any = None,
+                    limit: Optional[int] = None, descending: bool = False,
+                    filters: Optional[Dict[str, Any]] = None) -> List[Item]:
+        """Items of one partition with since <= key <= until, in key order, matching every filter"""
+        _check_range(collection, name)
+        return await self._run(self._range, collection, name, _index_value(partition), _range_key(since),
+                               _range_key(until), limit, descending, _check_filters(collection, filters))
+
+    def _range(self, collection: str, name: str, partition: str, since: Optional[str], until: Optional[str],
+               limit: Optional[int], descending: bool, entries: List[Tuple[str, str]]) -> List[Item]:
+        ranges = dashboard_ranges
+        query = (
+            select(dashboard_items.c.data)
+            .join(ranges, (ranges.c.collection == dashboard_items.c.collection) & (ranges.c.id == dashboard_items.c.id))
+            .where((ranges.c.collection == collection) & (ranges.c.name == name)
+                   & (ranges.c.partition_value == partition))
+        )
+        if since is not None:
+            query = query.where(ranges.c.sort_key >= since)
+        if until is not None:
+            query = query.where(ranges.c.sort_key <= until)
+        for field, value in entries:
+            fields = dashboard_fields.alias()
+            query = query.join(fields, (fields.c.collection == dashboard_items.c.collection)
+                               & (fields.c.id == dashboard_items.c.id)
+                               & (fields.c.field == field) & (fields.c.value == value))
+        query = query.order_by(ranges.c.sort_key.desc() if descending else ranges.c.sort_key)
+        if limit is not None:
+            query = query.limit(limit)
+        with self.engine.connect() as conn:
+            return [json.loads(data) for data in conn.execute(query).scalars()]
+
+    async def get(self, collection: str, item_id: str) -> Optional[Item]:
+        """Single item by id"""
+        return await self._run(self._get, collection, item_id)
+
+    def _get(self, collection: str, item_id: str) -> Optional[Item]:
+        with self.engine.connect() as conn:
+            data = conn.execute(
+                select(dashboard_items.c.data).where(self._key(collection, item_id))
+            ).scalar()
+        return json.loads(data) if data is not None else None
+
+    @staticmethod
+    def _key(collection: str, item_id: str):
+        return (dashboard_items.c.collection == collection) & (dashboard_items.c.id == item_id)
+
+    async def create(self, collection: str, item: Item) -> Item:
+        """Store a new item under the next free id"""
+        return await self._run(self._create, collection, item)
+
+    def _create(self, collection: str, item: Item) -> Item:
+        with self.engine.begin() as conn:
+            # The UPDATE takes the write lock, so concurrent workers get distinct ids
+            updated = conn.execute(
+                dashboard_collections.update()
+                .where(dashboard_collections.c.collection == collection)
+                .values(next_id=dashboard_collections.c.next_id + 1)
+            ).rowcount
+            if not updated:
+                conn.execute(dashboard_collections.insert().values(collection=collection, next_id=2))
+                seq = 1
+            else:
+                seq = conn.execute(
+                    select(dashboard_collections.c.next_id)
+                    .where(dashboard_collections.c.collection == collection)
+                ).scalar() - 1
+            item = {**item, "id": str(seq)}
+            conn.execute(dashboard_items.insert().values(
+                collection=collection, id=item["id"], seq=seq, data=json.dumps(item, ensure_ascii=False)
+            ))
+            self._index(conn, collection, seq, None, item)
+            self._bump(conn, collection)
+        return item
+
+    async def replace(self, collection: str, item_id: str, item: Item) -> Optional[Item]:
+        """Overwrite an existing item; None if it does not exist"""
+        return await self._run(self._replace, collection, item_id, item)
+
+    def _replace(self, collection: str, item_id: str, item: Item) -> Optional[Item]:
+        item = {**item, "id": item_id}
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(dashboard_items.c.seq, dashboard_items.c.data)
+                .where(self._key(collection, item_id)).with_for_update()
+            ).first()
+            if row is None:
+                return None
+            conn.execute(
+                dashboard_items.update().where(self._key(collection, item_id))
+                .values(data=json.dumps(item, ensure_ascii=False))
+            )
+            self._index(conn, collection, row.seq, json.loads(row.data), item)
+            self._bump(conn, collection)
+        return item
+
+    async def modify(self, collection: str, item_id: str, modifier: Modifier) -> Optional[Item]:
+        """Apply modifier to an item inside one transaction; None if it does not exist"""
+        return await self._run(self._modify, collection, item_id, modifier)
+
+    def _modify(self, collection: str, item_id: str, modifier: Modifier) -> Optional[Item]:
+        with self.engine.begin() as conn:
+            row = conn.execute(
+                select(dashboard_items.c.seq, dashboard_items.c.data)
+                .where(self._key(collection, item_id)).with_for_update()
+            ).first()
+            if row is None:
+                return None
+            item = json.loads(row.data)
+            modifier(item)
+            conn.execute(
+                dashboard_items.update().where(self._key(collection, item_id))
+                .values(data=json.dumps(item, ensure_ascii=False))
+            )
+            self._index(conn, collection, row.seq, json.loads(row.data), item)
+            self._bump(conn, collection)
+        return item
+
+    async def modify_many(self, collection: str, changes: Dict[str, Optional[Modifier]]) -> Dict[str, Optional[Item]]:
+        """Apply a modifier to each item, or delete it where the modifier is None, in one transaction
+        with one version bump; returns the new (or deleted) item per id, None for missing ids"""
+        return await self._run(self._modify_many, collection, changes)
+
+    def _modify_many(self, collection: str, changes: Dict[str, Optional[Modifier]]) -> Dict[str, Optional[Item]]:
+        results: Dict[str, Optional[Item]] = {item_id: None for item_id in changes}
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(dashboard_items.c.id, dashboard_items.c.seq, dashboard_items.c.data)
+                .where((dashboard_items.c.collection == collection) & dashboard_items.c.id.in_(list(changes)))
+                .with_for_update()
+            ).all()
+            writes, deletes = [], []
+            for row in rows:
+                old, modifier = json.loads(row.data), changes[row.id]
+                if modifier is None:
+                    deletes.append(row.id)
+                    results[row.id] = old
+                    self._index(conn, collection, row.seq, old, None)
+                    continue
+                item = json.loads(row.data)
+                modifier(item)
+                writes.append({"item_id": row.id, "new_data": json.dumps(item, ensure_ascii=False)})
+                results[row.id] = item
+                self._index(conn, collection, row.seq, old, item)
+            if writes:
+                # One executemany for every modified item
+                conn.execute(
+                    dashboard_items.update()
+                    .where((dashboard_items.c.collection == collection)
+                           & (dashboard_items.c.id == bindparam("item_id")))
+                    .values(data=bindparam("new_data")),
+                    writes
+                )
+            if deletes:
+                conn.execute(dashboard_items.delete().where(
+                    (dashboard_items.c.collection == collection) & dashboard_items.c.id.in_(deletes)
+                ))
+            if rows:
+                self._bump(conn, collection)
+        return results
+
+    async def delete(self, collection: str, item_id: str) -> Optional[Item]:
+        """Remove an item and return it"""
+        return await self._run(self._delete, collection, item_id)
+
+    def _delete(self, collection: str, item_id: str) -> Optional[Item]:
+        with self.engine.begin() as conn:
+            data = conn.execute(
+                select(dashboard_items.c.data).where(self._key(collection, item_id)).with_for_update()
+            ).scalar()
+            if data is None:
+                return None
+            conn.execute(dashboard_items.delete().where(self._key(collection, item_id)))
+            self._index(conn, collection, 0, json.loads(data), None)
+            self._bump(conn, collection)
+        return json.loads(data)
+
+    async def close(self):
+        """Close database connections"""
+        self.engine.dispose()
+
+
+# ==================== REDIS STORE ====================
+
+class RedisDashboardStore:
+    """Store in Redis: a hash of items plus sorted sets (scored by seq) for insertion order and for
+    every indexed field value per collection; range indexes are lexicographic sorted sets of
+    sort key + NUL + id members per partition"""
+
+    def __init__(self, redis_url: str, prefix: str = "redai:dashboard:"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is not installed")
+        self.redis = aioredis.from_url(redis_url, decode_responses=True)
+        self.prefix = prefix
+        # Versions persist with the data
+        self.epoch = "redis"
+
+    def _keys(self, collection: str):
+        """Item hash, order index, id counter and seed marker of a collection"""
+        base = self.prefix + collection
+        return base, base + ":order", base + ":seq", base + ":seeded"
+
+    def _version_key(self, collection: str) -> str:
+        return self.prefix + collection + ":version"
+
+    def _index_key(self, collection: str, entry: Tuple[str, str]) -> str:
+        field, value = entry
+        return f"{self.prefix}{collection}:index:{field}:{value}"
+
+    def _range_set_key(self, collection: str, name: str, partition: str) -> str:
+        return f"{self.prefix}{collection}:range:{name}:{partition}"
+
+    def _counts_key(self, collection: str) -> str:
+        return self.prefix + collection + ":counts"
+
+    def _index(self, pipe, collection: str, seq: int, old: Optional[Item], new: Optional[Item]):
+        """Queue the index updates for an item changing from old to new (None for absent)"""
+        before = set(_index_entries(collection, old)) if old is not None else set()
+        after = set(_index_entries(collection, new)) if new is not None else set()
+        item_id = (new or old)["id"]
+        for entry in before - after:
+            pipe.zrem(self._index_key(collection, entry), item_id)
+        for entry in after - before:
+            pipe.zadd(self._index_key(collection, entry), {item_id: seq})
+        before = set(_range_entries(collection, old)) if old is not None else set()
+        after = set(_range_entries(collection, new)) if new is not None else set()
+        for name, partition, key in before - after:
+            pipe.zrem(self._range_set_key(collection, name, partition), f"{key}\0{item_id}")
+        for name, partition, key in after - before:
+            pipe.zadd(self._range_set_key(collection, name, partition), {f"{key}\0{item_id}": 0})
+        for name, delta in _counter_deltas(collection, old, new).items():
+            pipe.hincrby(self._counts_key(collection), name, delta)
+
+    async def version(self, collection: str) -> int:
+        """Mutation counter of a collection"""
+        return int(await self.redis.get(self._version_key(collection)) or 0)
+
+    async def start(self):
+        """Index and count items stored before their fields were indexed or counted"""
+        async for seeded_key in self.redis.scan_iter(match=self.prefix + "*:seeded"):
+            collection = seeded_key[len(self.prefix):-len(":seeded")]
+
+            async def backfill(pipe, collection=collection):
+                await self._backfill_counts(pipe, collection)
+
+            await self.redis.transaction(backfill, self._keys(collection)[0], self._counts_key(collection))
+        for collection in set(INDEXED_FIELDS) | set(RANGE_INDEXES):
+            marker = self.prefix + collection + ":indexed"
+            indexes = ",".join(INDEXED_FIELDS.get(collection, ()) + tuple(RANGE_INDEXES.get(collection, {})))
+            if await self.redis.get(marker) == indexes:
+                continue
+            items_key, order_key, _, _ = self._keys(collection)
+            seqs = dict(await self.redis.zrange(order_key, 0, -1, withscores=True))
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for item_id, data in (await self.redis.hgetall(items_key)).items():
+                    if item_id in seqs:
+                        self._index(pipe, collection, int(seqs[item_id]), None, json.loads(data))
+                pipe.set(marker, indexes)
+                await pipe.execute()
+
+    async def _backfill_counts(self, pipe, collection: str):
+        if await pipe.exists(self._counts_key(collection)):
+            return
+        counts: Dict[str, int] = {}
+        for data in (await pipe.hgetall(self._keys(collection)[0])).values():
+            for name, delta in _counter_deltas(collection, None, json.loads(data)).items():
+                counts[name] = counts.get(name, 0) + delta
+        pipe.multi()
+        if counts:
+            pipe.hset(self._counts_key(collection), mapping=counts)
+
+    async def counts(self, collection: str) -> Dict[str, int]:
+        """Counters of a collection: "total" and one per indexed field value (see counter_key)"""
+        return {name: int(value) for name, value in (await self.redis.hgetall(self._counts_key(collection))).items()}
+
+    async def increment(self, collection: str, name: str, amount: int = 1):
+        """Add to a counter that is not derived from items, e.g. AI jobs completed"""
+        await self.redis.hincrby(self._counts_key(collection), name, amount)
+
+    async def seed(self, collection: str, items: List[Item]):
+        """Load initial items unless the collection already exists (first worker wins)"""
+        items_key, order_key, seq_key, seeded_key = self._keys(collection)
+        if not await self.redis.set(seeded_key, "1", nx=True):
+            return
+        last = max((_sequence(item["id"], 0) for item in items), default=0)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for index, item in enumerate(items):
+                pipe.hset(items_key, item["id"], json.dumps(item, ensure_ascii=False))
+                pipe.zadd(order_key, {item["id"]: _sequence(item["id"], index)})
+                self._index(pipe, collection, _sequence(item["id"], index), None, item)
+            pipe.set(seq_key, last)
+            pipe.incr(self._version_key(collection))
+            await pipe.execute()
+
+    async def list(self, collection: str) -> List[Item]:
+        """All items in insertion order"""
+        items_key, order_key, _, _ = self._keys(collection)
+        ids = await self.redis.zrange(order_key, 0, -1)
+        if not ids:
+            return []
+        return [json.loads(data) for data in await self.redis.hmget(items_key, ids) if data is not None]
+
+    async def page(self, collection: str, limit: Optional[int] = None, after: int = 0,
+                   filters: Optional[Dict[str, Any]] = None) -> Page:
+        """Items after the cursor in insertion order, matching every filter"""
+        entries = _check_filters(collection, filters)
+        items_key, order_key = self._keys(collection)[:2]
+        # The first filter's sorted set drives the scan; the others are checked with ZSCORE
+        driver = self._index_key(collection, entries[0]) if entries else order_key
+        others = [self._index_key(collection, entry) for entry in entries[1:]]
+        batch = (limit + 1) if limit is not None else None
+        matched: List[Tuple[str, int]] = []
+        low = f"({after}"
+        while True:
+            scanned = await self.redis.zrangebyscore(driver, low, "+inf", start=0 if batch else None,
+                                                     num=batch, withscores=True)
+            if not scanned:
+                break
+            if others:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for item_id, _ in scanned:
+                        for key in others:
+                            pipe.zscore(key, item_id)
+                    scores = await pipe.execute()
+                hits = [
+                    entry for position, entry in enumerate(scanned)
+                    if all(score is not None for score in scores[position * len(others):(position + 1) * len(others)])
+                ]
+            else:
+                hits = scanned
+            matched.extend((item_id, int(seq)) for item_id, seq in hits)
+            if batch is None or len(matched) > limit or len(scanned) < batch:
+                break
+            low = f"({int(scanned[-1][1])}"
+        next_cursor = None
+        if limit is not None and len(matched) > limit:
+            matched = matched[:limit]
+            next_cursor = matched[-1][1]
+        if not matched:
+            return [], None
+        data = await self.redis.hmget(items_key, [item_id for item_id, _ in matched])
+        return [json.loads(value) for value in data if value is not None], next_cursor
+
+    async def range(self, collection: str, name: str, partition: Any, since: Any = None, until: Any = None,
+                    limit: Optional[int] = None, descending: bool = False,
+                    filters: Optional[Dict[str, Any]] = None) -> List[Item]:
+        """Items of one partition with since <= key <= until, in key order, matching every filter"""
+        _check_range(collection, name)
+        filter_keys = [self._index_key(collection, entry) for entry in _check_filters(collection, filters)]
+        key = self._range_set_key(collection, name, _index_value(partition))
+        low = "[" + _range_key(since) if since is not None else "-"
+        # "\1" sorts after "<until>\0<id>" and before any later key
+        high = "[" + _range_key(until) + "\1" if until is not None else "+"
+        batch = limit if limit is not None else None
+        ids: List[str] = []
+        offset = 0
+        while True:
+            if descending:
+                members = await self.redis.zrevrangebylex(key, high, low, start=offset if batch else None, num=batch)
+            else:
+                members = await self.redis.zrangebylex(key, low, high, start=offset if batch else None, num=batch)
+            scanned = [member.split("\0", 1)[1] for member in members]
+            if filter_keys and scanned:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for item_id in scanned:
+                        for filter_key in filter_keys:
+                            pipe.zscore(filter_key, item_id)
+                    scores = await pipe.execute()
+                width = len(filter_keys)
+                scanned = [
+                    item_id for position, item_id in enumerate(scanned)
+                    if all(score is not None for score in scores[position * width:(position + 1) * width])
+                ]
+            ids.extend(scanned)
+            offset += len(members)
+            if batch is None or len(ids) >= limit or len(members) < batch:
+                break
+        ids = ids[:limit] if limit is not None else ids
+        if not ids:
+            return []
+        data = await self.redis.hmget(self._keys(collection)[0], ids)
+        return [json.loads(value) for value in data if value is not None]
+
+    async def get(self, collection: str, item_id: str) -> Optional[Item]:
+        """Single item by id"""
+        data = await self.redis.hget(self._keys(collection)[0], item_id)
+        return json.loads(data) if data is not None else None
+
+    async def create(self, collection: str, item: Item) -> Item:
+        """Store a new item under the next free id"""
+        items_key, order_key, seq_key, _ = self._keys(collection)
+        seq = await self.redis.incr(seq_key)
+        item = {**item, "id": str(seq)}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(items_key, item["id"], json.dumps(item, ensure_ascii=False))
+            pipe.zadd(order_key, {item["id"]: seq})
+            self._index(pipe, collection, seq, None, item)
+            pipe.incr(self._version_key(collection))
+            await pipe.execute()
+        return item
+
+    async def replace(self, collection: str, item_id: str, item: Item) -> Optional[Item]:
+        """Overwrite an existing item; None if it does not exist"""
+        item = {**item, "id": item_id}
+
+        def overwrite(current: Item):
+            current.clear()
+            current.update(item)
+
+        return await self.modify(collection, item_id, overwrite)
+
+    async def modify(self, collection: str, item_id: str, modifier: Modifier) -> Optional[Item]:
+        """Apply modifier with optimistic locking (WATCH) so concurrent workers never lose updates"""
+        items_key, order_key = self._keys(collection)[:2]
+        result: Dict[str, Optional[Item]] = {}
+
+        async def apply(pipe):
+            data = await pipe.hget(items_key, item_id)
+            if data is None:
+                result["item"] = None
+                return
+            seq = await pipe.zscore(order_key, item_id)
+            old, item = json.loads(data), json.loads(data)
+            modifier(item)
+            pipe.multi()
+            pipe.hset(items_key, item_id, json.dumps(item, ensure_ascii=False))
+            self._index(pipe, collection, int(seq or 0), old, item)
+            pipe.incr(self._version_key(collection))
+            result["item"] = item
+
+        await self.redis.transaction(apply, items_key)
+        return result.get("item")
+
+    async def modify_many(self, collection: str, changes: Dict[str, Optional[Modifier]]) -> Dict[str, Optional[Item]]:
+        """Apply a modifier to each item, or delete it where the modifier is None, in one MULTI with
+        one version bump (optimistic locking as in modify); returns the new (or deleted) item per id,
+        None for missing ids"""
+        items_key, order_key = self._keys(collection)[:2]
+        ids = list(changes)
+        results: Dict[str, Optional[Item]] = {}
+
+        async def apply(pipe):
+            data = await pipe.hmget(items_key, ids)
+            seqs = await pipe.zmscore(order_key, ids)
+            writes: Dict[str, str] = {}
+            deletes: List[str] = []
+            moves: List[Tuple[int, Item, Optional[Item]]] = []
+            results.clear()
+            for item_id, value, seq in zip(ids, data, seqs):
+                if value is None:
+                    results[item_id] = None
+                    continue
+                old, modifier = json.loads(value), changes[item_id]
+                if modifier is None:
+                    deletes.append(item_id)
+                    results[item_id] = old
+                    moves.append((int(seq or 0), old, None))
+                    continue
+                item = json.loads(value)
+                modifier(item)
+                writes[item_id] = json.dumps(item, ensure_ascii=False)
+                results[item_id] = item
+                moves.append((int(seq or 0), old, item))
+            pipe.multi()
+            if writes:
+                pipe.hset(items_key, mapping=writes)
+            if deletes:
+                pipe.hdel(items_key, *deletes)
+                pipe.zrem(order_key, *deletes)
+            for seq, old, item in moves:
+                self._index(pipe, collection, seq, old, item)
+            if moves:
+                pipe.incr(self._version_key(collection))
+
+        await self.redis.transaction(apply, items_key)
+        return results
+
+    async def delete(self, collection: str, item_id: str) -> Optional[Item]:
+        """Remove an item and return it; the item, its index entries and counters go in one MULTI
+        (optimistic locking as in modify)"""
+        items_key, order_key = self._keys(collection)[:2]
+        result: Dict[str, Optional[Item]] = {}
+
+        async def apply(pipe):
+            data = await pipe.hget(items_key, item_id)
+            if data is None:
+                result["item"] = None
+                return
+            item = json.loads(data)
+            pipe.multi()
+            pipe.hdel(items_key, item_id)
+            pipe.zrem(order_key, item_id)
+            self._index(pipe, collection, 0, item, None)
+            pipe.incr(self._version_key(collection))
+            result["item"] = item
+
+        await self.redis.transaction(apply, items_key)
+        return result.get("item")
+
+    async def close(self):
+        """Close the Redis connection pool"""
+        await self.redis.close()
+
+
+def create_dashboard_store(backend: str = "memory", database_url: Optional[str] = None,
+                           redis_url: Optional[str] = None):
+    """Create dashboard store for the configured backend"""
+    if backend == "redis":
+        if REDIS_AVAILABLE and redis_url:
+            return RedisDashboardStore(redis_url)
+        logger.warning("dashboard_store.redis_unavailable", fallback="memory")
+    elif backend == "sql":
+        if database_url:
+            return SQLDashboardStore(database_url)
+        logger.warning("dashboard_store.database_url_missing", fallback="memory")
+    return InMemoryDashboardStore()
@@ -0,0 +1,237 @@
+"""
+HTTP Connection Pool for RED AI
+One shared httpx.AsyncClient per upstream host with keep-alive, HTTP/2 and DNS caching
+"""
+
+import time
+import socket
+import asyncio
+import ipaddress
+import importlib.util
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import httpcore
+
+from clients import clients
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# HTTP/2 needs the h2 package (httpx[http2]); without it connections fall back to HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Trace events that mean the request has been given a connection
+CONNECTION_ACQUIRED_EVENTS = (
+    "connection.connect_tcp.started",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+)
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that caches getaddrinfo results for new connections"""
+
+    def __init__(self, ttl: float = 300.0, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self.ttl = ttl
+        self._backend = backend or httpcore.AnyIOBackend()
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        """Addresses of a host, from the cache while fresh"""
+        now = time.monotonic()
+        cached = self._cache.get((host, port))
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[(host, port)] = (now + self.ttl, addresses)
+        return addresses
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None,
+                          local_address: Optional[str] = None, socket_options=None):
+        """Connect to the first reachable cached address (TLS still verifies the hostname)"""
+        try:
+            ipaddress.ip_address(host)
+            addresses = [host]
+        except ValueError:
+            addresses = await self._resolve(host, port)
+
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        # Every cached address failed - resolve again next time
+        self._cache.pop((host, port), None)
+        raise error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+class PoolStats:
+    """Connection reuse and pool wait counters for one upstream host"""
+
+    __slots__ = ("requests", "connections_opened", "connections_reused", "wait_total", "wait_max", "in_flight")
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.in_flight = 0
+
+    def as_dict(self) -> Dict:
+        """Snapshot for health and metrics endpoints"""
+        connected = self.connections_opened + self.connections_reused
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.connections_reused / connected, 4) if connected else None,
+            "pool_wait_avg_ms": round(self.wait_total / self.requests * 1000, 3) if self.requests else 0.0,
+            "pool_wait_max_ms": round(self.wait_max * 1000, 3),
+            "in_flight": self.in_flight,
+        }
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """httpx transport with a DNS-caching connection pool that records reuse and wait time"""
+
+    def __init__(self, limits: httpx.Limits, http2: bool, dns_ttl: float, stats: PoolStats):
+        super().__init__(limits=limits, http2=http2)
+        # Same pool httpx builds itself, with the caching network backend
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=CachingDNSBackend(ttl=dns_ttl),
+        )
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self.stats
+        started = time.perf_counter()
+        acquired = False
+        upstream_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict):
+            nonlocal acquired
+            if not acquired and event_name in CONNECTION_ACQUIRED_EVENTS:
+                acquired = True
+                waited = time.perf_counter() - started
+                stats.wait_total += waited
+                stats.wait_max = max(stats.wait_max, waited)
+                if not event_name.startswith("connection."):
+                    stats.connections_reused += 1
+            if event_name == "connection.connect_tcp.complete":
+                stats.connections_opened += 1
+            if upstream_trace is not None:
+                await upstream_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        stats.requests += 1
+        stats.in_flight += 1
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            stats.in_flight -= 1
+
+
+class HTTPClientPool:
+    """Shared httpx.AsyncClient per upstream host"""
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, http2: bool = True, dns_ttl: float = 300.0,
+                 timeout: float = 60.0):
+        """Initialize HTTP client pool"""
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.dns_ttl = dns_ttl
+        self.timeout = timeout
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, PoolStats] = {}
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        """scheme://host[:port] of a URL"""
+        parts = urlsplit(url)
+        if not parts.scheme or not parts.netloc:
+            raise ValueError(f"Not an absolute URL: {url}")
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Client shared by every caller of the URL's host"""
+        origin = self._origin(url)
+        client = self._clients.get(origin)
+        if client is None:
+            stats = self._stats.setdefault(origin, PoolStats())
+            client = httpx.AsyncClient(
+                transport=InstrumentedTransport(self.limits, self.http2, self.dns_ttl, stats),
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+            self._clients[origin] = client
+        return client
+
+    def stats(self) -> Dict[str, Dict]:
+        """Reuse ratio and pool wait time per upstream host"""
+        return {origin: stats.as_dict() for origin, stats in self._stats.items()}
+
+    async def aclose(self):
+        """Close every pooled connection"""
+        clients_to_close, self._clients = list(self._clients.values()), {}
+        await asyncio.gather(*(client.aclose() for client in clients_to_close), return_exceptions=True)
+
+
+def create_http_pool(max_connections: int = 100, max_keepalive_connections: int = 20,
+                     keepalive_expiry: float = 30.0, http2: bool = True, dns_ttl: float = 300.0,
+                     timeout: float = 60.0) -> HTTPClientPool:
+    """Create HTTP client pool instance"""
+    if http2 and not HTTP2_AVAILABLE:
+        logger.warning("http_pool.h2_unavailable", fallback="HTTP/1.1")
+    return HTTPClientPool(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+        http2=http2,
+        dns_ttl=dns_ttl,
+        timeout=timeout,
+    )
+
+
+def _create_configured_pool() -> HTTPClientPool:
+    """HTTP client pool sized from settings"""
+    from config import settings
+    return create_http_pool(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        http2=settings.HTTP2_ENABLED,
+        dns_ttl=settings.DNS_CACHE_TTL,
+        timeout=settings.HTTP_TIMEOUT,
+    )
+
+
+clients.register("http_pool", _create_configured_pool, close=lambda pool: pool.aclose())
+
+
+def get_http_pool() -> HTTPClientPool:
+    """Shared HTTP client pool, created on first use"""
+    return clients.get("http_pool")
@@ -0,0 +1,274 @@
+"""
+Job Queue for RED AI
+Runs long AI generation calls in a bounded worker pool and tracks their status
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import itertools
+import contextvars
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from logging_config import get_logger
+
+# Redis is optional - the in-memory store is used when it is not installed
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+
+class JobStatus:
+    """Job lifecycle states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobPriority:
+    """Job priorities (lower runs first)"""
+    HIGH = 0
+    NORMAL = 5
+    LOW = 9
+
+
+class Job(BaseModel):
+    """Job state visible to clients"""
+    id: str
+    kind: str
+    user_id: Optional[str] = None
+    status: str = JobStatus.QUEUED
+    priority: int = JobPriority.NORMAL
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    # Milliseconds per phase (queue wait plus traced phases of the handler)
+    timings: Optional[Dict[str, float]] = None
+
+
+class QueueFullError(Exception):
+    """Raised when the queue cannot accept more jobs"""
+
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+JobListener = Callable[[Job, str, Any], Awaitable[None]]
+
+# Job being processed by the current worker task
+_current_job: contextvars.ContextVar = contextvars.ContextVar("current_job", default=None)
+
+
+# ==================== JOB STORES ====================
+
+class InMemoryJobStore:
+    """Process-local job store with per-entry TTL"""
+
+    def __init__(self):
+        self._jobs: Dict[str, tuple] = {}
+        self._writes = 0
+
+    async def save(self, job: Job, ttl: int):
+        """Store job state, expiring after ttl seconds"""
+        self._jobs[job.id] = (job, time.monotonic() + ttl)
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._purge_expired()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Get job state if it has not expired"""
+        entry = self._jobs.get(job_id)
+        if entry is None:
+            return None
+        job, expires_at = entry
+        if expires_at < time.monotonic():
+            self._jobs.pop(job_id, None)
+            return None
+        return job
+
+    def _purge_expired(self):
+        """Drop expired jobs"""
+        now = time.monotonic()
+        for job_id in [k for k, (_, expires_at) in self._jobs.items() if expires_at < now]:
+            del self._jobs[job_id]
+
+    async def close(self):
+        """Nothing to release for the in-memory store"""
+
+
+class RedisJobStore:
+    """Redis-backed job store shared by all uvicorn workers"""
+
+    def __init__(self, redis_url: str, prefix: str = "redai:job:"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is not installed")
+        self.redis = aioredis.from_url(redis_url)
+        self.prefix = prefix
+
+    async def save(self, job: Job, ttl: int):
+        """Store job state, expiring after ttl seconds"""
+        await self.redis.set(self.prefix + job.id, job.model_dump_json(), ex=ttl)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Get job state if it has not expired"""
+        raw = await self.redis.get(self.prefix + job_id)
+        if raw is None:
+            return None
+        return Job.model_validate(json.loads(raw))
+
+    async def close(self):
+        """Close the Redis connection pool"""
+        await self.redis.close()
+
+
+# ==================== JOB QUEUE ====================
+
+class JobQueue:
+    """Bounded priority queue processed by a fixed pool of asyncio workers"""
+
+    def __init__(self, store, workers: int = 5, max_size: int = 100,
+                 result_ttl: int = 3600, job_timeout: float = 300.0):
+        """Initialize job queue"""
+        self.store = store
+        self.workers = workers
+        self.max_size = max_size
+        self.result_ttl = result_ttl
+        self.job_timeout = job_timeout
+        self._handlers: Dict[str, JobHandler] = {}
+        self._listeners: List[JobListener] = []
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that processes a job kind"""
+        self._handlers[kind] = handler
+
+    def add_listener(self, listener: JobListener):
+        """Register a coroutine called with (job, event, data) on every state change"""
+        self._listeners.append(listener)
+
+    async def _emit(self, job: Job, event: str, data: Any = None):
+        """Notify listeners; a failing listener never fails the job"""
+        for listener in self._listeners:
+            try:
+                await listener(job, event, data)
+            except Exception as e:
+                logger.warning("jobs.listener_failed", job_id=job.id, event=event, error=str(e))
+
+    async def report_progress(self, data: Any):
+        """Publish a partial result for the job running in the current task"""
+        job = _current_job.get()
+        if job is not None:
+            await self._emit(job, "partial", data)
+
+    def record_timings(self, timings: Dict[str, float]):
+        """Attach phase timings to the job running in the current task"""
+        job = _current_job.get()
+        if job is not None and job.started_at is not None:
+            queued_ms = (job.started_at - job.created_at).total_seconds() * 1000
+            job.timings = {"queue": round(queued_ms, 2), **timings}
+
+    async def start(self):
+        """Start worker tasks"""
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        """Cancel worker tasks and release the store"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.store.close()
+
+    async def submit(self, kind: str, payload: Dict[str, Any], priority: int = JobPriority.NORMAL,
+                     user_id: Optional[str] = None) -> Job:
+        """Enqueue a job and return its initial state without waiting for it"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not started")
+
+        if self._queue.full():
+            raise QueueFullError(f"Job queue is full ({self.max_size} jobs pending)")
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, priority=priority, user_id=user_id)
+        # Saved before a worker can see it, so QUEUED never overwrites RUNNING
+        await self.store.save(job, self.result_ttl)
+        try:
+            self._queue.put_nowait((priority, next(self._sequence), job, payload))
+        except asyncio.QueueFull:
+            # Filled up by another submit while the state was being saved
+            job.status = JobStatus.FAILED
+            job.error = "Job queue is full"
+            job.finished_at = datetime.now()
+            await self.store.save(job, self.result_ttl)
+            raise QueueFullError(f"Job queue is full ({self.max_size} jobs pending)")
+
+        await self._emit(job, "queued")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Get current job state"""
+        return await self.store.get(job_id)
+
+    def pending(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize() if self._queue else 0
+
+    async def _worker(self, worker_id: int):
+        """Process jobs until cancelled"""
+        while True:
+            _, _, job, payload = await self._queue.get()
+            try:
+                await self._run(job, payload)
+            except Exception as e:
+                logger.error("jobs.record_failed", worker=worker_id, job_id=job.id, error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job, payload: Dict[str, Any]):
+        """Run a single job and store its outcome"""
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.now()
+        await self.store.save(job, self.result_ttl)
+        await self._emit(job, "started")
+
+        _current_job.set(job)
+        try:
+            job.result = await asyncio.wait_for(self._handlers[job.kind](payload), self.job_timeout)
+            job.status = JobStatus.COMPLETED
+        except asyncio.TimeoutError:
+            job.status = JobStatus.FAILED
+            job.error = f"Job timed out after {self.job_timeout:.0f}s"
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        finally:
+            _current_job.set(None)
+
+        job.finished_at = datetime.now()
+        await self.store.save(job, self.result_ttl)
+        await self._emit(job, job.status, job.result if job.status == JobStatus.COMPLETED else job.error)
+
+
+def create_job_store(backend: str = "memory", redis_url: Optional[str] = None):
+    """Create job store for the configured backend"""
+    if backend == "redis":
+        if REDIS_AVAILABLE and redis_url:
+            return RedisJobStore(redis_url)
+        logger.warning("jobs.redis_unavailable", fallback="memory")
+    return InMemoryJobStore()
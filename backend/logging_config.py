@@ -0,0 +1,155 @@
+"""
+Logging for RED AI
+Structured logging through structlog with rendering and I/O moved off the event loop
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import structlog
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Per-module levels from `azure_openai_service=WARNING,uvicorn.access=ERROR`"""
+    levels = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, level = part.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Per-level sampling rates from `debug=0.01,info=1`"""
+    return {level.lower(): float(rate) for level, rate in parse_levels(spec).items()}
+
+
+class EventSampler:
+    """Drops a fraction of events by level; a call can override its rate with sample=0.1"""
+
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = rates
+
+    def __call__(self, logger, method_name: str, event_dict):
+        rate = event_dict.pop("sample", None)
+        if rate is None:
+            rate = self.rates.get(method_name, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            raise structlog.DropEvent
+        return event_dict
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread as they are; drops them instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Rendering happens on the listener thread; the record never leaves the process
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class FilteringBoundLogger(structlog.stdlib.BoundLogger):
+    """Returns before building the event when the level is disabled, so filtered debug calls cost a level check"""
+
+    def debug(self, event=None, *args, **kw):
+        if self._logger.isEnabledFor(logging.DEBUG):
+            return super().debug(event, *args, **kw)
+
+    def info(self, event=None, *args, **kw):
+        if self._logger.isEnabledFor(logging.INFO):
+            return super().info(event, *args, **kw)
+
+
+class _Listener(logging.handlers.QueueListener):
+    """Queue listener whose stop waits for room in a full queue instead of failing"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def _add_timestamp(logger, method_name: str, event_dict):
+    """ISO timestamp taken from the record creation time, not from when the listener renders it"""
+    record = event_dict.get("_record")
+    created = record.created if record is not None else datetime.now(timezone.utc).timestamp()
+    event_dict["timestamp"] = datetime.fromtimestamp(created, timezone.utc).isoformat(timespec="milliseconds")
+    return event_dict
+
+
+def configure_logging(level: str = "INFO", fmt: str = "console", module_levels: str = "",
+                      sample_rates: str = "", queue_size: int = 10000, stream=None) -> NonBlockingQueueHandler:
+    """Route structlog and stdlib logging through a queue drained by a background thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    renderer = structlog.processors.JSONRenderer(ensure_ascii=False) if fmt == "json" \
+        else structlog.dev.ConsoleRenderer(colors=False)
+    # Runs on the listener thread: timestamps, exception formatting and rendering
+    formatter = structlog.stdlib.ProcessorFormatter(
+        processors=[
+            _add_timestamp,
+            structlog.processors.format_exc_info,
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            renderer,
+        ],
+        foreign_pre_chain=[structlog.stdlib.add_log_level, structlog.stdlib.add_logger_name],
+    )
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level.upper())
+    for name, module_level in parse_levels(module_levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    # Runs on the calling thread: only sampling and the queue put; disabled levels return in the wrapper
+    structlog.configure(
+        processors=[
+            EventSampler(parse_sample_rates(sample_rates)),
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=FilteringBoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+    _listener = _Listener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    return handler
+
+
+def shutdown_logging():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str):
+    """Structured logger for a module"""
+    return structlog.get_logger(name)
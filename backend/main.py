@@ -4,38 +4,61 @@ Interactive dashboard for AI-powered interior design assistant
 """
 
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Literal, Type
 from datetime import datetime, timedelta
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, BackgroundTasks, Header, Query, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, FileResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 import base64
-import json
-import uvicorn
+import hmac
 from pathlib import Path
 
-# Import our services
-from ai_service import AIService
-from azure_openai_service import create_azure_openai_service  # Import the new service and missing function
-from dotenv import load_dotenv
 import sys
-import os
-
-# Load environment variables from multiple locations
-load_dotenv()  # Load from current directory
-load_dotenv("backend/dotenv/.env")  # Load from backend dotenv directory  
-load_dotenv(".env.local")  # Load from local override file
+import signal
+import asyncio
+from contextlib import asynccontextmanager
 
 # Add the backend directory to sys.path for local imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Import settings from the custom config module
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), 'dotenv'))
-from config import settings
+# Settings load the .env files, so they are imported before any service reads the environment
+from config import on_reload, reload_settings, settings
+from logging_config import configure_logging, get_logger
+
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_LEVELS,
+                  settings.LOG_SAMPLE_RATES, settings.LOG_QUEUE_SIZE)
+logger = get_logger(__name__)
+
+# Import our services (Azure clients are created lazily through the client registry)
+from clients import clients
+from ai_service import AIService
+from azure_openai_service import create_azure_openai_service
+from thumbnail_service import (
+    create_thumbnail_service, nearest_placeholder_size, MAX_PLACEHOLDER_SIDE, MEDIA_TYPES, PLACEHOLDER_SIZES,
+    THUMBNAIL_SIZES
+)
+from job_queue import Job, JobQueue, JobPriority, JobStatus, QueueFullError, create_job_store
+from realtime import EventHub, Connection, create_pubsub
+from dashboard_store import counter_key, create_dashboard_store
+from traffic_capture import TrafficCaptureMiddleware, create_traffic_recorder
+from profiler import RequestProfileMiddleware, create_debug_router
+from tracing import TracingMiddleware, create_tracer, current_trace, server_timing, span
+from compression import CompressionMiddleware
+from response_cache import ResponseCache, ResponseCacheMiddleware, encode_json
+from batch import BatchDispatcher, create_batch_router
+from client_search import TOP_K, ClientSearch, IndexNotReadyError
+from analytics import AnalyticsRollups, create_analytics_router
+from readiness import ReadinessChecker, create_health_router, http_check, redis_check, sql_check
+
+# Shared middleware lives in src/backend/core
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+from core.rate_limit import RateLimit, RateLimitMiddleware, create_rate_limiter
+from core.loop_monitor import LoopMonitor
+from core.exceptions import AuthenticationError, AuthorizationError, RedAIException
+from core.identity import authenticated_user, client_ip, parse_networks
+from usage_ledger import UsageLedger, usage_context
 
 # ==================== MODELS ====================
 
@@ -50,6 +73,19 @@ class DailyTask(BaseModel):
     due_date: Optional[datetime] = None
     category: str = "general"  # general, design, client, analysis
 
+TASK_PRIORITIES = ("low", "medium", "high", "urgent")
+
+class TaskBulkOperation(BaseModel):
+    """One action applied to several tasks"""
+    action: Literal["complete", "delete", "reprioritize", "reschedule"]
+    ids: List[str] = Field(..., min_length=1)
+    priority: Optional[str] = None  # reprioritize
+    due_date: Optional[datetime] = None  # reschedule; null clears the due date
+
+class TaskBulkRequest(BaseModel):
+    """Operations applied together: either all of them or, if one is invalid, none"""
+    operations: List[TaskBulkOperation] = Field(..., min_length=1)
+
 class FavoriteClient(BaseModel):
     """Favorite client model"""
     id: str
@@ -61,6 +97,7 @@ class FavoriteClient(BaseModel):
     last_contact: Optional[datetime] = None
     avatar_url: Optional[str] = None
     tags: List[str] = []
+    is_favorite: bool = True
 
 class DesignPreview(BaseModel):
     """Design preview model for gallery"""
@@ -68,12 +105,16 @@ class DesignPreview(BaseModel):
     title: str
     description: str
     image_url: str
+    thumbnail_url: Optional[str] = None
     style: str
     room_type: str
     created_at: datetime = Field(default_factory=datetime.now)
     is_favorite: bool = False
     client_id: Optional[str] = None
     tags: List[str] = []
+    status: str = "active"  # active, completed
+
+DESIGN_STATUSES = ("active", "completed")
 
 class InteractionHistory(BaseModel):
     """Client interaction history"""
@@ -86,13 +127,20 @@ class InteractionHistory(BaseModel):
     outcome: Optional[str] = None
     next_action: Optional[str] = None
 
+class ClientTimeline(BaseModel):
+    """Interactions of one client, newest first, with the latest one that set a next action"""
+    client_id: str
+    interactions: List[InteractionHistory]
+    next_action: Optional[InteractionHistory] = None
+
 class DashboardStats(BaseModel):
     """Dashboard statistics model"""
-    total_projects: int
-    active_projects: int
-    completed_projects: int
+    # Projects are kept by the Next.js app; the backend's record of a project is its gallery design
+    total_projects: int = Field(..., description="Stored designs")
+    active_projects: int = Field(..., description="Designs not completed")
+    completed_projects: int = Field(..., description="Designs with status completed")
     total_clients: int
-    favorite_clients: int
+    favorite_clients: int = Field(..., description="Clients with is_favorite set")
     designs_generated: int
     tasks_completed: int
     monthly_revenue: float
@@ -120,6 +168,10 @@ class ChatRequest(BaseModel):
     context: Optional[Dict] = None
     conversation_id: Optional[str] = None
 
+class PlanAssignment(BaseModel):
+    """Plan of a user, set by billing"""
+    plan: str = Field(..., pattern="^(free|pro|studio|admin)$")
+
 class AzureImageGenerationRequest(BaseModel):
     """Azure DALL-E image generation request"""
     prompt: str
@@ -134,7 +186,7 @@ class DalleRequest(BaseModel):
 
 # ==================== MOCK DATA ====================
 
-# Mock data for demonstration
+# Mock data for demonstration, loaded into the dashboard store the first time it starts
 mock_tasks = [
     DailyTask(
         id="1",
@@ -233,14 +285,99 @@ mock_interactions = [
 
 # ==================== FASTAPI APP ====================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services; Azure clients and their connection pool are built off the event loop
+    once traffic is accepted and closed on shutdown"""
+    if loop_monitor is not None:
+        await loop_monitor.start()
+    await dashboard_store.start()
+    for collection, items in DASHBOARD_SEED.items():
+        await dashboard_store.seed(collection, [item.model_dump(mode="json") for item in items])
+    await client_search.start()
+    await usage_ledger.start()
+    await analytics.start()
+    await event_hub.start()
+    await job_queue.start()
+    await readiness.start()
+    if traffic_recorder is not None:
+        await traffic_recorder.start()
+    loop = asyncio.get_running_loop()
+    try:
+        # `kill -HUP <worker pid>` re-reads the .env files without a restart
+        loop.add_signal_handler(signal.SIGHUP, reload_settings)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        # No SIGHUP on Windows, and signal handlers need the main thread (not so under TestClient)
+        pass
+    warmups = [
+        loop.run_in_executor(None, thumbnail_service.warm_placeholders),
+        asyncio.ensure_future(clients.aget("ai_service")),
+    ]
+    try:
+        yield
+    finally:
+        await asyncio.gather(*warmups, return_exceptions=True)
+        if traffic_recorder is not None:
+            await traffic_recorder.stop()
+        await readiness.stop()
+        await job_queue.stop()
+        await event_hub.stop()
+        await analytics.stop()
+        await usage_ledger.stop()
+        await client_search.stop()
+        await dashboard_store.close()
+        thumbnail_service.shutdown()
+        if rate_limiter is not None:
+            await rate_limiter.close()
+        await clients.aclose()
+        tracer.shutdown()
+        if loop_monitor is not None:
+            await loop_monitor.stop()
+
 app = FastAPI(
     title="RED AI - Interior Design Assistant API",
     description="Backend API for AI-powered interior design dashboard",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+# Catalog bodies are encoded once and served from memory until settings are reloaded
+# (innermost, so CORS, tracing and rate limiting still apply to cached responses)
+response_cache = ResponseCache()
+on_reload(response_cache.invalidate)
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+
+# Response compression (inside tracing and CORS, so their headers are untouched)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        offload_size=settings.COMPRESSION_OFFLOAD_SIZE,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL
+    )
+
+# Event loop lag and blocking-call detection
+loop_monitor = None
+if settings.LOOP_MONITOR_ENABLED:
+    loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_BLOCK_THRESHOLD)
+
+# Rate limiting (added before CORS so 429 responses still carry CORS headers)
+rate_limiter = None
+if settings.RATE_LIMIT_ENABLED:
+    rate_limiter = create_rate_limiter(settings.RATE_LIMIT_BACKEND, settings.REDIS_URL)
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=rate_limiter,
+        default_limit=RateLimit(settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_PERIOD),
+        route_limits=[("/api/ai/", RateLimit(settings.RATE_LIMIT_AI_REQUESTS, settings.RATE_LIMIT_PERIOD))],
+        trust_forwarded=bool(settings.TRUSTED_PROXIES),
+        trusted_proxies=settings.TRUSTED_PROXIES,
+        user_token_secret=settings.USER_TOKEN_SECRET
+    )
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -252,50 +389,264 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], 
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Initialize AI service with error handling
-try:
-    ai_service = AIService()
-    print("✅ AI Service initialized successfully")
-except Exception as e:
-    print(f"⚠️  AI Service initialization failed: {e}")
-    print("   Some features may not be available until Azure OpenAI is configured")
-    ai_service = None
-
-# Initialize Azure OpenAI service for additional functionality
-try:
-    azure_service = create_azure_openai_service()
-    print("✅ Azure OpenAI service initialized")
-except Exception as e:
-    print(f"⚠️  Azure OpenAI service initialization failed: {e}")
-    azure_service = None
+# Request tracing: Server-Timing phases for devtools, spans to OpenTelemetry when TRACING_EXPORTER=otlp
+tracer = create_tracer(settings.TRACING_EXPORTER, settings.TRACING_SERVICE_NAME, settings.TRACING_SAMPLE_RATE)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, tracer=tracer, server_timing=settings.SERVER_TIMING_ENABLED)
+
+# Admin-only profiling of live workers (nothing is installed while DEBUG_ADMIN_TOKEN is empty)
+if settings.DEBUG_ADMIN_TOKEN:
+    app.include_router(create_debug_router(
+        settings.DEBUG_ADMIN_TOKEN,
+        max_seconds=settings.DEBUG_PROFILE_MAX_SECONDS,
+        default_rate=settings.DEBUG_PROFILE_RATE
+    ))
+    app.add_middleware(RequestProfileMiddleware, admin_token=settings.DEBUG_ADMIN_TOKEN)
+
+# Opt-in traffic capture for benchmarks/replay.py (outermost, so it sees every request as it arrived)
+traffic_recorder = None
+if settings.TRAFFIC_CAPTURE_ENABLED:
+    traffic_recorder = create_traffic_recorder(
+        settings.TRAFFIC_CAPTURE_DIR,
+        sample_rate=settings.TRAFFIC_CAPTURE_SAMPLE_RATE,
+        max_body=settings.TRAFFIC_CAPTURE_MAX_BODY
+    )
+    app.add_middleware(TrafficCaptureMiddleware, recorder=traffic_recorder)
+
+# Dashboard state shared by all workers (DASHBOARD_STORE=sql or redis for more than one)
+dashboard_store = create_dashboard_store(settings.DASHBOARD_STORE, settings.DATABASE_URL, settings.REDIS_URL)
+# Client autocomplete index over the stored clients; workers share its segment files through
+# CLIENT_SEARCH_DIR and their writes on a change feed
+client_search = ClientSearch(
+    dashboard_store,
+    feed=create_pubsub(settings.EVENTS_BACKEND, settings.REDIS_URL, channel="redai:client-search"),
+    directory=settings.CLIENT_SEARCH_DIR or None,
+    max_changes=settings.CLIENT_SEARCH_MAX_CHANGES
+)
+
+DASHBOARD_SEED = {
+    "tasks": mock_tasks,
+    "clients": mock_clients,
+    "designs": mock_designs,
+    "interactions": mock_interactions
+}
+
+# Upper bound for ?limit= on dashboard lists; without a limit the whole collection is returned
+MAX_PAGE_SIZE = 500
 
 # Image generation services (DALL-E removed, using BFL)
 # dalle_service = create_azure_dalle_service()  # Removed - module not available
 
+# Thumbnail pipeline for the design gallery
+thumbnail_service = create_thumbnail_service(
+    images_dir=settings.GENERATED_IMAGES_DIR,
+    cache_dir=settings.THUMBNAIL_CACHE_DIR,
+    max_workers=settings.THUMBNAIL_WORKERS
+)
+
+# Token usage ledger and per-plan quotas
+usage_ledger = UsageLedger(
+    database_url=settings.DATABASE_URL,
+    flush_interval=settings.USAGE_FLUSH_INTERVAL,
+    default_plan=settings.USAGE_DEFAULT_PLAN,
+    totals_ttl=settings.USAGE_TOTALS_TTL,
+    admin_users=settings.USAGE_ADMIN_USERS
+)
+
+# Requests name their user with a signed token or through a trusted proxy, never by a plain header
+trusted_proxies = parse_networks(settings.TRUSTED_PROXIES)
+
+def current_user(request: Request) -> Optional[str]:
+    """Authenticated user of a request, None for anonymous requests"""
+    return authenticated_user(request.scope, trusted_proxies, settings.USER_TOKEN_SECRET)
+
+def quota_key(request: Request, user_id: Optional[str] = Depends(current_user)) -> str:
+    """Quota bucket of a request: the authenticated user, otherwise the client IP"""
+    return user_id or "ip:" + client_ip(request.scope, trusted_proxies)
+
+# Business events rolled up into time buckets for the dashboard's revenue and growth figures
+analytics = AnalyticsRollups(
+    database_url=settings.DATABASE_URL,
+    interval=settings.ANALYTICS_ROLLUP_INTERVAL,
+    batch_size=settings.ANALYTICS_ROLLUP_BATCH_SIZE
+)
+app.include_router(create_analytics_router(analytics, settings.ANALYTICS_INGEST_TOKEN))
+
+def record_token_usage(prompt_tokens: int, completion_tokens: int):
+    """Charge the current user's quota and add the tokens to the usage rollups"""
+    usage_ledger.record_current(prompt_tokens, completion_tokens)
+    analytics.record("tokens", prompt_tokens + completion_tokens)
+
+def create_metered_azure_service():
+    """Shared Azure OpenAI service that reports token usage to the ledger"""
+    service = create_azure_openai_service()
+    service.usage_callback = record_token_usage
+    return service
+
+clients.register("azure_openai", create_metered_azure_service)
+
+async def get_ai_service() -> AIService:
+    """Shared AI service; 503 if it cannot be created"""
+    try:
+        return await clients.aget("ai_service")
+    except Exception as e:
+        logger.error("ai_service.init_failed", error=str(e))
+        raise HTTPException(status_code=503, detail="AI service is not available")
+
+@app.exception_handler(RedAIException)
+async def redai_exception_handler(request: Request, exc: RedAIException):
+    """Return application errors such as QuotaExceededError with their status code"""
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=exc.headers)
+
+# Job queue for long-running AI generation
+job_queue = JobQueue(
+    store=create_job_store(settings.JOB_STORE, settings.REDIS_URL),
+    workers=settings.MAX_CONCURRENT_TASKS,
+    max_size=settings.JOB_QUEUE_SIZE,
+    result_ttl=settings.JOB_RESULT_TTL,
+    job_timeout=settings.JOB_TIMEOUT
+)
+
+# WebSocket push channel for job and image generation events
+event_hub = EventHub(
+    pubsub=create_pubsub(settings.EVENTS_BACKEND, settings.REDIS_URL),
+    max_connections=settings.WS_MAX_CONNECTIONS,
+    idle_timeout=settings.WS_IDLE_TIMEOUT,
+    send_queue_size=settings.WS_SEND_QUEUE_SIZE,
+    max_subscriptions=settings.WS_MAX_SUBSCRIPTIONS
+)
+
+async def publish_job_event(job: Job, event: str, data: Any):
+    """Push job state changes to the job topic and its owner"""
+    await event_hub.publish(f"job:{job.id}", event, {"job_id": job.id, "kind": job.kind, "result": data})
+    if job.user_id:
+        await event_hub.publish(f"user:{job.user_id}", event, {"job_id": job.id, "kind": job.kind, "result": data})
+
+job_queue.add_listener(publish_job_event)
+
+async def count_generated_design(job: Job, event: str, data: Any):
+    """Count completed design generations for the dashboard statistics"""
+    if job.kind == "generate-design" and event == JobStatus.COMPLETED:
+        await dashboard_store.increment("ai", "designs_generated")
+        analytics.record("design_generated")
+
+job_queue.add_listener(count_generated_design)
+
+# Readiness checks run in the background; /readyz and /health only read the cached results
+readiness = ReadinessChecker(settings.READINESS_INTERVAL, settings.READINESS_TIMEOUT, settings.READINESS_TTL)
+readiness.add("database", sql_check(usage_ledger.engine))
+if "redis" in (settings.DASHBOARD_STORE, settings.JOB_STORE, settings.EVENTS_BACKEND, settings.RATE_LIMIT_BACKEND):
+    readiness.add("cache", redis_check(settings.REDIS_URL))
+if settings.AZURE_OPENAI_ENDPOINT.startswith("https://"):
+    # An Azure outage degrades AI features but the dashboard keeps working, so it does not fail readiness
+    readiness.add("azure_openai", http_check(settings.AZURE_OPENAI_ENDPOINT), critical=False)
+app.include_router(create_health_router(readiness))
+
+# One round trip for the dashboard's initial fan-out of list, stats and suggestion requests
+app.include_router(create_batch_router(BatchDispatcher(
+    app,
+    max_requests=settings.BATCH_MAX_REQUESTS,
+    max_response_bytes=settings.BATCH_MAX_RESPONSE_BYTES,
+    timeout=settings.BATCH_TIMEOUT
+)))
+
 # ==================== UTILITY FUNCTIONS ====================
 
-def get_dashboard_stats() -> DashboardStats:
-    """Generate dashboard statistics"""
+async def collection_etag(collection: str) -> str:
+    """Strong ETag of a dashboard collection; read before the items so a concurrent write never gets a stale tag"""
+    return f'"{collection}-{dashboard_store.epoch}-{await dashboard_store.version(collection)}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check with weak comparison, so tags of compressed responses (W/"...") match too"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """Validators for polled lists: browsers revalidate on every request instead of reusing the cached copy"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[List[str]]:
+    """Sparse fieldset from ?fields=a,b (id is always included); None returns whole items"""
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [name for name in dict.fromkeys(requested) if name != "id"]
+
+def parse_cursor(cursor: Optional[str]) -> int:
+    """Sequence number from an X-Next-Cursor value; no cursor starts at the beginning"""
+    if cursor is None:
+        return 0
+    if not cursor.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return int(cursor)
+
+async def list_page(collection: str, request: Request, model: Type[BaseModel], limit: Optional[int],
+                    cursor: Optional[str], fields: Optional[str], filters: Optional[Dict[str, Any]] = None,
+                    transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> Response:
+    """One page of a dashboard collection, filtered through the store's indexes.
+
+    Items are stored already validated, so they are encoded directly instead of through the
+    response model. The ETag is the collection version (304 when the client's copy is current);
+    X-Next-Cursor is set when more items follow.
+    """
+    projection = parse_fields(fields, model)
+    after = parse_cursor(cursor)
+    etag = await collection_etag(collection)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    filters = {field: value for field, value in (filters or {}).items() if value is not None}
+    items, next_cursor = await dashboard_store.page(collection, limit, after, filters)
+    if transform is not None:
+        items = [transform(item) for item in items]
+    if projection is not None:
+        items = [{name: item.get(name) for name in projection} for item in items]
+    headers = etag_headers(etag)
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    return Response(content=encode_json(items), media_type="application/json", headers=headers)
+
+async def get_dashboard_stats() -> DashboardStats:
+    """Dashboard statistics from the store's counters, which every write keeps current"""
+    tasks, clients_count, designs, ai = await asyncio.gather(
+        *(dashboard_store.counts(collection) for collection in ("tasks", "clients", "designs", "ai"))
+    )
     return DashboardStats(
-        total_projects=len(mock_designs) + 15,
-        active_projects=8,
-        completed_projects=12,
-        total_clients=len(mock_clients) + 25,
-        favorite_clients=len(mock_clients),
-        designs_generated=len(mock_designs) + 45,
-        tasks_completed=sum(1 for task in mock_tasks if task.completed),
-        monthly_revenue=45750.00,
-        weekly_growth=12.5
+        total_projects=designs.get("total", 0),
+        # Designs stored before they had a status count as active
+        active_projects=designs.get("total", 0) - designs.get(counter_key("status", "completed"), 0),
+        completed_projects=designs.get(counter_key("status", "completed"), 0),
+        total_clients=clients_count.get("total", 0),
+        # Clients stored before the flag existed were all favorites
+        favorite_clients=clients_count.get("total", 0) - clients_count.get(counter_key("is_favorite", False), 0),
+        designs_generated=ai.get("designs_generated", 0),
+        tasks_completed=tasks.get(counter_key("completed", True), 0),
+        # Payment rollups as of the last refresh
+        **analytics.summary()
     )
 
+def with_thumbnail(design: Dict[str, Any], size: str = "medium") -> Dict[str, Any]:
+    """Attach the gallery thumbnail URL to a stored design preview"""
+    return {**design, "thumbnail_url": f"/api/thumbnails/{design['id']}/{size}"}
+
 # ==================== HEALTH CHECK ====================
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    azure_info = azure_service.get_service_info()
+    # Do not force client creation: report it as unconfigured until the lazy warm-up finishes
+    azure_service = clients.peek("azure_openai")
+    azure_info = azure_service.get_service_info() if azure_service is not None else {}
+    http_pool = clients.peek("http_pool")
     # dalle_info = dalle_service.get_service_info()  # Removed - module not available
     
     return {
@@ -313,152 +664,481 @@ async def health_check():
                 "api_version": azure_info.get("api_version", "")
             }
             # Removed DALL-E 3 service info - module not available
-        }
+        },
+        "readiness": readiness.snapshot()[1],
+        "http_pools": http_pool.stats() if http_pool is not None else {},
+        "event_loop": loop_monitor.stats() if loop_monitor is not None else {}
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Event loop lag histogram and blocking-call counters in Prometheus text format"""
+    body = loop_monitor.prometheus() if loop_monitor is not None else ""
+    return Response(content=body, media_type="text/plain; version=0.0.4")
+
 # ==================== DASHBOARD ENDPOINTS ====================
 
 @app.get("/api/dashboard/stats", response_model=DashboardStats)
 async def get_stats():
     """Get dashboard statistics"""
-    return get_dashboard_stats()
+    return await get_dashboard_stats()
 
 @app.get("/api/dashboard/tasks", response_model=List[DailyTask])
-async def get_tasks():
-    """Get daily tasks"""
-    return mock_tasks
+async def get_tasks(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+    completed: Optional[bool] = None
+):
+    """Get daily tasks, paged with limit/cursor (304 when If-None-Match has the current ETag)"""
+    filters = {"category": category, "priority": priority, "completed": completed}
+    return await list_page("tasks", request, DailyTask, limit, cursor, fields, filters)
 
 @app.post("/api/dashboard/tasks", response_model=DailyTask)
 async def create_task(task: DailyTask):
     """Create a new daily task"""
-    task.id = str(len(mock_tasks) + 1)
     task.created_at = datetime.now()
-    mock_tasks.append(task)
-    return task
+    return await dashboard_store.create("tasks", task.model_dump(mode="json"))
+
+def task_modifier(operation: TaskBulkOperation) -> Optional[Callable[[Dict[str, Any]], None]]:
+    """Store modifier for a bulk operation; None deletes"""
+    if operation.action == "complete":
+        return lambda task: task.update(completed=True)
+    if operation.action == "reprioritize":
+        return lambda task: task.update(priority=operation.priority)
+    if operation.action == "reschedule":
+        due_date = operation.model_dump(mode="json")["due_date"]
+        return lambda task: task.update(due_date=due_date)
+    return None
+
+@app.post("/api/dashboard/tasks:bulk")
+async def bulk_update_tasks(payload: TaskBulkRequest):
+    """Complete, delete, reprioritize or reschedule many tasks in one store write and version bump;
+    400 (and no change) if any operation is invalid, otherwise a result per id (404 for unknown ids)"""
+    changes: Dict[str, Optional[Callable[[Dict[str, Any]], None]]] = {}
+    actions: Dict[str, str] = {}
+    for operation in payload.operations:
+        if operation.action == "reprioritize" and operation.priority not in TASK_PRIORITIES:
+            raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(TASK_PRIORITIES)}")
+        if operation.action == "reschedule" and "due_date" not in operation.model_fields_set:
+            raise HTTPException(status_code=400, detail="reschedule needs a due_date")
+        modifier = task_modifier(operation)
+        for task_id in operation.ids:
+            if task_id in changes:
+                raise HTTPException(status_code=400, detail=f"Task {task_id} appears in more than one operation")
+            changes[task_id], actions[task_id] = modifier, operation.action
+    if len(changes) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"A bulk request changes at most {MAX_PAGE_SIZE} tasks")
+
+    results = await dashboard_store.modify_many("tasks", changes)
+    return {"results": [
+        {"id": task_id, "action": actions[task_id], "status": 200 if task is not None else 404, "task": task}
+        for task_id, task in results.items()
+    ]}
 
 @app.put("/api/dashboard/tasks/{task_id}", response_model=DailyTask)
 async def update_task(task_id: str, task_update: DailyTask):
     """Update a daily task"""
-    for i, task in enumerate(mock_tasks):
-        if task.id == task_id:
-            task_update.id = task_id
-            mock_tasks[i] = task_update
-            return task_update
-    raise HTTPException(status_code=404, detail="Task not found")
+    task = await dashboard_store.replace("tasks", task_id, task_update.model_dump(mode="json"))
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
 
 @app.delete("/api/dashboard/tasks/{task_id}")
 async def delete_task(task_id: str):
     """Delete a daily task"""
-    for i, task in enumerate(mock_tasks):
-        if task.id == task_id:
-            deleted_task = mock_tasks.pop(i)
-            return {"message": "Task deleted successfully", "task": deleted_task}
-    raise HTTPException(status_code=404, detail="Task not found")
+    deleted_task = await dashboard_store.delete("tasks", task_id)
+    if deleted_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return {"message": "Task deleted successfully", "task": deleted_task}
 
 # ==================== CLIENT MANAGEMENT ====================
 
 @app.get("/api/dashboard/clients", response_model=List[FavoriteClient])
-async def get_favorite_clients():
-    """Get favorite clients"""
-    return mock_clients
+async def get_favorite_clients(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    is_favorite: Optional[bool] = None
+):
+    """Get favorite clients, paged with limit/cursor (304 when If-None-Match has the current ETag)"""
+    return await list_page("clients", request, FavoriteClient, limit, cursor, fields, {"is_favorite": is_favorite})
+
+@app.get("/api/dashboard/clients/search", response_model=List[FavoriteClient])
+async def search_clients(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=TOP_K)
+):
+    """Autocomplete clients by name, email, company or tag, ignoring case and diacritics; word prefixes
+    match first, then text inside words, each ranked by projects_count and last_contact (503 while the
+    worker builds its first index)"""
+    try:
+        results = await client_search.search_encoded(q, limit)
+    except IndexNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return Response(content=b"[" + b",".join(results) + b"]", media_type="application/json")
 
 @app.post("/api/dashboard/clients", response_model=FavoriteClient)
 async def add_favorite_client(client: FavoriteClient):
     """Add a favorite client"""
-    client.id = str(len(mock_clients) + 1)
-    mock_clients.append(client)
-    return client
+    created = await dashboard_store.create("clients", client.model_dump(mode="json"))
+    await client_search.write(created["id"], created)
+    return created
 
 @app.delete("/api/dashboard/clients/{client_id}")
 async def remove_favorite_client(client_id: str):
     """Remove a favorite client"""
-    for i, client in enumerate(mock_clients):
-        if client.id == client_id:
-            deleted_client = mock_clients.pop(i)
-            return {"message": "Client removed successfully", "client": deleted_client}
-    raise HTTPException(status_code=404, detail="Client not found")
+    deleted_client = await dashboard_store.delete("clients", client_id)
+    if deleted_client is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    await client_search.write(client_id, None)
+    return {"message": "Client removed successfully", "client": deleted_client}
+
+@app.post("/api/dashboard/clients/{client_id}/favorite")
+async def toggle_client_favorite(client_id: str):
+    """Toggle favorite status of a client"""
+    def toggle(client: Dict[str, Any]):
+        client["is_favorite"] = not client.get("is_favorite", True)
+
+    client = await dashboard_store.modify("clients", client_id, toggle)
+    if client is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    await client_search.write(client_id, client)
+    return {"message": "Favorite status updated", "is_favorite": client["is_favorite"]}
 
 # ==================== DESIGN GALLERY ====================
 
 @app.get("/api/dashboard/designs", response_model=List[DesignPreview])
-async def get_design_previews():
-    """Get design preview gallery"""
-    return mock_designs
+async def get_design_previews(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    style: Optional[str] = None,
+    room_type: Optional[str] = None,
+    is_favorite: Optional[bool] = None,
+    status: Optional[str] = None
+):
+    """Get design preview gallery, paged with limit/cursor (304 when If-None-Match has the current ETag)"""
+    filters = {"style": style, "room_type": room_type, "is_favorite": is_favorite, "status": status}
+    return await list_page("designs", request, DesignPreview, limit, cursor, fields, filters, with_thumbnail)
 
 @app.post("/api/dashboard/designs/{design_id}/favorite")
 async def toggle_design_favorite(design_id: str):
     """Toggle favorite status of a design"""
-    for design in mock_designs:
-        if design.id == design_id:
-            design.is_favorite = not design.is_favorite
-            return {"message": "Favorite status updated", "is_favorite": design.is_favorite}
-    raise HTTPException(status_code=404, detail="Design not found")
+    def toggle(design: Dict[str, Any]):
+        design["is_favorite"] = not design["is_favorite"]
 
-@app.get("/api/dashboard/interactions", response_model=List[InteractionHistory])
-async def get_interaction_history():
-    """Get client interaction history"""
-    return mock_interactions
+    design = await dashboard_store.modify("designs", design_id, toggle)
+    if design is None:
+        raise HTTPException(status_code=404, detail="Design not found")
+    return {"message": "Favorite status updated", "is_favorite": design["is_favorite"]}
 
-# ==================== AI SERVICES ====================
+@app.post("/api/dashboard/designs/{design_id}/status")
+async def set_design_status(design_id: str, status: str = Query(...)):
+    """Mark a design (project) active or completed"""
+    if status not in DESIGN_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(DESIGN_STATUSES)}")
 
-@app.post("/api/ai/analyze-floor-plan")
-async def analyze_floor_plan(request: FloorPlanAnalysisRequest):
-    """Analyze floor plan with AI"""
+    def update(design: Dict[str, Any]):
+        design["status"] = status
+
+    design = await dashboard_store.modify("designs", design_id, update)
+    if design is None:
+        raise HTTPException(status_code=404, detail="Design not found")
+    return {"message": "Design status updated", "status": design["status"]}
+
+# ==================== THUMBNAILS ====================
+
+@app.get("/api/placeholder/{width}/{height}")
+async def get_placeholder(width: int, height: int, accept: Optional[str] = Header(None)):
+    """Serve a placeholder tile from the precomputed cache; other sizes redirect to the nearest
+    precomputed one, so a request never renders an arbitrary size"""
+    if not (0 < width <= MAX_PLACEHOLDER_SIDE and 0 < height <= MAX_PLACEHOLDER_SIDE):
+        raise HTTPException(status_code=400, detail=f"Placeholder size out of range: {width}x{height}")
+    if (width, height) not in PLACEHOLDER_SIZES:
+        nearest_width, nearest_height = nearest_placeholder_size(width, height)
+        return RedirectResponse(url=f"/api/placeholder/{nearest_width}/{nearest_height}", status_code=301,
+                                headers={"Cache-Control": "public, max-age=86400"})
+    fmt = thumbnail_service.negotiate_format(accept)
+    data = await thumbnail_service.get_placeholder(width, height, fmt)
+    return Response(
+        content=data,
+        media_type=MEDIA_TYPES["webp" if fmt == "avif" else fmt],
+        headers={"Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept"}
+    )
+
+@app.get("/api/thumbnails/{design_id}/{size}")
+async def get_design_thumbnail(design_id: str, size: str, accept: Optional[str] = Header(None)):
+    """Serve a gallery-sized thumbnail of a design"""
+    if size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"Unknown thumbnail size: {size}")
+
+    design = await dashboard_store.get("designs", design_id)
+    if design is None:
+        raise HTTPException(status_code=404, detail="Design not found")
+    design = DesignPreview(**design)
+
+    width, height = THUMBNAIL_SIZES[size]
+    if design.image_url.startswith("/api/placeholder/"):
+        return RedirectResponse(url=f"/api/placeholder/{width}/{height}")
+
+    source = thumbnail_service.resolve_source(design.image_url)
+    if source is None:
+        # Remote images cannot be thumbnailed locally
+        return RedirectResponse(url=design.image_url)
+
+    fmt = thumbnail_service.negotiate_format(accept)
     try:
-        # Decode base64 image
-        image_data = base64.b64decode(request.image_data)
-        
-        # Use AI service for analysis
-        result = await ai_service.analyze_floor_plan(image_data, request.filename)
-        
-        return {
-            "success": True,
-            "analysis": result,
-            "filename": request.filename,
-            "timestamp": datetime.now().isoformat()
-        }
+        path = await thumbnail_service.get_thumbnail(source, size, fmt)
     except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "timestamp": datetime.now().isoformat()
-        }
+        logger.warning("thumbnails.render_failed", design_id=design_id, size=size, error=str(e))
+        return RedirectResponse(url=design.image_url)
+
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Cache-Control": "public, max-age=86400", "Vary": "Accept"}
+    )
+
+@app.get("/api/dashboard/interactions", response_model=List[InteractionHistory])
+async def get_interaction_history(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get client interaction history, paged with limit/cursor (304 when If-None-Match has the current ETag)"""
+    return await list_page("interactions", request, InteractionHistory, limit, cursor, fields)
+
+@app.get("/api/dashboard/clients/{client_id}/interactions", response_model=ClientTimeline)
+async def get_client_timeline(
+    client_id: str,
+    request: Request,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    interaction_type: Optional[str] = Query(None, alias="type"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Interactions of a client between since and until (inclusive), newest first, from the store's
+    per-client time index; next_action is the latest interaction with a follow-up, whatever the range"""
+    etag = await collection_etag("interactions")
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    filters = {"interaction_type": interaction_type} if interaction_type is not None else None
+    interactions, latest = await asyncio.gather(
+        dashboard_store.range("interactions", "timeline", client_id, since, until, limit, True, filters),
+        dashboard_store.range("interactions", "next_actions", client_id, limit=1, descending=True)
+    )
+    body = {"client_id": client_id, "interactions": interactions, "next_action": latest[0] if latest else None}
+    return Response(content=encode_json(body), media_type="application/json", headers=etag_headers(etag))
+
+# ==================== AI SERVICES ====================
 
-@app.post("/api/ai/generate-design")
-async def generate_design(request: DesignGenerationRequest):
-    """Generate interior design with AI"""
+async def run_floor_plan_analysis(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: analyze floor plan with AI"""
+    with span("decode", **{"image.base64_chars": len(payload["image_data"])}):
+        image_data = base64.b64decode(payload["image_data"])
+    await job_queue.report_progress({"stage": "image_decoded", "bytes": len(image_data)})
+    ai = await get_ai_service()
+    result = await ai.analyze_floor_plan(image_data, payload["filename"])
+    return {
+        "analysis": result,
+        "filename": payload["filename"]
+    }
+
+async def run_design_generation(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: generate design suggestions with AI"""
+    ai = await get_ai_service()
+    suggestions = await ai.generate_design_suggestions(
+        payload["room_type"],
+        payload["style"],
+        50000  # default budget
+    )
+    return {
+        "design_suggestions": suggestions,
+        "prompt": payload["prompt"],
+        "style": payload["style"],
+        "room_type": payload["room_type"]
+    }
+
+def metered(endpoint: str, handler):
+    """Wrap a job handler so its Azure calls are quota-checked and attributed to the submitting user"""
+    async def run(payload: Dict[str, Any]) -> Any:
+        key = payload.get("quota_key") or payload.get("user_id")
+        await usage_ledger.check_quota(key)
+        usage_context.set((key, endpoint))
+        return await handler(payload)
+    return run
+
+def traced(kind: str, handler):
+    """Wrap a job handler in a trace that continues the submitting request's trace;
+    the phase timings are stored on the job"""
+    async def run(payload: Dict[str, Any]) -> Any:
+        with tracer.trace(f"job {kind}", payload.get("traceparent")) as trace:
+            try:
+                return await handler(payload)
+            finally:
+                job_queue.record_timings(trace.timings())
+    return run
+
+job_queue.register("analyze-floor-plan",
+                   traced("analyze-floor-plan", metered("analyze-floor-plan", run_floor_plan_analysis)))
+job_queue.register("generate-design",
+                   traced("generate-design", metered("generate-design", run_design_generation)))
+
+async def submit_ai_job(kind: str, payload: Dict[str, Any], user_id: Optional[str], quota: str,
+                        priority: int = JobPriority.NORMAL) -> JSONResponse:
+    """Enqueue an AI job and return its id without waiting for the model"""
+    await get_ai_service()
+    await usage_ledger.check_quota(quota)
+    trace = current_trace()
+    payload = {**payload, "user_id": user_id, "quota_key": quota, "traceparent": trace.traceparent if trace else None}
     try:
-        # Generate design suggestions
-        suggestions = await ai_service.generate_design_suggestions(
-            request.room_type, 
-            request.style, 
-            50000  # default budget
-        )
-        
-        return {
-            "success": True,
-            "design_suggestions": suggestions,
-            "prompt": request.prompt,
-            "style": request.style,
-            "room_type": request.room_type,
-            "timestamp": datetime.now().isoformat()
-        }
-    except Exception as e:
-        return {
-            "success": False,
-            "error": str(e),
-            "timestamp": datetime.now().isoformat()
-        }
+        job = await job_queue.submit(kind, payload, priority, user_id=user_id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/jobs/{job.id}",
+        "events_topic": f"job:{job.id}",
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.post("/api/ai/analyze-floor-plan", status_code=202)
+async def analyze_floor_plan(request: FloorPlanAnalysisRequest, user_id: Optional[str] = Depends(current_user),
+                             quota: str = Depends(quota_key)):
+    """Queue floor plan analysis with AI"""
+    return await submit_ai_job("analyze-floor-plan", {
+        "image_data": request.image_data,
+        "filename": request.filename
+    }, user_id=user_id, quota=quota)
+
+@app.post("/api/ai/generate-design", status_code=202)
+async def generate_design(request: DesignGenerationRequest, user_id: Optional[str] = Depends(current_user),
+                          quota: str = Depends(quota_key)):
+    """Queue interior design generation with AI"""
+    return await submit_ai_job("generate-design", {
+        "prompt": request.prompt,
+        "style": request.style,
+        "room_type": request.room_type
+    }, user_id=user_id, quota=quota)
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str, user_id: Optional[str] = Depends(current_user)):
+    """Poll status and result of an AI job; jobs of a user are visible only to that user"""
+    job = await job_queue.get(job_id)
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    headers = {}
+    if job.timings and settings.SERVER_TIMING_ENABLED:
+        # Phases of the finished job itself, next to the timing of this poll request
+        headers["Server-Timing"] = server_timing({f"job.{name}": ms for name, ms in job.timings.items()})
+    return JSONResponse(content=job.model_dump(mode="json"), headers=headers)
+
+# ==================== USAGE & CREDITS ====================
+
+@app.get("/api/usage/{user_id}")
+async def get_user_usage(user_id: str, caller: Optional[str] = Depends(current_user)):
+    """Token usage, quota and remaining credits of a user (feeds lib/useCredits.ts); only the user
+    and admins may read it"""
+    if caller is None:
+        raise AuthenticationError()
+    if caller != user_id and await usage_ledger.get_plan(caller) != "admin":
+        raise AuthorizationError()
+    usage = await usage_ledger.get_usage(user_id)
+    remaining = [p["remaining"] for p in (usage["daily"], usage["monthly"]) if p["remaining"] is not None]
+    # In the frontend's unit: GENERATION_CREDIT_COST credits per design generation
+    usage["credits"] = (min(remaining) * settings.GENERATION_CREDIT_COST // settings.TOKENS_PER_GENERATION
+                        if remaining else None)
+    usage["generation_cost"] = settings.GENERATION_CREDIT_COST
+    return usage
+
+@app.put("/api/usage/{user_id}/plan")
+async def set_user_plan(user_id: str, assignment: PlanAssignment, x_billing_token: Optional[str] = Header(None)):
+    """Assign a plan when billing changes a subscription; disabled while no billing token is set"""
+    if not settings.BILLING_WEBHOOK_TOKEN or not hmac.compare_digest(x_billing_token or "",
+                                                                     settings.BILLING_WEBHOOK_TOKEN):
+        raise AuthenticationError("Invalid billing token")
+    await usage_ledger.set_plan(user_id, assignment.plan)
+    return {"user_id": user_id, "plan": assignment.plan}
+
+# ==================== REALTIME EVENTS ====================
+
+async def authorize_topic(conn: Connection, topic: str) -> bool:
+    """A job's events go only to the user who submitted it (anonymous jobs to anonymous sockets)"""
+    if topic.startswith("job:"):
+        job = await job_queue.get(topic[4:])
+        return job is not None and job.user_id == conn.user_id
+    return True
+
+async def send_topic_snapshot(conn: Connection, topic: str):
+    """Send current job state to a late subscriber so it never misses completion"""
+    if topic.startswith("job:"):
+        job = await job_queue.get(topic[4:])
+        if job is not None:
+            event_hub.send(conn, topic, "snapshot", job.model_dump(mode="json"))
+
+@app.websocket("/ws")
+async def events_websocket(websocket: WebSocket):
+    """Push channel for AI job and BFL image generation events.
+
+    Client messages: {"action": "subscribe" | "unsubscribe", "topics": ["job:<id>", "bfl:<id>"]}
+    and {"action": "ping"}. Connecting with a user token (?token=) subscribes to all of that user's
+    jobs; job topics are open only to the job's owner.
+    """
+    user_id = authenticated_user(websocket.scope, trusted_proxies, settings.USER_TOKEN_SECRET)
+    await event_hub.serve(websocket, user_id=user_id, on_subscribe=send_topic_snapshot,
+                          authorize=authorize_topic)
+
+# BFL result statuses mapped to push event types
+BFL_STATUS_EVENTS = {
+    "pending": "started",
+    "ready": "completed",
+    "error": "failed",
+    "task not found": "failed",
+    "request moderated": "failed",
+    "content moderated": "failed"
+}
+
+@app.post("/api/webhooks/bfl")
+async def bfl_webhook(request: Request, x_webhook_secret: Optional[str] = Header(None)):
+    """Receive BFL generation status callbacks and push them to subscribers"""
+    if not settings.BFL_WEBHOOK_SECRET or not hmac.compare_digest(
+        x_webhook_secret or "", settings.BFL_WEBHOOK_SECRET
+    ):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+    body = await request.json()
+    task_id = body.get("id") or body.get("task_id")
+    if not task_id:
+        raise HTTPException(status_code=400, detail="Missing task id")
+
+    event = BFL_STATUS_EVENTS.get(str(body.get("status", "")).lower(), "partial")
+    await event_hub.publish(f"bfl:{task_id}", event, {
+        "task_id": task_id,
+        "status": body.get("status"),
+        "progress": body.get("progress"),
+        "result": body.get("result")
+    })
+    return {"received": True}
 
 @app.post("/api/ai/chat")
-async def chat_with_ai(request: ChatRequest):
+async def chat_with_ai(request: ChatRequest, quota: str = Depends(quota_key)):
     """Handle chat requests with the AI assistant"""
+    await usage_ledger.check_quota(quota)
+    usage_context.set((quota, "chat"))
+    ai = await get_ai_service()
     try:
-        response = ai_service.chat_completion(
-            message=request.message,
-            context=request.context,
-            conversation_id=request.conversation_id
-        )
+        # Awaited on this loop: the pooled Azure client cannot be driven from a private event loop
+        response = await ai.chat_with_ai(request.message, request.context)
         return JSONResponse(content={"reply": response})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -470,6 +1150,7 @@ async def generate_image_azure(request: AzureImageGenerationRequest):
         raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
 
     # Check if Azure OpenAI is configured
+    azure_service = await clients.aget("azure_openai")
     if not azure_service.is_configured():
         azure_info = azure_service.get_service_info()
         config_status = {
@@ -478,9 +1159,7 @@ async def generate_image_azure(request: AzureImageGenerationRequest):
             "hasApiVersion": bool(azure_info.get("api_version")),
             "hasDeployment": bool(azure_info.get("deployment_name"))
         }
-        
-        print(f"Missing Azure OpenAI configuration: {json.dumps(config_status, indent=2)}")
-        
+        logger.error("azure_openai.config_missing", **config_status)
         raise HTTPException(
             status_code=500, 
             detail=f"Azure OpenAI service not configured. Missing configuration: {config_status}"
@@ -490,6 +1169,8 @@ async def generate_image_azure(request: AzureImageGenerationRequest):
         result = await azure_service.generate_image(request.prompt)
         
         if result.get("success"):
+            await dashboard_store.increment("ai", "designs_generated")
+            analytics.record("design_generated")
             return JSONResponse(content={
                 "success": True,
                 "image_url": result.get("image_url"),
@@ -503,7 +1184,7 @@ async def generate_image_azure(request: AzureImageGenerationRequest):
                 detail=f"Failed to generate image: {result.get('error', 'Unknown error')}"
             )
     except Exception as e:
-        print(f"Azure image generation error: {e}")
+        logger.error("azure_openai.image_failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 # @app.post("/api/ai/generate-image-dalle")
@@ -512,70 +1193,78 @@ async def generate_image_azure(request: AzureImageGenerationRequest):
 #     # DISABLED - azure_dalle_service module not available
 #     raise HTTPException(status_code=503, detail="DALL-E service temporarily unavailable")
 
+DESIGN_SUGGESTIONS = [
+    {
+        "category": "furniture",
+        "items": [
+            {"name": "Scandinavian Sofa", "price": 85000, "description": "Clean lines, neutral colors"},
+            {"name": "Industrial Coffee Table", "price": 35000, "description": "Metal and wood combination"},
+            {"name": "Minimalist Bookshelf", "price": 25000, "description": "Floating shelves design"}
+        ]
+    },
+    {
+        "category": "colors",
+        "items": [
+            {"name": "Sage Green", "hex": "#9CAF88", "description": "Calming nature-inspired"},
+            {"name": "Warm Gray", "hex": "#8B8680", "description": "Sophisticated neutral"},
+            {"name": "Cream White", "hex": "#F7F3E9", "description": "Soft and elegant"}
+        ]
+    },
+    {
+        "category": "materials",
+        "items": [
+            {"name": "Natural Oak", "price": 3500, "description": "Durable hardwood flooring"},
+            {"name": "Marble Countertop", "price": 8500, "description": "Luxury kitchen surface"},
+            {"name": "Linen Textiles", "price": 2200, "description": "Sustainable fabric choice"}
+        ]
+    }
+]
+
+suggestions_payload = response_cache.register(
+    "/api/ai/suggestions",
+    lambda: {"success": True, "suggestions": DESIGN_SUGGESTIONS},
+    volatile={"timestamp": lambda: datetime.now().isoformat()}
+)
+
 @app.get("/api/ai/suggestions")
-async def get_design_suggestions():
+async def get_design_suggestions(request: Request):
     """Get AI-powered design suggestions"""
-    suggestions = [
-        {
-            "category": "furniture",
-            "items": [
-                {"name": "Scandinavian Sofa", "price": 85000, "description": "Clean lines, neutral colors"},
-                {"name": "Industrial Coffee Table", "price": 35000, "description": "Metal and wood combination"},
-                {"name": "Minimalist Bookshelf", "price": 25000, "description": "Floating shelves design"}
-            ]
-        },
-        {
-            "category": "colors",
-            "items": [
-                {"name": "Sage Green", "hex": "#9CAF88", "description": "Calming nature-inspired"},
-                {"name": "Warm Gray", "hex": "#8B8680", "description": "Sophisticated neutral"},
-                {"name": "Cream White", "hex": "#F7F3E9", "description": "Soft and elegant"}
-            ]
-        },
-        {
-            "category": "materials",
-            "items": [
-                {"name": "Natural Oak", "price": 3500, "description": "Durable hardwood flooring"},
-                {"name": "Marble Countertop", "price": 8500, "description": "Luxury kitchen surface"},
-                {"name": "Linen Textiles", "price": 2200, "description": "Sustainable fabric choice"}
-            ]
-        }
-    ]
-    
-    return {
-        "success": True,
-        "suggestions": suggestions,
-        "timestamp": datetime.now().isoformat()
-    }
+    return suggestions_payload.response(request)
 
 # ==================== FEATURES ENDPOINT ====================
 
+FEATURES = {
+    "dashboard": {
+        "tasks": "Daily task management with CRUD operations",
+        "clients": "Favorite client management",
+        "designs": "Design preview gallery",
+        "interactions": "Client interaction history",
+        "analytics": "Real-time dashboard statistics"
+    },
+    "ai_services": {
+        "floor_plan_analysis": "AI-powered floor plan analysis",
+        "design_generation": "Interior design generation with Azure DALL-E 3",
+        "chat_assistant": "Intelligent design consultation",
+        "suggestions": "Personalized design recommendations",
+        "dalle_3": "High-quality image generation with Azure DALL-E 3"
+    },
+    "integrations": {
+        "azure_openai": "Azure OpenAI service integration",
+        "dalle_3": "Azure DALL-E 3 image generation",
+        "gpt4": "GPT-4 for analysis and chat"
+    },
+    "version": "2.0.0"
+}
+
+features_payload = response_cache.register(
+    "/api/features",
+    lambda: {**FEATURES, "ai_configured": settings.is_ai_configured()}
+)
+
 @app.get("/api/features")
-async def get_features():
+async def get_features(request: Request):
     """Get available features"""
-    return {
-        "dashboard": {
-            "tasks": "Daily task management with CRUD operations",
-            "clients": "Favorite client management",
-            "designs": "Design preview gallery",
-            "interactions": "Client interaction history",
-            "analytics": "Real-time dashboard statistics"
-        },
-        "ai_services": {
-            "floor_plan_analysis": "AI-powered floor plan analysis",
-            "design_generation": "Interior design generation with Azure DALL-E 3",
-            "chat_assistant": "Intelligent design consultation",
-            "suggestions": "Personalized design recommendations",
-            "dalle_3": "High-quality image generation with Azure DALL-E 3"
-        },
-        "integrations": {
-            "azure_openai": "Azure OpenAI service integration",
-            "dalle_3": "Azure DALL-E 3 image generation",
-            "gpt4": "GPT-4 for analysis and chat"
-        },
-        "version": "2.0.0",
-        "ai_configured": settings.is_ai_configured()
-    }
+    return features_payload.response(request)
 
 # ==================== MAIN ====================
 
@@ -585,16 +1274,6 @@ if __name__ == "__main__":
     print("🚀 Starting Red.AI Backend Service")
     print("=" * 50)
     
-    # Initialize AI service with error handling
-    try:
-        ai_service = AIService()
-        print("✅ AI Service initialized successfully")
-    except Exception as e:
-        print(f"⚠️  AI Service initialization failed: {e}")
-        print("   The backend will start but AI features may not be available")
-        print("   Please check your Azure OpenAI configuration")
-        ai_service = None
-    
     # Run the FastAPI server
     uvicorn.run(
         app, 
@@ -0,0 +1,217 @@
+"""
+On-demand Profiling for RED AI
+Admin-only sampling profiler for live workers (/debug/profile) and per-request cProfile (X-Profile: 1)
+"""
+
+import asyncio
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+# Leaf frames of threads that are waiting rather than running (dropped unless idle=true)
+IDLE_LEAVES = frozenset({"select", "poll", "epoll", "wait", "sleep", "accept", "_wait_for_tstate_lock"})
+
+_STDLIB_DIR = os.path.dirname(os.__file__)
+
+
+def _frame_label(code) -> str:
+    """Function name and location of a code object for flamegraph frames"""
+    filename = code.co_filename
+    if filename.startswith(_STDLIB_DIR):
+        filename = filename[len(_STDLIB_DIR) + 1:]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the stacks of all threads from a separate thread; nothing runs between sessions"""
+
+    def __init__(self, rate: float = 100.0, include_idle: bool = False):
+        """Initialize stack sampler"""
+        self.interval = 1.0 / rate
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict = {}
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def sample(self, own_thread: int):
+        """Record one stack per thread"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            if not self.include_idle and frame.f_code.co_name in IDLE_LEAVES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self, seconds: float):
+        """Sample for `seconds` on the calling thread"""
+        own_thread = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        next_sample = time.monotonic()
+        while next_sample < deadline:
+            self.sample(own_thread)
+            next_sample += self.interval
+            delay = next_sample - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def collapsed(self) -> str:
+        """Collapsed stacks (`thread;outer;...;inner count`), the input format of flamegraph.pl and speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int = 30) -> Dict:
+        """Functions by self samples (on-CPU leaf) and total samples (anywhere on the stack)"""
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return {
+            "self": [{"frame": f, "samples": c} for f, c in own.most_common(limit)],
+            "total": [{"frame": f, "samples": c} for f, c in total.most_common(limit)]
+        }
+
+
+async def sample_stacks(seconds: float, rate: float, include_idle: bool = False) -> StackSampler:
+    """Run a sampling session on a dedicated thread without blocking the event loop"""
+    sampler = StackSampler(rate, include_idle)
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def target():
+        try:
+            sampler.run(seconds)
+        finally:
+            loop.call_soon_threadsafe(done.set_result, None)
+
+    threading.Thread(target=target, name="stack-sampler", daemon=True).start()
+    await done
+    return sampler
+
+
+def is_admin(token: Optional[str], admin_token: str) -> bool:
+    """Check the X-Admin-Token header; profiling is disabled while no admin token is configured"""
+    return bool(admin_token) and hmac.compare_digest(token or "", admin_token)
+
+
+def create_debug_router(admin_token: str, max_seconds: float = 60.0, default_rate: float = 100.0) -> APIRouter:
+    """Router with /debug/profile for one app"""
+    router = APIRouter()
+    session = asyncio.Lock()
+
+    @router.get("/debug/profile", include_in_schema=False)
+    async def profile(
+        seconds: float = Query(10.0, gt=0),
+        rate: float = Query(default_rate, gt=0, le=1000),
+        format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+        idle: bool = False,
+        x_admin_token: Optional[str] = Header(None)
+    ):
+        """Sample all threads of this worker for `seconds` and return collapsed stacks or a JSON summary"""
+        if not is_admin(x_admin_token, admin_token):
+            raise HTTPException(status_code=404, detail="Not Found")
+        if seconds > max_seconds:
+            raise HTTPException(status_code=400, detail=f"seconds must be at most {max_seconds:g}")
+        if session.locked():
+            raise HTTPException(status_code=409, detail="A profiling session is already running")
+
+        async with session:
+            sampler = await sample_stacks(seconds, rate, include_idle=idle)
+
+        headers = {"X-Profile-Samples": str(sampler.samples), "X-Profile-Pid": str(os.getpid())}
+        if format == "json":
+            return JSONResponse(content={
+                "pid": os.getpid(),
+                "seconds": seconds,
+                "rate": rate,
+                "samples": sampler.samples,
+                "top": sampler.top(),
+                "collapsed": sampler.collapsed()
+            }, headers=headers)
+        return PlainTextResponse(sampler.collapsed(), headers=headers)
+
+    return router
+
+
+class RequestProfileMiddleware:
+    """Runs a request under cProfile when an admin sends `X-Profile: 1`; the response body is
+    replaced by the profile. Other tasks interleaving on the event loop appear in the profile too."""
+
+    def __init__(self, app, admin_token: str, limit: int = 60):
+        self.app = app
+        self.admin_token = admin_token
+        self.limit = limit
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.admin_token:
+            await self.app(scope, receive, send)
+            return
+        profile_header = token = None
+        for key, value in scope["headers"]:
+            if key == b"x-profile":
+                profile_header = value
+            elif key == b"x-admin-token":
+                token = value.decode("latin-1")
+        if profile_header != b"1" or not is_admin(token, self.admin_token):
+            await self.app(scope, receive, send)
+            return
+        # cProfile hooks the whole thread, so only one profiled request at a time
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def discard_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, discard_send)
+            finally:
+                profiler.disable()
+        finally:
+            self._busy.release()
+
+        out = io.StringIO()
+        out.write(f"{scope['method']} {scope['path']} -> {status['code']} "
+                  f"in {(time.perf_counter() - started) * 1000:.1f} ms\n\n")
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(self.limit)
+        body = out.getvalue().encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-profile-status", str(status["code"]).encode())
+        ]})
+        await send({"type": "http.response.body", "body": body})
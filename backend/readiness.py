@@ -0,0 +1,167 @@
+"""
+Readiness Checks for RED AI
+Upstream, database and cache reachability checked in the background; /readyz serves the cached
+results and /livez answers without doing any work
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import text
+
+from clients import clients
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+LIVEZ_BODY = b'{"status":"ok"}'
+
+
+@dataclass
+class CheckResult:
+    """Outcome of one check run"""
+    ok: bool
+    latency_ms: float
+    checked_at: float
+    error: Optional[str] = None
+    detail: Optional[Dict] = None
+
+
+class ReadinessChecker:
+    """Runs every check on an interval; probes only read the last results"""
+
+    def __init__(self, interval: float = 10.0, timeout: float = 3.0, ttl: float = 30.0):
+        """Initialize readiness checker"""
+        self.interval = interval
+        self.timeout = timeout
+        self.ttl = ttl
+        self._checks: List[Tuple[str, Callable[[], Awaitable[Optional[Dict]]], bool]] = []
+        self._results: Dict[str, CheckResult] = {}
+        self._runner: Optional[asyncio.Task] = None
+
+    def add(self, name: str, check: Callable[[], Awaitable[Optional[Dict]]], critical: bool = True):
+        """Register a check; a failing non-critical check reports `degraded` but keeps the worker ready"""
+        self._checks.append((name, check, critical))
+
+    async def start(self):
+        """Start the check loop; the first round runs in the background so startup is not delayed"""
+        self._runner = asyncio.create_task(self._run_loop())
+
+    async def stop(self):
+        """Stop the check loop"""
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+
+    async def _run_loop(self):
+        while True:
+            await self.run_checks()
+            await asyncio.sleep(self.interval)
+
+    async def run_checks(self):
+        """Run all checks concurrently, each bounded by the timeout"""
+        await asyncio.gather(*(self._run_one(name, check) for name, check, _ in self._checks))
+
+    async def _run_one(self, name: str, check):
+        started = time.monotonic()
+        try:
+            detail = await asyncio.wait_for(check(), self.timeout)
+            result = CheckResult(True, 0.0, 0.0, detail=detail)
+        except asyncio.TimeoutError:
+            result = CheckResult(False, 0.0, 0.0, error=f"timed out after {self.timeout:g}s")
+        except Exception as e:
+            result = CheckResult(False, 0.0, 0.0, error=f"{type(e).__name__}: {e}")
+        result.checked_at = time.monotonic()
+        result.latency_ms = round((result.checked_at - started) * 1000, 1)
+        self._results[name] = result
+
+    def snapshot(self) -> Tuple[bool, Dict]:
+        """(ready, report) from the cached results; results older than the TTL count as failed"""
+        now = time.monotonic()
+        ready, degraded, checks = True, False, {}
+        for name, _, critical in self._checks:
+            result = self._results.get(name)
+            if result is None:
+                ok, entry = False, {"ok": False, "error": "not checked yet"}
+            else:
+                age = now - result.checked_at
+                ok = result.ok and age <= self.ttl
+                entry = {"ok": ok, "latency_ms": result.latency_ms, "age_s": round(age, 1)}
+                if result.error:
+                    entry["error"] = result.error
+                elif not ok:
+                    entry["error"] = "stale result"
+                if result.detail:
+                    entry.update(result.detail)
+            entry["critical"] = critical
+            checks[name] = entry
+            if not ok:
+                if critical:
+                    ready = False
+                else:
+                    degraded = True
+        status = "unavailable" if not ready else "degraded" if degraded else "ok"
+        return ready, {"status": status, "checks": checks}
+
+
+# ==================== CHECKS ====================
+
+def http_check(url: str) -> Callable[[], Awaitable[Dict]]:
+    """Upstream is reachable if it answers at all (an unauthenticated request usually gets 401/404)"""
+    async def check():
+        pool = await clients.aget("http_pool")
+        response = await pool.client_for(url).get(url)
+        if response.status_code >= 500:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return {"status_code": response.status_code}
+    return check
+
+
+def sql_check(engine) -> Callable[[], Awaitable[None]]:
+    """SELECT 1 on a pooled connection, off the event loop"""
+    def ping():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    async def check():
+        await asyncio.get_running_loop().run_in_executor(None, ping)
+    return check
+
+
+def redis_check(redis_url: str) -> Callable[[], Awaitable[None]]:
+    """PING on a dedicated connection"""
+    client = aioredis.from_url(redis_url) if REDIS_AVAILABLE else None
+
+    async def check():
+        if client is None:
+            raise RuntimeError("redis package is not installed")
+        await client.ping()
+    return check
+
+
+def create_health_router(checker: ReadinessChecker) -> APIRouter:
+    """Router with /livez and /readyz"""
+    router = APIRouter()
+    livez = Response(content=LIVEZ_BODY, media_type="application/json")
+
+    @router.get("/livez", include_in_schema=False)
+    async def liveness():
+        """The process is up and the event loop is responsive"""
+        return livez
+
+    @router.get("/readyz", include_in_schema=False)
+    async def readiness():
+        """Cached dependency checks; 503 while a critical dependency is unreachable"""
+        ready, report = checker.snapshot()
+        return JSONResponse(content=report, status_code=200 if ready else 503)
+
+    return router
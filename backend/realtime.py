@@ -0,0 +1,303 @@
+"""
+Realtime Events for RED AI
+WebSocket push channel for AI job and BFL image generation progress
+"""
+
+import json
+import time
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from logging_config import get_logger
+
+# Redis is optional - events stay process-local when it is not installed
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+# WebSocket close codes
+CLOSE_TRY_AGAIN_LATER = 1013
+CLOSE_GOING_AWAY = 1001
+
+
+# ==================== PUB/SUB BACKENDS ====================
+
+class InMemoryPubSub:
+    """Single-process pub/sub: published events are delivered locally"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[str], None]] = None
+
+    async def start(self, deliver: Callable[[str], None]):
+        """Register the local delivery callback"""
+        self._deliver = deliver
+
+    async def publish(self, message: str):
+        """Deliver a message to this process"""
+        if self._deliver is not None:
+            self._deliver(message)
+
+    async def stop(self):
+        """Stop delivering messages"""
+        self._deliver = None
+
+
+class RedisPubSub:
+    """Redis pub/sub so an event published by any worker reaches sockets on every worker"""
+
+    def __init__(self, redis_url: str, channel: str = "redai:events"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is not installed")
+        self.redis = aioredis.from_url(redis_url)
+        self.channel = channel
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Callable[[str], None]):
+        """Subscribe to the shared channel and deliver messages locally"""
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(pubsub, deliver))
+
+    async def _listen(self, pubsub, deliver: Callable[[str], None]):
+        """Forward channel messages until cancelled, reconnecting on errors"""
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    data = message.get("data")
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8")
+                    deliver(data)
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                logger.warning("events.redis_connection_lost", channel=self.channel, error=str(e))
+                await asyncio.sleep(1)
+
+    async def publish(self, message: str):
+        """Publish a message to every worker"""
+        await self.redis.publish(self.channel, message)
+
+    async def stop(self):
+        """Stop the listener and close the Redis connection"""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        await self.redis.close()
+
+
+def create_pubsub(backend: str = "memory", redis_url: Optional[str] = None, channel: str = "redai:events"):
+    """Create pub/sub backend"""
+    if backend == "redis":
+        if REDIS_AVAILABLE and redis_url:
+            return RedisPubSub(redis_url, channel)
+        logger.warning("events.redis_unavailable", fallback="memory", scope="this worker")
+    return InMemoryPubSub()
+
+
+# ==================== CONNECTIONS ====================
+
+class Connection:
+    """A connected socket with a bounded outgoing queue"""
+
+    __slots__ = ("websocket", "user_id", "topics", "queue", "overflowed")
+
+    def __init__(self, websocket: WebSocket, user_id: Optional[str], queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.topics: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, message: str) -> bool:
+        """Queue a message without blocking; False if the client is too slow"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+
+class EventHub:
+    """Topic-based fan-out of events to WebSocket connections"""
+
+    def __init__(self, pubsub, max_connections: int = 10000, idle_timeout: float = 300.0,
+                 send_queue_size: int = 100, max_subscriptions: int = 50):
+        """Initialize event hub"""
+        self.pubsub = pubsub
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.send_queue_size = send_queue_size
+        self.max_subscriptions = max_subscriptions
+        self._connections: Set[Connection] = set()
+        self._topics: Dict[str, Set[Connection]] = {}
+        self.dropped_connections = 0
+
+    async def start(self):
+        """Start receiving events from the pub/sub backend"""
+        await self.pubsub.start(self._deliver)
+
+    async def stop(self):
+        """Stop receiving events and release connection senders"""
+        await self.pubsub.stop()
+        for conn in list(self._connections):
+            conn.offer("")  # wake sender so it exits
+
+    @property
+    def connection_count(self) -> int:
+        """Number of sockets held by this process"""
+        return len(self._connections)
+
+    @staticmethod
+    def _envelope(topic: str, event_type: str, data: Any) -> str:
+        """Serialize an event once for every subscriber"""
+        return json.dumps({
+            "topic": topic,
+            "type": event_type,
+            "data": data,
+            "timestamp": datetime.now().isoformat()
+        }, ensure_ascii=False, default=str)
+
+    async def publish(self, topic: str, event_type: str, data: Any = None):
+        """Publish an event to all subscribers of a topic on every worker"""
+        # Wire format is "<topic>\n<json>" so fan-out never re-parses the payload
+        await self.pubsub.publish(f"{topic}\n{self._envelope(topic, event_type, data)}")
+
+    def send(self, conn: Connection, topic: str, event_type: str, data: Any = None):
+        """Send an event to a single local connection"""
+        if not conn.offer(self._envelope(topic, event_type, data)):
+            self._drop(conn)
+
+    def _deliver(self, wire: str):
+        """Fan an event out to local subscribers"""
+        topic, _, message = wire.partition("\n")
+        for conn in tuple(self._topics.get(topic, ())):
+            if not conn.offer(message):
+                self._drop(conn)
+
+    def subscribe(self, conn: Connection, topic: str) -> Optional[str]:
+        """Subscribe a connection to a topic; returns an error message if refused"""
+        if topic.startswith("user:") and (not conn.user_id or topic != f"user:{conn.user_id}"):
+            return "Cannot subscribe to another user's events"
+        if not topic.startswith(("user:", "job:", "bfl:")):
+            return f"Unknown topic: {topic}"
+        if len(conn.topics) >= self.max_subscriptions and topic not in conn.topics:
+            return f"Subscription limit reached ({self.max_subscriptions})"
+        conn.topics.add(topic)
+        self._topics.setdefault(topic, set()).add(conn)
+        return None
+
+    def unsubscribe(self, conn: Connection, topic: str):
+        """Remove a connection from a topic"""
+        conn.topics.discard(topic)
+        subscribers = self._topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(conn)
+            if not subscribers:
+                del self._topics[topic]
+
+    def _drop(self, conn: Connection):
+        """Detach a connection from every topic, closing it if it fell behind"""
+        for topic in tuple(conn.topics):
+            self.unsubscribe(conn, topic)
+        if conn in self._connections:
+            self._connections.discard(conn)
+            if conn.overflowed:
+                self.dropped_connections += 1
+                asyncio.ensure_future(self._close_slow(conn))
+
+    @staticmethod
+    async def _close_slow(conn: Connection):
+        """Disconnect a client that cannot keep up with its events"""
+        try:
+            await conn.websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+
+    async def _sender(self, conn: Connection):
+        """Drain a connection's queue to the socket"""
+        while True:
+            message = await conn.queue.get()
+            if not message:
+                return
+            await conn.websocket.send_text(message)
+
+    async def serve(self, websocket: WebSocket, user_id: Optional[str] = None,
+                    on_subscribe: Optional[Callable[[Connection, str], Any]] = None,
+                    authorize: Optional[Callable[[Connection, str], Awaitable[bool]]] = None):
+        """Run one WebSocket connection until it closes or goes idle; user_id must be authenticated by
+        the caller, and authorize (if given) vets every topic the client asks for"""
+        if len(self._connections) >= self.max_connections:
+            await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+            return
+
+        await websocket.accept()
+        conn = Connection(websocket, user_id, self.send_queue_size)
+        self._connections.add(conn)
+        if user_id:
+            self.subscribe(conn, f"user:{user_id}")
+
+        sender = asyncio.create_task(self._sender(conn))
+        try:
+            while not conn.overflowed:
+                try:
+                    raw = await asyncio.wait_for(websocket.receive_text(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await websocket.close(code=CLOSE_GOING_AWAY)
+                    break
+
+                reply = await self._handle(conn, raw, on_subscribe, authorize)
+                if reply is not None and not conn.offer(json.dumps(reply)):
+                    break
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.warning("events.connection_error", error=str(e))
+        finally:
+            self._drop(conn)
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+
+    async def _handle(self, conn: Connection, raw: str,
+                      on_subscribe: Optional[Callable[[Connection, str], Any]] = None,
+                      authorize: Optional[Callable[[Connection, str], Awaitable[bool]]] = None) -> Optional[Dict]:
+        """Handle a client control message"""
+        try:
+            message = json.loads(raw)
+            action = message.get("action")
+        except (ValueError, AttributeError):
+            return {"type": "error", "data": "Invalid message"}
+
+        if action == "ping":
+            return {"type": "pong", "data": time.time()}
+
+        topics = message.get("topics") or ([message["topic"]] if "topic" in message else [])
+        if action == "subscribe":
+            errors = {}
+            for topic in topics:
+                topic = str(topic)
+                if authorize is not None and not await authorize(conn, topic):
+                    errors[topic] = "Not allowed to subscribe to this topic"
+                    continue
+                error = self.subscribe(conn, topic)
+                if error:
+                    errors[topic] = error
+                elif on_subscribe is not None:
+                    await on_subscribe(conn, topic)
+            return {"type": "subscribed", "data": {"topics": sorted(conn.topics), "errors": errors}}
+
+        if action == "unsubscribe":
+            for topic in topics:
+                self.unsubscribe(conn, str(topic))
+            return {"type": "unsubscribed", "data": {"topics": sorted(conn.topics)}}
+
+        return {"type": "error", "data": f"Unknown action: {action}"}
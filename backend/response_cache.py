@@ -0,0 +1,145 @@
+"""
+Response Cache for RED AI
+Pre-encoded (and precompressed) JSON bodies for catalog endpoints whose content only changes
+with configuration; per-request fields such as a timestamp are spliced into the cached bytes
+"""
+
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from compression import compress, negotiate
+
+# orjson is optional; the standard library encoder produces the same bytes, only slower
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def encode_json(content: Any) -> bytes:
+    """Compact UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class CachedJSON:
+    """One endpoint's body: the static part is built and encoded once; volatile top-level fields are
+    re-rendered at most every `refresh` seconds and appended to the cached bytes"""
+
+    def __init__(self, build: Callable[[], Dict[str, Any]],
+                 volatile: Optional[Dict[str, Callable[[], Any]]] = None, refresh: float = 1.0):
+        self.build = build
+        self.volatile = volatile or {}
+        self.refresh = refresh
+        self._prefix: Optional[bytes] = None
+        self._rendered_at = 0.0
+        self._variants: Dict[Optional[str], bytes] = {}
+
+    def invalidate(self):
+        """Rebuild the static part on the next request"""
+        self._prefix = None
+        self._variants = {}
+
+    def _render(self, now: float):
+        if self._prefix is None:
+            static = {key: value for key, value in self.build().items() if key not in self.volatile}
+            # Everything but the closing brace, so volatile fields can follow
+            self._prefix = encode_json(static)[:-1]
+        body = self._prefix
+        if self.volatile:
+            separator = b"," if len(body) > 1 else b""
+            body += separator + b",".join(
+                encode_json(key) + b":" + encode_json(value()) for key, value in self.volatile.items()
+            )
+        self._variants = {None: body + b"}"}
+        self._rendered_at = now
+
+    def body(self, coding: Optional[str] = None) -> bytes:
+        """Current body, compressed for `coding`; a static body is compressed once at the highest level"""
+        now = time.monotonic()
+        if self._prefix is None or (self.volatile and now - self._rendered_at >= self.refresh):
+            self._render(now)
+        variant = self._variants.get(coding)
+        if variant is None:
+            identity = self._variants[None]
+            if self.volatile:
+                variant = compress(identity, coding)
+            else:
+                variant = compress(identity, coding, brotli_quality=11, gzip_level=9)
+            self._variants[coding] = variant
+        return variant
+
+    def response(self, request: Request) -> Response:
+        """Body matching the request's Accept-Encoding"""
+        coding = negotiate(request.headers.get("accept-encoding", ""))
+        headers = {"Vary": "Accept-Encoding"}
+        if coding is not None:
+            headers["Content-Encoding"] = coding
+        return Response(content=self.body(coding), media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Cached bodies by path; the app invalidates them all when configuration is reloaded"""
+
+    def __init__(self):
+        self._entries: Dict[str, CachedJSON] = {}
+
+    def register(self, path: str, build: Callable[[], Dict[str, Any]],
+                 volatile: Optional[Dict[str, Callable[[], Any]]] = None, refresh: float = 1.0) -> CachedJSON:
+        """Declare the cached body of a GET path; `build` is called again after each invalidation"""
+        entry = self._entries[path] = CachedJSON(build, volatile, refresh)
+        return entry
+
+    def get(self, path: str) -> Optional[CachedJSON]:
+        return self._entries.get(path)
+
+    def invalidate(self):
+        """Drop every cached body"""
+        for entry in self._entries.values():
+            entry.invalidate()
+
+
+_HEADERS = {
+    coding: [(b"content-type", b"application/json"), (b"vary", b"Accept-Encoding")]
+    + ([(b"content-encoding", coding.encode())] if coding else [])
+    for coding in (None, "gzip", "br")
+}
+
+
+class ResponseCacheMiddleware:
+    """Answers GET requests for cached paths before routing, so a hit costs a dict lookup and a send;
+    the FastAPI routes stay in place for the OpenAPI schema and as the fallback"""
+
+    def __init__(self, app, cache: ResponseCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        entry = self.cache.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if entry is None:
+            await self.app(scope, receive, send)
+            return
+        accept = b""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept = value
+                break
+        coding = negotiate(accept.decode("latin-1")) if accept else None
+        body = entry.body(coding)
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": _HEADERS[coding] + [(b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
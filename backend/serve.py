@@ -0,0 +1,58 @@
+"""
+Production launcher for the RED AI backend
+Runs main:app in one or more uvicorn worker processes
+
+    python backend/serve.py --workers 4
+    gunicorn main:app -k uvicorn.workers.UvicornWorker -w 4 --chdir backend   # equivalent with gunicorn
+"""
+
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from config import settings
+
+# Settings that must point at a shared backend once there is more than one worker
+SHARED_STATE_SETTINGS = ("DASHBOARD_STORE", "JOB_STORE", "EVENTS_BACKEND", "RATE_LIMIT_BACKEND")
+
+
+def check_shared_state(workers: int) -> list:
+    """Settings still using per-process memory although several workers will run"""
+    if workers <= 1:
+        return []
+    return [name for name in SHARED_STATE_SETTINGS if getattr(settings, name) == "memory"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the RED AI backend")
+    parser.add_argument("--host", default=settings.API_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY,
+                        help="Worker processes (WEB_CONCURRENCY)")
+    args = parser.parse_args()
+
+    process_local = check_shared_state(args.workers)
+    if "DASHBOARD_STORE" in process_local:
+        # Each worker would serve a different copy of the dashboard
+        sys.exit("❌ DASHBOARD_STORE=memory cannot be used with several workers; set it to sql or redis")
+    for name in process_local:
+        print(f"⚠️  {name}=memory: state is per worker, use redis to share it across {args.workers} workers")
+
+    import uvicorn
+
+    print(f"🚀 Starting Red.AI Backend Service with {args.workers} worker(s)")
+    uvicorn.run(
+        "main:app",
+        app_dir=BACKEND_DIR,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="info"
+    )
+
+
+if __name__ == "__main__":
+    main()
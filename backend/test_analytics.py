@@ -0,0 +1,66 @@
+"""
+Tests for analytics rollups
+"""
+
+import asyncio
+from datetime import datetime
+
+import httpx
+from fastapi import FastAPI
+
+from analytics import AnalyticsRollups, create_analytics_router
+
+
+def test_rollups_are_incremental_and_feed_the_summary(tmp_path):
+    """Test bucket totals, revenue and growth figures, and that refreshes only add new events"""
+    database_url = f"sqlite:///{tmp_path / 'analytics.db'}"
+    now = datetime(2026, 10, 21, 15, 30)  # a Wednesday
+
+    async def scenario():
+        rollups = AnalyticsRollups(database_url, interval=3600, batch_size=2)
+        await rollups.start()
+        rollups.record("payment", 300, datetime(2026, 10, 20, 10, 0))
+        rollups.record("payment", 100, datetime(2026, 10, 21, 15, 10))
+        rollups.record("payment", 200, datetime(2026, 10, 13, 9, 0))  # same span of last week
+        rollups.record("payment", 1000, datetime(2026, 10, 15, 12, 0))  # later in last week
+        rollups.record("payment", 50, datetime(2026, 9, 30, 23, 0))  # last month
+        rollups.record("design_generated", occurred_at=datetime(2026, 10, 21, 9, 0))
+        await rollups.refresh()
+        await rollups.refresh()
+        first = rollups._compute_summary(now)
+
+        rollups.record("payment", 400, datetime(2026, 10, 21, 11, 0))
+        await rollups.refresh()
+        second = rollups._compute_summary(now)
+        days = await rollups.series("payment", "day", datetime(2026, 10, 20), datetime(2026, 10, 21))
+        weeks = await rollups.series("design_generated", "week", datetime(2026, 10, 21))
+        await rollups.stop()
+        return first, second, days, weeks
+
+    first, second, days, weeks = asyncio.run(scenario())
+    assert first == {"monthly_revenue": 1600.0, "weekly_growth": 100.0}
+    assert second == {"monthly_revenue": 2000.0, "weekly_growth": 300.0}
+    assert days == [{"start": "2026-10-20T00:00:00", "events": 1, "total": 300.0},
+                    {"start": "2026-10-21T00:00:00", "events": 2, "total": 500.0}]
+    assert weeks == [{"start": "2026-10-19T00:00:00", "events": 1, "total": 0.0}]
+
+
+def test_ingestion_requires_the_token(tmp_path):
+    """Test that events are accepted only with the ingest token and buffered for the next refresh"""
+    rollups = AnalyticsRollups(f"sqlite:///{tmp_path / 'analytics.db'}")
+    app = FastAPI()
+    app.include_router(create_analytics_router(rollups, "secret"))
+    events = [{"kind": "payment", "amount": 99.5, "occurred_at": "2026-10-21T12:00:00Z"}]
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            rejected = await client.post("/api/analytics/events", json=events)
+            accepted = await client.post("/api/analytics/events", json=events, headers={"X-Ingest-Token": "secret"})
+        return rejected, accepted
+
+    rejected, accepted = asyncio.run(scenario())
+    assert rejected.status_code == 401
+    assert accepted.status_code == 202 and accepted.json() == {"accepted": 1}
+    assert [(event["kind"], event["amount"]) for event in rollups._pending] == [("payment", 99.5)]
+    assert rollups._pending[0]["occurred_at"].tzinfo is None
@@ -0,0 +1,87 @@
+"""
+Tests for batch requests
+"""
+
+import asyncio
+import base64
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+
+from batch import BatchDispatcher, create_batch_router
+
+
+def build_app(**limits) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/slow/{name}")
+    async def slow(name: str, request: Request):
+        await asyncio.sleep(0.2)
+        return {"name": name, "user": request.headers.get("x-user"), "user_id": request.headers.get("x-user-id")}
+
+    @app.post("/api/echo")
+    async def echo(payload: dict):
+        return payload
+
+    @app.get("/api/missing")
+    async def missing():
+        raise HTTPException(status_code=404, detail="Not here")
+
+    @app.get("/api/pixel")
+    async def pixel():
+        return Response(content=b"\x89PNG\x00", media_type="image/png")
+
+    @app.get("/api/big")
+    async def big():
+        return {"text": "x" * 2000}
+
+    app.include_router(create_batch_router(BatchDispatcher(app, **limits)))
+    return app
+
+
+def post_batch(app: FastAPI, requests, headers=None) -> httpx.Response:
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/batch", json={"requests": requests}, headers=headers)
+    return asyncio.run(scenario())
+
+
+def test_sub_requests_run_concurrently_with_their_own_status():
+    """Test concurrency, per-item statuses, inherited headers and body encodings"""
+    started = time.perf_counter()
+    response = post_batch(build_app(), [
+        {"id": "a", "path": "/api/slow/a"},
+        {"id": "b", "path": "/api/slow/b?ignored=1", "headers": {"X-User": "override"}},
+        {"id": "c", "path": "/api/slow/c", "headers": {"X-User-Id": "someone-else"}},
+        {"id": "echo", "method": "POST", "path": "/api/echo", "body": {"room": "Кухня"}},
+        {"id": "missing", "path": "/api/missing"},
+        {"id": "pixel", "path": "/api/pixel"},
+        {"id": "loop", "method": "POST", "path": "/api/batch"},
+    ], headers={"x-user": "designer", "x-user-id": "user-1"})
+    elapsed = time.perf_counter() - started
+    items = {item["id"]: item for item in response.json()["responses"]}
+
+    assert response.status_code == 200 and elapsed < 0.35
+    assert list(items) == ["a", "b", "c", "echo", "missing", "pixel", "loop"]
+    assert items["a"]["body"] == {"name": "a", "user": "designer", "user_id": "user-1"}
+    assert items["b"]["body"]["user"] == "override"
+    # Identity headers vouched for by a proxy cannot be replaced inside the batch
+    assert items["c"]["body"]["user_id"] == "user-1"
+    assert items["echo"]["body"] == {"room": "Кухня"}
+    assert items["missing"]["status"] == 404 and items["missing"]["body"] == {"detail": "Not here"}
+    assert items["pixel"]["body_encoding"] == "base64" and base64.b64decode(items["pixel"]["body"]) == b"\x89PNG\x00"
+    assert items["loop"]["status"] == 400
+
+
+def test_limits_on_count_size_and_time():
+    """Test the request count, response size and per-request timeout limits"""
+    app = build_app(max_requests=3, max_response_bytes=3000, timeout=0.05)
+    assert post_batch(app, [{"path": "/api/missing"}] * 4).status_code == 413
+
+    items = post_batch(app, [
+        {"path": "/api/big"}, {"path": "/api/big"}, {"path": "/api/slow/late"}
+    ]).json()["responses"]
+    assert [item["status"] for item in items] == [200, 413, 504]
@@ -0,0 +1,188 @@
+"""
+Tests for client autocomplete
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from client_search import (
+    TOP_K, ClientSearch, ClientSearchIndex, ClientSearchSegment, IndexNotReadyError, SegmentedClientIndex,
+    _encode, build_segment, client_tokens, fold, rank
+)
+from dashboard_store import InMemoryDashboardStore
+
+
+def client(client_id: str, name: str, projects: int = 0, days_ago: int = 0, **fields):
+    last_contact = (datetime(2026, 10, 1) - timedelta(days=days_ago)).isoformat()
+    return {"id": client_id, "name": name, "email": f"{client_id}@example.com", "projects_count": projects,
+            "last_contact": last_contact, **fields}
+
+
+def names(results):
+    return [result["name"] for result in results]
+
+
+def test_folding_prefixes_substrings_and_ranking():
+    """Test case and diacritic folding in both scripts, word prefixes before substrings, and rank order"""
+    index = ClientSearchIndex()
+    index.rebuild([
+        client("1", "Sarah Wilson", projects=3, company="Wilson Properties", tags=["VIP"]),
+        client("2", "José Álvarez", projects=1),
+        client("3", "Ольга Ёлкина", projects=5),
+        client("4", "Sara Lee", projects=3, days_ago=10),
+        client("5", "Will Sarawak", projects=0),
+        client("6", "Jean Dawilson", projects=9),
+    ])
+
+    assert fold("ЁЛКА Crème") == "елка creme"
+    assert names(index.search("jose")) == ["José Álvarez"]
+    assert names(index.search("ОЛЬГА ел")) == ["Ольга Ёлкина"]
+    # Same projects_count: the more recent contact first
+    assert names(index.search("sar")) == ["Sarah Wilson", "Sara Lee", "Will Sarawak"]
+    assert names(index.search("sar wil")) == ["Sarah Wilson", "Will Sarawak"]
+    # Prefix matches first, then matches inside words, each in rank order
+    assert names(index.search("wilson")) == ["Sarah Wilson", "Jean Dawilson"]
+    assert names(index.search("vip")) == ["Sarah Wilson"]
+    # Words longer than the trie depth are checked on the client
+    assert names(index.search("sarawak")) == ["Will Sarawak"]
+    assert names(index.search("propertie")) == ["Sarah Wilson"] and index.search("propertiez") == []
+    assert names(index.search("sar", limit=1)) == ["Sarah Wilson"]
+    assert index.search("zzz") == [] and index.search("  ") == []
+
+
+SYLLABLES = ["an", "na", "ol", "ga", "ser", "ge", "ма", "ри", "ан", "на", "é", "lo"]
+
+
+def random_writes(rng, index, clients, steps, ids):
+    """Apply random adds, updates and removals to an index and to the clients it should hold"""
+    for _ in range(steps):
+        client_id = str(rng.randrange(ids))
+        if client_id in clients and rng.random() < 0.4:
+            del clients[client_id]
+            index.remove(client_id)
+        else:
+            name = " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))) for _ in range(2))
+            clients[client_id] = client(client_id, name, projects=rng.randrange(5), days_ago=rng.randrange(30))
+            index.add(clients[client_id])
+
+
+def assert_matches_a_fresh_scan(index, clients):
+    for query in ("a", "an", "ма", "о", "se", "e", "nag", "риа", "an ol"):
+        terms = [fold(word) for word in query.split()]
+        ranked = sorted(clients.values(), key=rank)
+        expected = [item for item in ranked
+                    if all(any(word.startswith(term) for word in client_tokens(item)) for term in terms)]
+        if all(len(term) >= 3 for term in terms):
+            expected += [item for item in ranked if item not in expected
+                         and all(any(term in word for word in client_tokens(item)) for term in terms)]
+        assert index.search(query, TOP_K) == expected[:TOP_K]
+
+
+def test_incremental_updates_match_a_fresh_scan():
+    """Test that random adds, updates and removals, before and after a rebuild, keep results equal to a
+    brute-force search"""
+    rng = random.Random(7)
+    index, clients = ClientSearchIndex(), {}
+    for step in range(60):
+        random_writes(rng, index, clients, 50, ids=400)
+        if step == 30:
+            index.rebuild(list(clients.values()))
+        assert_matches_a_fresh_scan(index, clients)
+
+
+def test_writes_over_a_segment_match_a_fresh_scan(tmp_path):
+    """Test that a segment, with random writes layered over it until its stored top lists run out,
+    gives the results of a brute-force search"""
+    rng = random.Random(11)
+    clients = {}
+    random_writes(rng, ClientSearchIndex(), clients, 3000, ids=2000)
+    source = tmp_path / "clients.jsonl"
+    source.write_bytes(b"".join(_encode(item) + b"\n" for item in clients.values()))
+    index = SegmentedClientIndex(ClientSearchSegment(build_segment(str(source), str(tmp_path / "clients-1.seg"), 1)))
+    assert index.version == 1 and len(index) == len(clients)
+    assert_matches_a_fresh_scan(index, clients)
+    for _ in range(20):
+        random_writes(rng, index, clients, 100, ids=2000)
+        assert_matches_a_fresh_scan(index, clients)
+    assert len(index) == len(clients)
+
+
+class Channel:
+    """In-process stand-in for the Redis channel: every worker's feed receives every message"""
+
+    def __init__(self):
+        self.deliveries = []
+
+    def feed(self):
+        channel = self
+
+        class Feed:
+            async def start(self, deliver):
+                channel.deliveries.append(deliver)
+
+            async def publish(self, message):
+                for deliver in channel.deliveries:
+                    deliver(message)
+
+            async def stop(self):
+                pass
+
+        return Feed()
+
+
+def test_workers_share_a_segment_and_apply_each_others_writes_from_the_feed(tmp_path):
+    """Test that a worker maps the segment another one built, refuses searches before it has one, and gets
+    a write made on another worker from the feed without a rebuild"""
+    async def scenario():
+        store, channel = InMemoryDashboardStore(), Channel()
+        await store.seed("clients", [client("1", "Sarah Wilson")])
+        first = ClientSearch(store, channel.feed(), directory=str(tmp_path))
+        second = ClientSearch(store, channel.feed(), directory=str(tmp_path))
+        await first.start()
+        with pytest.raises(IndexNotReadyError):
+            await first.search("sa")
+        await first._rebuild
+        await second.start()
+        await second._rebuild
+        before = await second.search("sa")
+        built = second.index
+        shared = built.segment.path == first.index.segment.path
+
+        created = await store.create("clients", client("", "Samuel Stone", projects=1))
+        await first.write(created["id"], created)
+        await store.delete("clients", "1")
+        await first.write("1", None)
+        after = await second.search("sa")
+        in_step = second.index is built and second.index.version == await store.version("clients")
+        await first.stop()
+        await second.stop()
+        return before, after, shared, in_step
+
+    before, after, shared, in_step = asyncio.run(scenario())
+    assert names(before) == ["Sarah Wilson"] and shared
+    assert names(after) == ["Samuel Stone"] and in_step
+
+
+def test_missed_writes_rebuild_in_the_background():
+    """Test that a change that never reached the feed is caught up by a rebuild while the old index serves"""
+    async def scenario():
+        store = InMemoryDashboardStore()
+        await store.seed("clients", [client("1", "Sarah Wilson")])
+        search = ClientSearch(store, catch_up_after=0)
+        await search.start()
+        await search._rebuild
+
+        await store.create("clients", client("", "Saoirse Kelly", projects=2))
+        noticed = await search.search("sa")
+        served_meanwhile = await search.search("sa")
+        await search._rebuild
+        caught_up = await search.search("sa")
+        await search.stop()
+        return noticed, served_meanwhile, caught_up
+
+    noticed, served_meanwhile, caught_up = asyncio.run(scenario())
+    assert names(noticed) == names(served_meanwhile) == ["Sarah Wilson"]
+    assert names(caught_up) == ["Saoirse Kelly", "Sarah Wilson"]
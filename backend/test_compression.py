@@ -0,0 +1,84 @@
+"""
+Tests for response compression
+"""
+
+import asyncio
+import zlib
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+
+from compression import CompressionMiddleware, negotiate
+
+brotli = pytest.importorskip("brotli")
+
+ANALYSIS = {"rooms": [{"name": "Гостиная", "description": "Светлая комната с двумя окнами на юг " * 20}] * 10}
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/large")
+    async def large():
+        return ANALYSIS
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for index in range(3):
+                yield f'{{"event": {index}, "text": "{"Описание " * 200}"}}\n'
+        return StreamingResponse(chunks(), media_type="application/x-ndjson; charset=utf-8")
+
+    @app.get("/png")
+    async def png():
+        return Response(content=b"\x89PNG" + bytes(4096), media_type="image/png")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, offload_size=8192)
+    return app
+
+
+def fetch(path: str, accept_encoding: str) -> httpx.Response:
+    async def scenario():
+        transport = httpx.ASGITransport(app=build_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            request = client.build_request("GET", path, headers={"accept-encoding": accept_encoding})
+            response = await client.send(request, stream=True)
+            response.raw = b"".join([chunk async for chunk in response.aiter_raw()])
+            return response
+    return asyncio.run(scenario())
+
+
+def test_negotiate_prefers_brotli_and_honours_q_values():
+    """Test Accept-Encoding negotiation"""
+    assert negotiate("gzip, deflate, br") == "br"
+    assert negotiate("gzip, br;q=0") == "gzip"
+    assert negotiate("br;q=0.5, gzip;q=0.8") == "gzip"
+    assert negotiate("identity") is None
+    assert negotiate("*") == "br"
+    assert negotiate("gzip, br", brotli_enabled=False) == "gzip"
+
+
+def test_middleware_compresses_large_and_streamed_bodies_only():
+    """Test the threshold, whole-body and streaming compression, and pass-through of images"""
+    small = fetch("/small", "br")
+    assert "content-encoding" not in small.headers and small.raw == b'{"ok":true}'
+
+    large = fetch("/large", "br")
+    assert large.headers["content-encoding"] == "br" and large.headers["vary"] == "Accept-Encoding"
+    assert int(large.headers["content-length"]) == len(large.raw) < 2000
+    assert brotli.decompress(large.raw).decode() == fetch("/large", "identity").raw.decode()
+
+    streamed = fetch("/stream", "gzip")
+    assert streamed.headers["content-encoding"] == "gzip" and "content-length" not in streamed.headers
+    lines = zlib.decompress(streamed.raw, 31).decode().splitlines()
+    assert len(lines) == 3 and lines[2].startswith('{"event": 2')
+
+    png = fetch("/png", "br")
+    assert "content-encoding" not in png.headers and len(png.raw) == 4100
+
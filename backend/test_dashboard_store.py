@@ -0,0 +1,197 @@
+"""
+Tests for the shared dashboard store
+"""
+
+import asyncio
+from datetime import datetime
+
+from dashboard_store import InMemoryDashboardStore, SQLDashboardStore, counter_key
+
+SEED = [
+    {"id": "1", "title": "Analyze floor plan", "completed": False},
+    {"id": "2", "title": "Kitchen concepts", "completed": True},
+]
+
+
+def test_sql_store_is_consistent_across_workers(tmp_path):
+    """Test that two stores on one database behave like one shared dashboard"""
+    database_url = f"sqlite:///{tmp_path / 'dashboard.db'}"
+
+    async def scenario():
+        worker_a = SQLDashboardStore(database_url)
+        worker_b = SQLDashboardStore(database_url)
+        for store in (worker_a, worker_b):
+            await store.start()
+            await store.seed("tasks", SEED)
+
+        created = await asyncio.gather(*(
+            store.create("tasks", {"title": f"task {i}", "completed": False})
+            for i, store in enumerate([worker_a, worker_b] * 3)
+        ))
+        deleted = await worker_b.delete("tasks", "1")
+        toggled = await worker_a.modify("tasks", "2", lambda task: task.update(completed=not task["completed"]))
+        missing = await worker_a.replace("tasks", "999", {"title": "nope"})
+        tasks = await worker_a.list("tasks")
+        await worker_a.close()
+        await worker_b.close()
+        return created, deleted, toggled, missing, tasks
+
+    created, deleted, toggled, missing, tasks = asyncio.run(scenario())
+    assert sorted(int(task["id"]) for task in created) == [3, 4, 5, 6, 7, 8]
+    assert deleted["title"] == "Analyze floor plan"
+    assert toggled["completed"] is False
+    assert missing is None
+    assert [task["id"] for task in tasks] == ["2", "3", "4", "5", "6", "7", "8"]
+
+
+def test_memory_store_assigns_ids_after_seed():
+    """Test that new items never reuse the id of a deleted one"""
+    async def scenario():
+        store = InMemoryDashboardStore()
+        await store.seed("clients", SEED)
+        await store.delete("clients", "2")
+        return await store.create("clients", {"title": "new"})
+
+    assert asyncio.run(scenario())["id"] == "3"
+
+
+def test_versions_bump_only_on_mutation(tmp_path):
+    """Test that every successful write bumps the collection version and misses do not"""
+    async def scenario(store):
+        await store.start()
+        versions = [await store.version("tasks")]
+        await store.seed("tasks", SEED)
+        versions.append(await store.version("tasks"))
+        await store.create("tasks", {"title": "new", "completed": False})
+        await store.modify("tasks", "1", lambda task: task.update(completed=True))
+        await store.replace("tasks", "2", {"title": "renamed", "completed": True})
+        await store.delete("tasks", "3")
+        versions.append(await store.version("tasks"))
+        await store.delete("tasks", "999")
+        await store.modify("tasks", "999", lambda task: None)
+        versions.append(await store.version("tasks"))
+        versions.append(await store.version("clients"))
+        await store.close()
+        return versions
+
+    for store in (InMemoryDashboardStore(), SQLDashboardStore(f"sqlite:///{tmp_path / 'dashboard.db'}")):
+        assert asyncio.run(scenario(store)) == [0, 1, 5, 5, 0]
+
+
+def test_pages_follow_the_cursor_and_filters_use_current_values(tmp_path):
+    """Test keyset paging, filters on indexed fields and reindexing after writes"""
+    tasks = [{"id": str(i), "title": f"task {i}", "category": "design" if i % 2 else "client",
+              "priority": "high" if i % 3 == 0 else "low", "completed": False} for i in range(1, 11)]
+
+    async def scenario(store):
+        await store.start()
+        await store.seed("tasks", tasks)
+        first, cursor = await store.page("tasks", limit=4)
+        second, cursor = await store.page("tasks", limit=4, after=cursor)
+        third, last = await store.page("tasks", limit=4, after=cursor)
+        await store.modify("tasks", "3", lambda task: task.update(completed=True))
+        await store.delete("tasks", "9")
+        await store.replace("tasks", "2", {**tasks[1], "priority": "high"})
+        high, _ = await store.page("tasks", filters={"priority": "high"})
+        open_design, _ = await store.page("tasks", limit=2, filters={"category": "design", "completed": False})
+        done, _ = await store.page("tasks", filters={"completed": True})
+        await store.close()
+        ids = lambda items: [item["id"] for item in items]  # noqa: E731
+        return ids(first), ids(second), ids(third), last, ids(high), ids(open_design), ids(done)
+
+    for store in (InMemoryDashboardStore(), SQLDashboardStore(f"sqlite:///{tmp_path / 'dashboard.db'}")):
+        first, second, third, last, high, open_design, done = asyncio.run(scenario(store))
+        assert (first, second, third, last) == (["1", "2", "3", "4"], ["5", "6", "7", "8"], ["9", "10"], None)
+        assert high == ["2", "3", "6"]
+        assert open_design == ["1", "5"]
+        assert done == ["3"]
+
+
+def test_range_index_answers_per_client_time_windows(tmp_path):
+    """Test time-window queries per partition, filters, the next-action index and reindexing"""
+    interactions = [
+        {"id": str(i), "client_id": "1" if i % 2 else "2", "interaction_type": "call" if i % 3 else "email",
+         "created_at": f"2025-03-{i:02d}T10:00:00", "next_action": "Send quote" if i in (1, 3) else None}
+        for i in range(1, 11)
+    ]
+
+    async def scenario(store):
+        await store.start()
+        await store.seed("interactions", interactions)
+        window = await store.range("interactions", "timeline", "1", since="2025-03-03", until="2025-03-07T10:00:00")
+        latest = await store.range("interactions", "timeline", "1", limit=2, descending=True)
+        emails = await store.range("interactions", "timeline", "1", filters={"interaction_type": "email"})
+        before = await store.range("interactions", "next_actions", "1", limit=1, descending=True)
+        await store.modify("interactions", "3", lambda item: item.update(next_action=None))
+        await store.modify("interactions", "9", lambda item: item.update(client_id="2"))
+        after = await store.range("interactions", "next_actions", "1", limit=1, descending=True)
+        moved = await store.range("interactions", "timeline", "2", since=datetime(2025, 3, 8))
+        await store.close()
+        ids = lambda items: [item["id"] for item in items]  # noqa: E731
+        return ids(window), ids(latest), ids(emails), ids(before), ids(after), ids(moved)
+
+    for store in (InMemoryDashboardStore(), SQLDashboardStore(f"sqlite:///{tmp_path / 'dashboard.db'}")):
+        window, latest, emails, before, after, moved = asyncio.run(scenario(store))
+        assert window == ["3", "5", "7"]
+        assert latest == ["9", "7"]
+        assert emails == ["3", "9"]
+        assert (before, after) == (["3"], ["1"])
+        assert moved == ["8", "9", "10"]
+
+
+def test_counters_follow_every_write_across_workers(tmp_path):
+    """Test that totals and per-value counters change with each write and are shared by workers"""
+    async def scenario(stores):
+        for store in stores:
+            await store.start()
+            await store.seed("tasks", [dict(task, category="design") for task in SEED])
+        first, second = stores[0], stores[-1]
+        await first.create("tasks", {"title": "new", "completed": True, "category": "client"})
+        await second.modify("tasks", "1", lambda task: task.update(completed=True))
+        await first.delete("tasks", "2")
+        await second.increment("ai", "designs_generated")
+        await first.increment("ai", "designs_generated", 2)
+        counts = await second.counts("tasks"), await first.counts("ai")
+        for store in stores:
+            await store.close()
+        return counts
+
+    database_url = f"sqlite:///{tmp_path / 'dashboard.db'}"
+    for stores in ([InMemoryDashboardStore()], [SQLDashboardStore(database_url), SQLDashboardStore(database_url)]):
+        tasks, ai = asyncio.run(scenario(stores))
+        assert tasks["total"] == 2
+        assert tasks[counter_key("completed", True)] == 2 and tasks[counter_key("completed", False)] == 0
+        assert tasks[counter_key("category", "design")] == 1 and tasks[counter_key("category", "client")] == 1
+        assert ai == {"designs_generated": 3}
+
+
+def test_modify_many_is_one_all_or_nothing_write(tmp_path):
+    """Test that bulk changes apply together with one version bump and roll back when a modifier fails"""
+    async def scenario(store):
+        await store.start()
+        await store.seed("tasks", SEED + [{"id": "3", "title": "Client meeting", "completed": False}])
+        before = await store.version("tasks")
+
+        def fail(task):
+            raise ValueError("invalid")
+
+        try:
+            await store.modify_many("tasks", {"1": lambda task: task.update(completed=True), "3": fail})
+        except ValueError:
+            pass
+        unchanged = await store.version("tasks") == before and not (await store.get("tasks", "1"))["completed"]
+        results = await store.modify_many("tasks", {
+            "1": lambda task: task.update(completed=True), "2": None, "404": None,
+        })
+        state = await store.version("tasks") - before, await store.list("tasks"), await store.counts("tasks")
+        await store.close()
+        return unchanged, results, state
+
+    for store in (InMemoryDashboardStore(), SQLDashboardStore(f"sqlite:///{tmp_path / 'dashboard.db'}")):
+        unchanged, results, (bumps, tasks, counts) = asyncio.run(scenario(store))
+        assert unchanged
+        assert list(results) == ["1", "2", "404"]
+        assert results["1"]["completed"] and results["2"]["title"] == "Kitchen concepts" and results["404"] is None
+        assert bumps == 1
+        assert [task["id"] for task in tasks] == ["1", "3"]
+        assert counts["total"] == 2 and counts[counter_key("completed", True)] == 1
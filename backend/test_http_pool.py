@@ -0,0 +1,51 @@
+"""
+Tests for the shared upstream HTTP connection pool
+"""
+
+import asyncio
+
+from http_pool import HTTPClientPool
+
+
+async def serve_ok(reader, writer):
+    """Minimal keep-alive HTTP/1.1 server"""
+    try:
+        while True:
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def test_connections_are_reused_per_host():
+    """Test that sequential calls share one keep-alive connection and one DNS lookup"""
+    async def scenario():
+        server = await asyncio.start_server(serve_ok, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        pool = HTTPClientPool(http2=False)
+        url = f"http://localhost:{port}/ping"
+
+        client = pool.client_for(url)
+        assert pool.client_for(f"http://LOCALHOST:{port}/other") is client
+        for _ in range(20):
+            response = await client.get(url)
+            assert response.text == "ok"
+
+        backend = client._transport._pool._network_backend
+        stats = pool.stats()[f"http://localhost:{port}"]
+        await pool.aclose()
+        server.close()
+        await server.wait_closed()
+        return stats, backend
+
+    stats, backend = asyncio.run(scenario())
+    assert stats["requests"] == 20
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 19
+    assert stats["reuse_ratio"] == 0.95
+    assert stats["in_flight"] == 0
+    assert stats["pool_wait_max_ms"] >= 0
+    assert len(backend._cache) == 1
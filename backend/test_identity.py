@@ -0,0 +1,40 @@
+"""
+Tests for request identity (trusted proxies and signed user tokens)
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+from core.identity import authenticated_user, parse_networks, sign_user_token, verify_user_token
+
+
+def scope(peer, query=b"", **headers):
+    return {"client": (peer, 50000), "query_string": query,
+            "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]}
+
+
+def test_user_tokens_are_signed_and_expire():
+    """Test that only unexpired tokens signed with the secret name a user"""
+    token = sign_user_token("user_2ab.c", "secret", ttl=60, now=1000)
+
+    assert verify_user_token(token, "secret", now=1059) == "user_2ab.c"
+    assert verify_user_token(token, "secret", now=1061) is None
+    assert verify_user_token(token, "other", now=1000) is None
+    assert verify_user_token(token, "", now=1000) is None
+    encoded, expires, signature = token.split(".")
+    assert verify_user_token(f"{encoded}.{int(expires) + 3600}.{signature}", "secret", now=1000) is None
+    assert verify_user_token("é.1.x", "secret") is None
+
+
+def test_authenticated_user_ignores_unsigned_claims():
+    """Test that a plain X-User-Id counts only from a trusted proxy and a bad token never falls back"""
+    trusted = parse_networks(["127.0.0.1"])
+    token = sign_user_token("user-1", "secret")
+
+    assert authenticated_user(scope("203.0.113.9", x_user_id="user-1"), trusted, "secret") is None
+    assert authenticated_user(scope("127.0.0.1", x_user_id="user-1"), trusted, "secret") == "user-1"
+    assert authenticated_user(scope("203.0.113.9", authorization=f"Bearer {token}"), trusted, "secret") == "user-1"
+    assert authenticated_user(scope("203.0.113.9", query=f"token={token}".encode()), trusted, "secret") == "user-1"
+    assert authenticated_user(scope("127.0.0.1", authorization="Bearer forged", x_user_id="user-1"),
+                              trusted, "secret") is None
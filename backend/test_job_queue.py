@@ -0,0 +1,95 @@
+"""
+Tests for the AI job queue
+"""
+
+import asyncio
+
+import pytest
+
+from job_queue import InMemoryJobStore, JobQueue, JobStatus, QueueFullError
+
+
+def test_jobs_run_in_priority_order():
+    """Test that queued jobs complete and higher priority jobs run first"""
+    order = []
+
+    async def handler(payload):
+        order.append(payload["name"])
+        return {"name": payload["name"]}
+
+    async def scenario():
+        queue = JobQueue(InMemoryJobStore(), workers=1, max_size=10)
+        queue.register("echo", handler)
+        await queue.start()
+        # Let the single worker take the first job before the others are queued
+        blocker = await queue.submit("echo", {"name": "first"})
+        await asyncio.sleep(0)
+        low = await queue.submit("echo", {"name": "low"}, priority=9)
+        high = await queue.submit("echo", {"name": "high"}, priority=0)
+        await queue._queue.join()
+        jobs = [await queue.get(job.id) for job in (blocker, low, high)]
+        await queue.stop()
+        return jobs
+
+    jobs = asyncio.run(scenario())
+    assert [job.status for job in jobs] == [JobStatus.COMPLETED] * 3
+    assert jobs[2].result == {"name": "high"}
+    assert order == ["first", "high", "low"]
+
+
+def test_failed_jobs_and_full_queue():
+    """Test that handler errors are recorded and the queue is bounded"""
+    async def failing(payload):
+        raise ValueError("model unavailable")
+
+    async def scenario():
+        queue = JobQueue(InMemoryJobStore(), workers=1, max_size=1)
+        queue.register("fail", failing)
+        await queue.start()
+        job = await queue.submit("fail", {})
+        await queue._queue.join()
+        failed = await queue.get(job.id)
+        await queue.stop()
+
+        # No workers, so the single slot stays occupied
+        idle = JobQueue(InMemoryJobStore(), workers=0, max_size=1)
+        idle.register("fail", failing)
+        await idle.start()
+        await idle.submit("fail", {})
+        with pytest.raises(QueueFullError):
+            await idle.submit("fail", {})
+        return failed
+
+    failed = asyncio.run(scenario())
+    assert failed.status == JobStatus.FAILED
+    assert failed.error == "model unavailable"
+
+
+def test_queued_state_is_saved_before_a_worker_can_run_the_job():
+    """Test that a slow store write of QUEUED cannot land after the worker's RUNNING"""
+    class SlowStore(InMemoryJobStore):
+        saved = []
+
+        async def save(self, job, ttl):
+            status = job.status
+            if status == JobStatus.QUEUED:
+                await asyncio.sleep(0.01)
+            self.saved.append(status)
+            await super().save(job.model_copy(), ttl)
+
+    async def handler(payload):
+        return "done"
+
+    async def scenario():
+        queue = JobQueue(SlowStore(), workers=1, max_size=10)
+        queue.register("echo", handler)
+        await queue.start()
+        job = await queue.submit("echo", {})
+        await queue._queue.join()
+        stored = await queue.get(job.id)
+        await queue.stop()
+        return stored
+
+    stored = asyncio.run(scenario())
+    assert SlowStore.saved == [JobStatus.QUEUED, JobStatus.RUNNING, JobStatus.COMPLETED]
+    assert stored.status == JobStatus.COMPLETED
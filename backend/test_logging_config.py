@@ -0,0 +1,59 @@
+"""
+Tests for structured logging configuration
+"""
+
+import io
+import json
+import logging
+import threading
+
+from logging_config import configure_logging, get_logger, parse_levels, shutdown_logging
+
+
+def test_events_are_rendered_off_the_calling_thread():
+    """Test that events reach the stream as JSON from the listener thread, with per-module levels applied"""
+    stream = io.StringIO()
+    threads = []
+    handler = configure_logging("INFO", "json", module_levels="noisy=WARNING", stream=stream)
+    original_emit = logging.StreamHandler.emit
+
+    def recording_emit(self, record):
+        threads.append(threading.current_thread().name)
+        original_emit(self, record)
+
+    logging.StreamHandler.emit = recording_emit
+    try:
+        get_logger("svc").info("svc.event", tokens=12)
+        get_logger("svc").debug("svc.hidden")
+        get_logger("noisy").info("noisy.hidden")
+        get_logger("noisy").warning("noisy.shown")
+        logging.getLogger("stdlib").error("plain %s", "record")
+        shutdown_logging()
+    finally:
+        logging.StreamHandler.emit = original_emit
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["event"] for line in lines] == ["svc.event", "noisy.shown", "plain record"]
+    assert lines[0]["tokens"] == 12 and lines[0]["logger"] == "svc" and lines[0]["level"] == "info"
+    assert lines[2]["level"] == "error" and "timestamp" in lines[2]
+    assert threads and threading.main_thread().name not in threads
+    assert handler.dropped == 0
+
+
+def test_sampling_and_full_queue_drop_events():
+    """Test that sample rates thin out events and a full queue drops records instead of blocking"""
+    stream = io.StringIO()
+    handler = configure_logging("DEBUG", "json", sample_rates="debug=0", stream=stream)
+    logger = get_logger("sampled")
+    logger.debug("sampled.never")
+    logger.info("sampled.kept")
+    logger.info("sampled.override", sample=0)
+    shutdown_logging()
+    assert [json.loads(line)["event"] for line in stream.getvalue().splitlines()] == ["sampled.kept"]
+
+    handler = configure_logging("INFO", "json", queue_size=1, stream=io.StringIO())
+    for _ in range(5000):
+        logger.info("flood")
+    shutdown_logging()
+    assert handler.dropped > 0
+    assert parse_levels("a=debug, b.c=WARNING") == {"a": "DEBUG", "b.c": "WARNING"}
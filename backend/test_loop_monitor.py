@@ -0,0 +1,50 @@
+"""
+Tests for the event loop lag monitor
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+from core.loop_monitor import LagHistogram, LoopMonitor
+
+
+def blocking_db_call():
+    time.sleep(0.3)
+
+
+def test_blocking_call_is_named_in_metrics():
+    """Test that a sync call inside a coroutine is captured by the watchdog and counted with its duration"""
+    async def handler():
+        blocking_db_call()
+
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, threshold=0.1)
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        await handler()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    [(function, count)] = monitor.blocked_calls.items()
+    assert function.startswith("blocking_db_call (test_loop_monitor.py:") and count == 1
+    assert 0.25 <= monitor.blocked_seconds[function] < 1
+    assert any("handler (test_loop_monitor.py" in line for line in monitor.last_block.stack)
+    assert monitor.histogram.max >= 0.25 and monitor.histogram.count >= 5
+
+    text = monitor.prometheus()
+    assert 'event_loop_lag_seconds_bucket{le="+Inf"} %d' % monitor.histogram.count in text
+    assert 'event_loop_blocked_total{function="blocking_db_call (test_loop_monitor.py:' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test bucket placement at the boundaries"""
+    histogram = LagHistogram(buckets=(0.01, 0.1))
+    for value in (0.0, 0.01, 0.05, 2.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [2, 3, 4]
+    assert histogram.max == 2.0
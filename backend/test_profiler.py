@@ -0,0 +1,78 @@
+"""
+Tests for the on-demand profiler
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from profiler import RequestProfileMiddleware, create_debug_router
+
+TOKEN = "s3cret"
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        return {"total": sum(i * i for i in range(20000))}
+
+    app.include_router(create_debug_router(TOKEN, max_seconds=5))
+    app.add_middleware(RequestProfileMiddleware, admin_token=TOKEN)
+    return app
+
+
+def test_profile_endpoint_samples_busy_threads():
+    """Test that /debug/profile is admin-only and finds a CPU-bound thread in the collapsed stacks"""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=build_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            anonymous = await client.get("/debug/profile", params={"seconds": 0.2})
+            too_long = await client.get("/debug/profile", params={"seconds": 10}, headers={"x-admin-token": TOKEN})
+            started = time.perf_counter()
+            profile = await client.get("/debug/profile", params={"seconds": 0.3, "rate": 200},
+                                       headers={"x-admin-token": TOKEN})
+            return anonymous, too_long, profile, time.perf_counter() - started
+
+    try:
+        anonymous, too_long, profile, elapsed = asyncio.run(scenario())
+    finally:
+        stop.set()
+        worker.join()
+
+    assert anonymous.status_code == 404
+    assert too_long.status_code == 400
+    assert profile.status_code == 200 and 0.3 <= elapsed < 2
+    lines = profile.text.splitlines()
+    assert int(profile.headers["x-profile-samples"]) >= 30
+    assert any(line.startswith("busy-worker;") and "busy_loop (test_profiler.py:" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_x_profile_returns_cprofile_report():
+    """Test that X-Profile: 1 replaces the response with a cProfile report for admins only"""
+    async def scenario():
+        transport = httpx.ASGITransport(app=build_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            normal = await client.get("/slow", headers={"x-profile": "1"})
+            profiled = await client.get("/slow", headers={"x-profile": "1", "x-admin-token": TOKEN})
+            return normal, profiled
+
+    normal, profiled = asyncio.run(scenario())
+    assert normal.json()["total"] > 0
+    assert profiled.headers["x-profile-status"] == "200"
+    assert profiled.text.startswith("GET /slow -> 200")
+    assert "test_profiler.py" in profiled.text and "slow" in profiled.text
@@ -0,0 +1,62 @@
+"""
+Tests for the shared GCRA rate limiter
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+from core.rate_limit import InMemoryRateLimiter, RateLimit, RateLimitMiddleware
+
+
+def test_limit_allows_burst_then_rejects():
+    """Test that a full burst is allowed and the next request gets Retry-After"""
+    async def scenario():
+        limiter = InMemoryRateLimiter()
+        limit = RateLimit(requests=5, period=60)
+        results = [await limiter.hit("ip:1:GET:/api/x", limit) for _ in range(6)]
+        other = await limiter.hit("ip:2:GET:/api/x", limit)
+        return results, other
+
+    results, other = asyncio.run(scenario())
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert results[0].remaining == 4
+    assert results[4].remaining == 0
+    assert 11 < results[5].retry_after <= 12
+    assert other.allowed and other.remaining == 4
+
+
+def test_decision_is_sub_millisecond():
+    """Test that an in-process decision takes well under a millisecond"""
+    async def scenario():
+        limiter = InMemoryRateLimiter()
+        limit = RateLimit(requests=1000000, period=60)
+        start = time.perf_counter()
+        for i in range(10000):
+            await limiter.hit(f"ip:{i % 500}:GET:/api/dashboard/tasks", limit)
+        return (time.perf_counter() - start) / 10000
+
+    assert asyncio.run(scenario()) < 0.001
+
+
+def test_client_id_trusts_headers_only_from_proxies():
+    """Test that X-User-Id and forwarded addresses count only when a trusted proxy sent them"""
+    def scope(peer, **headers):
+        return {"client": (peer, 50000),
+                "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]}
+
+    spoofed = scope("203.0.113.9", x_user_id="admin", x_forwarded_for="10.0.0.1", x_real_ip="10.0.0.2")
+    default = RateLimitMiddleware(None, InMemoryRateLimiter(), RateLimit(10, 60))
+    proxied = RateLimitMiddleware(None, InMemoryRateLimiter(), RateLimit(10, 60), trust_forwarded=True,
+                                  trusted_proxies=["127.0.0.1", "10.0.0.0/8"])
+
+    assert default._client_id(spoofed) == "ip:203.0.113.9"
+    assert default._client_id(scope("127.0.0.1", x_user_id="user-1")) == "ip:127.0.0.1"
+    assert proxied._client_id(spoofed) == "ip:203.0.113.9"
+    assert proxied._client_id(scope("127.0.0.1", x_user_id="user-1")) == "u:user-1"
+    assert proxied._client_id(scope("127.0.0.1", x_real_ip="198.51.100.7")) == "ip:198.51.100.7"
+    # The client can prepend anything; the rightmost address that is not a proxy is the one that connected
+    assert proxied._client_id(scope("127.0.0.1", x_forwarded_for="1.2.3.4, 198.51.100.7, 10.0.0.5")) == \
+        "ip:198.51.100.7"
@@ -0,0 +1,57 @@
+"""
+Tests for the cached readiness checks
+"""
+
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from readiness import ReadinessChecker, create_health_router
+
+
+def test_readyz_serves_cached_results():
+    """Test that probes never run checks, critical failures return 503 and stale results fail"""
+    calls = {"database": 0, "upstream": 0}
+    database_up = {"value": False}
+
+    async def database():
+        calls["database"] += 1
+        if not database_up["value"]:
+            raise ConnectionError("refused")
+
+    async def upstream():
+        calls["upstream"] += 1
+        await asyncio.sleep(1)
+
+    checker = ReadinessChecker(interval=60, timeout=0.05, ttl=60)
+    checker.add("database", database)
+    checker.add("upstream", upstream, critical=False)
+    app = FastAPI()
+    app.include_router(create_health_router(checker))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            before = await client.get("/readyz")
+            await checker.run_checks()
+            down = [await client.get("/readyz") for _ in range(5)]
+            database_up["value"] = True
+            await checker.run_checks()
+            up = await client.get("/readyz")
+            checker.ttl = 0
+            time.sleep(0.01)
+            stale = await client.get("/readyz")
+            live = await client.get("/livez")
+            return before, down, up, stale, live
+
+    before, down, up, stale, live = asyncio.run(scenario())
+    assert before.status_code == 503 and before.json()["checks"]["database"]["error"] == "not checked yet"
+    assert calls == {"database": 2, "upstream": 2}
+    assert all(r.status_code == 503 for r in down)
+    assert down[0].json()["checks"]["database"]["error"] == "ConnectionError: refused"
+    assert up.status_code == 200 and up.json()["status"] == "degraded"
+    assert up.json()["checks"]["upstream"]["error"].startswith("timed out")
+    assert stale.status_code == 503 and stale.json()["checks"]["database"]["error"] == "stale result"
+    assert live.status_code == 200 and live.json() == {"status": "ok"}
@@ -0,0 +1,34 @@
+"""
+Tests for WebSocket event fan-out
+"""
+
+import asyncio
+import json
+
+from realtime import Connection, EventHub, InMemoryPubSub
+
+
+def test_subscriptions_are_vetted_by_authorize():
+    """Test that refused topics are reported and only allowed ones receive events"""
+    owners = {"job-1": "user-1", "job-2": "user-2"}
+
+    async def authorize(conn: Connection, topic: str) -> bool:
+        return not topic.startswith("job:") or owners.get(topic[4:]) == conn.user_id
+
+    async def scenario():
+        hub = EventHub(InMemoryPubSub())
+        await hub.start()
+        conn = Connection(None, "user-1", queue_size=10)
+        reply = await hub._handle(conn, json.dumps({"action": "subscribe", "topics": ["job:job-1", "job:job-2",
+                                                                                    "user:user-2"]}),
+                                  authorize=authorize)
+        await hub.publish("job:job-2", "completed")
+        await hub.publish("job:job-1", "completed")
+        delivered = json.loads(await conn.queue.get())
+        await hub.stop()
+        return reply, delivered
+
+    reply, delivered = asyncio.run(scenario())
+    assert reply["data"]["topics"] == ["job:job-1"]
+    assert set(reply["data"]["errors"]) == {"job:job-2", "user:user-2"}
+    assert delivered["topic"] == "job:job-1"
@@ -0,0 +1,80 @@
+"""
+Tests for the pre-encoded response cache
+"""
+
+import asyncio
+import gzip
+import json
+
+import httpx
+from fastapi import FastAPI, Request
+
+from response_cache import ResponseCache, ResponseCacheMiddleware
+
+
+def test_volatile_fields_are_spliced_and_reload_rebuilds():
+    """Test that the static part is built once, volatile fields refresh and invalidation rebuilds"""
+    builds, ticks = [], iter(range(1000))
+    config = {"ai_configured": False}
+
+    def build():
+        builds.append(1)
+        return {"catalog": ["Диван", "Стол"], "ai_configured": config["ai_configured"], "timestamp": "ignored"}
+
+    cache = ResponseCache()
+    entry = cache.register("/catalog", build, volatile={"timestamp": lambda: next(ticks)}, refresh=0)
+    app = FastAPI()
+
+    @app.get("/catalog")
+    async def catalog(request: Request):
+        return entry.response(request)
+
+    async def fetch(accept_encoding: str):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            request = client.build_request("GET", "/catalog", headers={"accept-encoding": accept_encoding})
+            response = await client.send(request, stream=True)
+            return response, b"".join([chunk async for chunk in response.aiter_raw()])
+
+    first = json.loads(asyncio.run(fetch("identity"))[1])
+    second, raw = asyncio.run(fetch("gzip"))
+    config["ai_configured"] = True
+    cache.invalidate()
+    third = json.loads(asyncio.run(fetch("identity"))[1])
+
+    assert first == {"catalog": ["Диван", "Стол"], "ai_configured": False, "timestamp": 0}
+    assert second.headers["content-encoding"] == "gzip" and second.headers["vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(raw))["timestamp"] == 1
+    assert third["ai_configured"] is True and third["timestamp"] == 2
+    assert len(builds) == 2
+
+
+def test_static_body_is_encoded_once():
+    """Test that an entry without volatile fields keeps returning the same bytes"""
+    entry = ResponseCache().register("/api/features", lambda: {})
+    assert entry.body() == b"{}" and entry.body() is entry.body()
+    assert gzip.decompress(entry.body("gzip")) == b"{}"
+
+
+def test_middleware_serves_hits_before_routing():
+    """Test that cached GETs bypass the route while other methods and paths reach the app"""
+    calls = []
+    cache = ResponseCache()
+    cache.register("/api/features", lambda: {"ai_configured": True})
+    app = FastAPI()
+
+    @app.api_route("/api/features", methods=["GET", "POST"])
+    async def features():
+        calls.append(1)
+        return {"ai_configured": False}
+
+    app.add_middleware(ResponseCacheMiddleware, cache=cache)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/features"), await client.post("/api/features")
+
+    hit, miss = asyncio.run(scenario())
+    assert hit.json() == {"ai_configured": True} and hit.headers["content-type"] == "application/json"
+    assert miss.json() == {"ai_configured": False} and len(calls) == 1
@@ -0,0 +1,68 @@
+"""
+Tests for cold-start cost of the backend
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative import time allowed for `import main`, best of several runs
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1000"))
+
+# Packages that must only be imported when the first Azure client is created
+DEFERRED_MODULES = ("openai", "azure.identity", "uvicorn")
+
+IMPORT_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def import_profile(module: str):
+    """Run `python -X importtime -c 'import <module>'` and return {module: cumulative µs} for top-level imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(3)] = int(match.group(1))
+    return modules
+
+
+def test_main_import_fits_budget():
+    """Test that importing the app stays within the import-time budget"""
+    timings = [import_profile("main")["main"] / 1000 for _ in range(3)]
+    assert min(timings) < IMPORT_BUDGET_MS, f"import main took {min(timings):.0f} ms"
+
+
+def test_heavy_clients_are_not_imported_at_startup():
+    """Test that the Azure SDKs are deferred until the first client is needed"""
+    modules = import_profile("main")
+    loaded = [name for name in DEFERRED_MODULES if name in modules]
+    assert loaded == []
+
+
+def test_registry_creates_clients_once():
+    """Test that the registry builds a client lazily and returns the same instance afterwards"""
+    from clients import ClientRegistry
+
+    registry = ClientRegistry()
+    created = []
+    registry.register("azure_openai", lambda: created.append(object()) or created[-1])
+
+    assert registry.peek("azure_openai") is None
+    first = registry.get("azure_openai")
+    assert registry.get("azure_openai") is first
+    assert len(created) == 1
+
+
+def test_ai_services_share_one_azure_client():
+    """Test that every AIService reuses the process-wide Azure OpenAI service"""
+    from ai_service import AIService, get_ai_service
+
+    assert AIService().azure_service is AIService().azure_service
+    assert get_ai_service() is get_ai_service()
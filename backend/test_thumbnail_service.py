@@ -0,0 +1,53 @@
+"""
+Tests for the design gallery thumbnail pipeline
+"""
+
+import asyncio
+
+import pytest
+from PIL import Image
+
+from thumbnail_service import ThumbnailService, THUMBNAIL_SIZES, nearest_placeholder_size
+
+
+def test_thumbnail_is_cached_by_source_hash_and_size(tmp_path):
+    """Test that thumbnails render once and land in the hash-keyed cache"""
+    images_dir = tmp_path / "generated-images"
+    images_dir.mkdir()
+    Image.new("RGB", (1600, 1200), (120, 80, 40)).save(images_dir / "design.png")
+
+    service = ThumbnailService(str(images_dir), str(tmp_path / "cache"), max_workers=1)
+    try:
+        source = service.resolve_source("/generated-images/design.png")
+        assert source is not None
+
+        first = asyncio.run(service.get_thumbnail(source, "small", "webp"))
+        mtime = first.stat().st_mtime_ns
+        second = asyncio.run(service.get_thumbnail(source, "small", "webp"))
+
+        assert first == second
+        assert second.stat().st_mtime_ns == mtime
+        assert "_200x150.webp" in first.name
+        with Image.open(first) as thumb:
+            assert thumb.size[0] <= THUMBNAIL_SIZES["small"][0]
+    finally:
+        service.shutdown()
+
+
+def test_placeholders_are_precomputed(tmp_path):
+    """Test that standard placeholder sizes are served from memory and other sizes are never rendered"""
+    service = ThumbnailService(str(tmp_path), str(tmp_path / "cache"))
+    service.warm_placeholders()
+
+    async def scenario():
+        first = await service.get_placeholder(400, 300, "webp")
+        second = await service.get_placeholder(400, 300, "webp")
+        with pytest.raises(ValueError):
+            await service.get_placeholder(1024, 1024, "webp")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert nearest_placeholder_size(1024, 700) == (800, 600) and nearest_placeholder_size(1, 1) == (200, 150)
+    assert service.resolve_source("https://cdn.example.com/image.png") is None
+    assert ThumbnailService.negotiate_format("image/png") == "png"
@@ -0,0 +1,66 @@
+"""
+Tests for request tracing and Server-Timing
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from tracing import Tracer, TracingMiddleware, span
+
+
+class CollectingExporter:
+    """Keeps finished traces in memory"""
+
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+    def shutdown(self):
+        pass
+
+
+def test_server_timing_lists_phases_and_continues_trace():
+    """Test that phases show up in Server-Timing and the exported trace keeps the caller's trace id"""
+    exporter = CollectingExporter()
+    app = FastAPI()
+
+    @app.get("/analyze/{plan_id}")
+    async def analyze(plan_id: str):
+        with span("decode"):
+            pass
+        with span("upstream") as upstream:
+            with span("prompt"):
+                pass
+            await asyncio.sleep(0.02)
+            upstream.set(tokens=42)
+        return {"plan_id": plan_id}
+
+    app.add_middleware(TracingMiddleware, tracer=Tracer(exporter))
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/analyze/7", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+
+    response = asyncio.run(scenario())
+    metrics = dict(item.split(";dur=") for item in response.headers["server-timing"].split(", "))
+    assert list(metrics) == ["decode", "upstream", "prompt", "total"]
+    assert 20 <= float(metrics["upstream"]) <= float(metrics["total"])
+
+    trace, = exporter.traces
+    assert trace.trace_id == int(trace_id, 16)
+    assert trace.root.name == "GET /analyze/{plan_id}"
+    decode, upstream, prompt = trace.spans[1:]
+    assert prompt.parent_id == upstream.span_id
+    assert upstream.attributes["tokens"] == 42
+
+
+def test_spans_outside_a_trace_are_no_ops():
+    """Test that instrumented code runs unchanged when nothing is traced"""
+    with span("upstream") as current:
+        assert current is None
@@ -0,0 +1,67 @@
+"""
+Tests for traffic capture and replay synthesis
+"""
+
+import asyncio
+import base64
+import json
+import random
+
+import httpx
+from fastapi import FastAPI, File, Form, UploadFile
+
+from traffic_capture import TrafficCaptureMiddleware, TrafficRecorder, load_captures, synthesize_request
+
+IMAGE = b"\x89PNG" + bytes(range(256)) * 64
+PROMPT = "Design a kitchen for Sarah Wilson, sarah@example.com"
+
+
+def build_app(recorder: TrafficRecorder) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/clients/{client_id}/chat")
+    async def chat(client_id: str, payload: dict):
+        return {"ok": True}
+
+    @app.post("/analyze")
+    async def analyze(file: UploadFile = File(...), room_type: str = Form(...)):
+        return {"bytes": len(await file.read())}
+
+    app.add_middleware(TrafficCaptureMiddleware, recorder=recorder)
+    return app
+
+
+def test_capture_is_sanitized_and_replayable(tmp_path):
+    """Test that captures keep shapes and sizes but no content, and replay reproduces the sizes"""
+    recorder = TrafficRecorder(str(tmp_path))
+    payload = {"message": PROMPT, "style": "modern", "image_data": base64.b64encode(IMAGE).decode()}
+
+    async def scenario():
+        await recorder.start()
+        transport = httpx.ASGITransport(app=build_app(recorder))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/api/clients/sarah-wilson/chat", json=payload, headers={"x-user-id": "user_42"})
+            await client.post("/analyze", files={"file": ("plan.png", IMAGE, "image/png")},
+                              data={"room_type": "kitchen"})
+        await recorder.stop()
+
+    asyncio.run(scenario())
+    raw = open(recorder.path, encoding="utf-8").read()
+    for secret in ("Sarah", "sarah@example.com", "user_42", "sarah-wilson", payload["image_data"][:40]):
+        assert secret not in raw
+
+    chat, upload = load_captures([recorder.path])
+    assert chat["route"] == "/api/clients/{client_id}/chat"
+    assert chat["path_params"] == {"client_id": None}
+    assert chat["shape"]["style"] == "modern"
+    assert chat["text_chars"] == len(PROMPT)
+    assert chat["status"] == 200 and chat["user"]
+    assert upload["shape"] == {"file": {"$file": len(IMAGE), "type": "image/png"}, "room_type": "kitchen"}
+
+    rng = random.Random(0)
+    method, path, kwargs = synthesize_request(chat, rng, {})
+    assert (method, path) == ("POST", "/api/clients/1/chat")
+    assert len(json.dumps(kwargs["json"])) == len(json.dumps(payload))
+    assert kwargs["headers"]["x-user-id"] == "replay-user-1"
+    _, _, kwargs = synthesize_request(upload, rng, {})
+    assert len(kwargs["files"]["file"][1]) == len(IMAGE)
@@ -0,0 +1,94 @@
+"""
+Tests for per-user token usage accounting
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+from core.exceptions import QuotaExceededError
+from usage_ledger import UsageLedger, usage_context
+
+
+def test_usage_is_attributed_flushed_and_reloaded(tmp_path):
+    """Test that usage is batched to the database and seeds a fresh ledger"""
+    database_url = f"sqlite:///{tmp_path / 'usage.db'}"
+
+    async def scenario():
+        ledger = UsageLedger(database_url, flush_interval=3600)
+        await ledger.start()
+        usage_context.set(("user-1", "chat"))
+        ledger.record_current(100, 50)
+        ledger.record_current(10, 5)
+        ledger.record("user-1", "generate-design", 1000, 500)
+        await ledger.stop()
+
+        reloaded = UsageLedger(database_url, flush_interval=3600)
+        await reloaded.start()
+        usage = await reloaded.get_usage("user-1")
+        await reloaded.stop()
+        return usage
+
+    usage = asyncio.run(scenario())
+    assert usage["daily"]["used"] == 1665
+    assert usage["monthly"]["used"] == 1665
+
+
+def test_quota_is_enforced_per_plan(tmp_path):
+    """Test that exhausted users are rejected, admins are unlimited and plans set by billing are
+    stored for every worker"""
+    database_url = f"sqlite:///{tmp_path / 'usage.db'}"
+
+    async def scenario():
+        ledger = UsageLedger(database_url, admin_users=["admin-user"])
+        await ledger.start()
+        await ledger.set_plan("pro-user", "pro")
+
+        ledger.record("user-2", "chat", 20000, 0)
+        ledger.record("pro-user", "chat", 20000, 0)
+        ledger.record("admin-user", "chat", 10 ** 9, 0)
+
+        with pytest.raises(QuotaExceededError):
+            await ledger.check_quota("user-2")
+        await ledger.check_quota("pro-user")
+        await ledger.check_quota("admin-user")
+        await ledger.check_quota("user-3")
+        await ledger.stop()
+
+        other_worker = UsageLedger(database_url)
+        await other_worker.start()
+        plans = await other_worker.get_plan("pro-user"), await other_worker.get_plan("user-2")
+        await other_worker.stop()
+        return plans
+
+    assert asyncio.run(scenario()) == ("pro", "free")
+
+
+def test_quota_is_shared_by_workers(tmp_path):
+    """Test that usage written by one worker counts against the quota checked by another"""
+    database_url = f"sqlite:///{tmp_path / 'usage.db'}"
+
+    async def scenario():
+        first = UsageLedger(database_url, flush_interval=3600, totals_ttl=0)
+        second = UsageLedger(database_url, flush_interval=3600, totals_ttl=0)
+        await first.start()
+        await second.start()
+        first.record("user-4", "chat", 12000, 0)
+        second.record("user-4", "chat", 6000, 0)
+        await first.check_quota("user-4")
+        await first.flush()
+        await second.check_quota("user-4")
+        second.record("user-4", "chat", 2000, 0)
+        with pytest.raises(QuotaExceededError):
+            await second.check_quota("user-4")
+        await second.flush()
+        usage = await first.get_usage("user-4")
+        await first.stop()
+        await second.stop()
+        return usage
+
+    usage = asyncio.run(scenario())
+    assert usage["daily"]["used"] == 20000 and usage["daily"]["remaining"] == 0
@@ -0,0 +1,198 @@
+"""
+Thumbnail Service for RED AI
+Renders gallery-sized WebP/AVIF variants of generated designs and caches them on disk
+"""
+
+import os
+import io
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw
+
+# AVIF needs the optional pillow-avif-plugin on Pillow < 11
+try:
+    import pillow_avif  # noqa: F401
+    AVIF_AVAILABLE = True
+except ImportError:
+    AVIF_AVAILABLE = ".avif" in Image.registered_extensions()
+
+# Gallery sizes used by the dashboard (width, height)
+THUMBNAIL_SIZES: Dict[str, Tuple[int, int]] = {
+    "small": (200, 150),
+    "medium": (400, 300),
+    "large": (800, 600),
+}
+
+# Placeholder sizes rendered once at startup; other sizes redirect to the nearest of them
+PLACEHOLDER_SIZES = [(200, 150), (400, 300), (800, 600)]
+MAX_PLACEHOLDER_SIDE = 2048
+
+MEDIA_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+    "png": "image/png",
+}
+
+ENCODE_OPTIONS = {
+    "avif": {"quality": 60},
+    "webp": {"quality": 80, "method": 4},
+    "png": {"optimize": True},
+}
+
+
+def _render_thumbnail(source_path: str, target_path: str, width: int, height: int, fmt: str) -> str:
+    """Render a single thumbnail (runs inside a worker process)"""
+    with Image.open(source_path) as image:
+        image.draft("RGB", (width, height))
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        image.thumbnail((width, height), Image.LANCZOS)
+
+        tmp_path = f"{target_path}.{os.getpid()}.tmp"
+        image.save(tmp_path, format=fmt.upper(), **ENCODE_OPTIONS[fmt])
+
+    # Atomic rename so concurrent readers never see a partial file
+    os.replace(tmp_path, target_path)
+    return target_path
+
+
+def _render_placeholder(width: int, height: int, fmt: str) -> bytes:
+    """Render a neutral placeholder tile with its dimensions"""
+    image = Image.new("RGB", (width, height), (229, 231, 235))
+    draw = ImageDraw.Draw(image)
+    label = f"{width} x {height}"
+    left, top, right, bottom = draw.textbbox((0, 0), label)
+    draw.text(((width - (right - left)) / 2, (height - (bottom - top)) / 2), label, fill=(156, 163, 175))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), **ENCODE_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+class ThumbnailService:
+    """Multi-resolution thumbnail pipeline with a disk cache"""
+
+    def __init__(self, images_dir: str, cache_dir: str, max_workers: int = 2):
+        """Initialize thumbnail service"""
+        self.images_dir = Path(images_dir)
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._source_hashes: Dict[Tuple[str, int, int], str] = {}
+        self._in_flight: Dict[Path, asyncio.Future] = {}
+        self._placeholders: Dict[Tuple[int, int, str], bytes] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the process pool on first use"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def shutdown(self):
+        """Stop worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def negotiate_format(accept: Optional[str]) -> str:
+        """Pick the best image format the client accepts"""
+        accept = accept or ""
+        if AVIF_AVAILABLE and "image/avif" in accept:
+            return "avif"
+        if "image/webp" in accept or "*/*" in accept or not accept:
+            return "webp"
+        return "png"
+
+    def resolve_source(self, image_url: str) -> Optional[Path]:
+        """Map a design image URL to a local file under the images directory"""
+        if not image_url or "://" in image_url:
+            return None
+
+        name = image_url.split("?", 1)[0].rsplit("/", 1)[-1]
+        path = self.images_dir / name
+        return path if path.is_file() else None
+
+    def _source_hash(self, source: Path) -> str:
+        """Content hash of the source file, memoized by path, mtime and size"""
+        stat = source.stat()
+        key = (str(source), stat.st_mtime_ns, stat.st_size)
+        digest = self._source_hashes.get(key)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(source, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(chunk)
+            digest = hasher.hexdigest()
+            self._source_hashes[key] = digest
+        return digest
+
+    def cache_path(self, digest: str, width: int, height: int, fmt: str) -> Path:
+        """Location of a cached variant, keyed by source hash and size"""
+        return self.cache_dir / digest[:2] / f"{digest}_{width}x{height}.{fmt}"
+
+    async def get_thumbnail(self, source: Path, size: str = "medium", fmt: str = "webp") -> Path:
+        """Return the cached thumbnail for a source image, rendering it if needed"""
+        if size not in THUMBNAIL_SIZES:
+            raise ValueError(f"Unknown thumbnail size: {size}")
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported thumbnail format: {fmt}")
+
+        width, height = THUMBNAIL_SIZES[size]
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(None, self._source_hash, source)
+        target = self.cache_path(digest, width, height, fmt)
+
+        if target.exists():
+            return target
+
+        # Collapse concurrent requests for the same variant into one render
+        pending = self._in_flight.get(target)
+        if pending is None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            pending = loop.run_in_executor(
+                self._get_executor(), _render_thumbnail,
+                str(source), str(target), width, height, fmt
+            )
+            self._in_flight[target] = pending
+            pending.add_done_callback(lambda _: self._in_flight.pop(target, None))
+
+        await pending
+        return target
+
+    def warm_placeholders(self):
+        """Precompute placeholder tiles for the standard gallery sizes"""
+        for width, height in PLACEHOLDER_SIZES:
+            for fmt in ("webp", "png"):
+                self._placeholders[(width, height, fmt)] = _render_placeholder(width, height, fmt)
+
+    async def get_placeholder(self, width: int, height: int, fmt: str = "webp") -> bytes:
+        """Return placeholder bytes for one of PLACEHOLDER_SIZES from the precomputed cache; a tile the
+        startup warm-up has not reached yet is rendered in the process pool"""
+        if (width, height) not in PLACEHOLDER_SIZES:
+            raise ValueError(f"Placeholder size is not precomputed: {width}x{height}")
+        if fmt == "avif":
+            fmt = "webp"
+
+        key = (width, height, fmt)
+        data = self._placeholders.get(key)
+        if data is None:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(self._get_executor(), _render_placeholder, width, height, fmt)
+            self._placeholders[key] = data
+        return data
+
+
+def nearest_placeholder_size(width: int, height: int) -> Tuple[int, int]:
+    """Precomputed placeholder size closest to a requested one"""
+    return min(PLACEHOLDER_SIZES, key=lambda size: abs(size[0] - width) + abs(size[1] - height))
+
+
+def create_thumbnail_service(images_dir: str = "generated-images",
+                             cache_dir: str = "thumbnail-cache",
+                             max_workers: int = 2) -> ThumbnailService:
+    """Create thumbnail service instance"""
+    return ThumbnailService(images_dir=images_dir, cache_dir=cache_dir, max_workers=max_workers)
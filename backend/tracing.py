@@ -0,0 +1,284 @@
+"""
+Request Tracing for RED AI
+Lightweight spans across main.py -> AIService -> AzureOpenAIService, reported to the browser
+as a Server-Timing header and optionally exported to OpenTelemetry
+"""
+
+import contextvars
+import importlib.util
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# OpenTelemetry is optional and imported only when the OTLP exporter is selected
+OTEL_AVAILABLE = importlib.util.find_spec("opentelemetry") is not None
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Trace of the request or job running in the current task, and its innermost open span
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """Timed phase of a trace; used as a context manager through span()"""
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes", "error", "_trace", "_token")
+
+    def __init__(self, name: str, parent_id: Optional[int], attributes: Dict[str, Any], trace=None):
+        self.name = name
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error = False
+        self._trace = trace
+        self._token = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def set(self, **attributes):
+        """Add attributes, e.g. token counts known only after the call"""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self._trace.spans.append(self)
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        self.error = exc_type is not None
+        _current_span.reset(self._token)
+
+
+class _NoopSpan:
+    """Returned by span() outside a traced request"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Spans recorded for one request or job; used as a context manager through Tracer.trace()"""
+
+    def __init__(self, name: str, trace_id: Optional[int] = None, parent_id: Optional[int] = None,
+                 sampled: bool = True, attributes: Optional[Dict[str, Any]] = None, exporter=None):
+        self.trace_id = trace_id or random.getrandbits(128)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.exporter = exporter
+        self.wall_start_ns = time.time_ns()
+        self.root = Span(name, parent_id, attributes or {}, self)
+        self.spans: List[Span] = [self.root]
+        self._tokens = None
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent for work continued elsewhere (e.g. a queued job)"""
+        return f"00-{self.trace_id:032x}-{self.root.span_id:016x}-{'01' if self.sampled else '00'}"
+
+    def wall_ns(self, perf: float) -> int:
+        """Wall-clock nanoseconds of a perf_counter reading"""
+        return self.wall_start_ns + int((perf - self.root.start) * 1e9)
+
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds per phase name (repeated phases are summed) plus the total so far"""
+        phases: Dict[str, float] = {}
+        for item in self.spans[1:]:
+            if item.end is not None:
+                phases[item.name] = phases.get(item.name, 0.0) + (item.end - item.start) * 1000
+        phases["total"] = self.root.duration_ms
+        return {name: round(ms, 2) for name, ms in phases.items()}
+
+    def __enter__(self) -> "Trace":
+        self._tokens = (_current_trace.set(self), _current_span.set(self.root))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.root.end = time.perf_counter()
+        self.root.error = exc_type is not None
+        trace_token, span_token = self._tokens
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        if self.sampled and self.exporter is not None:
+            try:
+                self.exporter.export(self)
+            except Exception as e:
+                logger.warning("tracing.export_failed", error=str(e))
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Server-Timing header value, e.g. `upstream;dur=812.4, parse;dur=0.3, total;dur=815.1`"""
+    return ", ".join(f"{name};dur={ms}" for name, ms in timings.items())
+
+
+def parse_traceparent(value: Optional[str]):
+    """(trace_id, parent span id, sampled) of a W3C traceparent header, or None"""
+    match = _TRACEPARENT_RE.match(value.strip().lower()) if value else None
+    if match is None or match.group(1) == "0" * 32:
+        return None
+    return int(match.group(1), 16), int(match.group(2), 16), int(match.group(3), 16) & 1 == 1
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the current request or job, if any"""
+    return _current_trace.get()
+
+
+def span(name: str, **attributes):
+    """Context manager timing a phase of the current trace; does nothing outside a traced request"""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    parent = _current_span.get()
+    return Span(name, parent.span_id if parent is not None else trace.root.span_id, attributes, trace)
+
+
+# ==================== EXPORTERS ====================
+
+class NoopExporter:
+    """Default exporter: finished traces are only used for Server-Timing"""
+
+    def export(self, trace: Trace):
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class OTelExporter:
+    """Replays finished traces into the OpenTelemetry SDK; the OTLP endpoint comes from OTEL_EXPORTER_OTLP_*"""
+
+    def __init__(self, service_name: str):
+        """Initialize OpenTelemetry exporter"""
+        from opentelemetry import trace as otel_trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        self._otel = otel_trace
+        self.provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        # Batches are sent from the SDK's worker thread, never from the event loop
+        self.provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        self.tracer = self.provider.get_tracer("red-ai")
+
+    def export(self, trace: Trace):
+        otel = self._otel
+        context = None
+        if trace.parent_id:
+            remote = otel.SpanContext(trace.trace_id, trace.parent_id, is_remote=True,
+                                      trace_flags=otel.TraceFlags(otel.TraceFlags.SAMPLED))
+            context = otel.set_span_in_context(otel.NonRecordingSpan(remote))
+
+        created = {}
+        for item in trace.spans:
+            parent = created.get(item.parent_id)
+            created[item.span_id] = self.tracer.start_span(
+                item.name,
+                context=otel.set_span_in_context(parent) if parent is not None else context,
+                start_time=trace.wall_ns(item.start),
+                attributes=item.attributes
+            )
+        for item in reversed(trace.spans):
+            otel_span = created[item.span_id]
+            if item.error:
+                otel_span.set_status(otel.Status(otel.StatusCode.ERROR))
+            otel_span.end(end_time=trace.wall_ns(item.end or item.start))
+
+    def shutdown(self):
+        self.provider.shutdown()
+
+
+def create_exporter(kind: str = "none", service_name: str = "red-ai-backend"):
+    """Exporter for TRACING_EXPORTER (none or otlp)"""
+    if kind == "otlp":
+        if OTEL_AVAILABLE:
+            try:
+                return OTelExporter(service_name)
+            except ImportError as e:
+                logger.warning("tracing.otlp_unavailable", error=str(e))
+        else:
+            logger.warning("tracing.otlp_unavailable", error="opentelemetry-sdk not installed")
+    return NoopExporter()
+
+
+# ==================== TRACER ====================
+
+class Tracer:
+    """Starts traces for requests and jobs and hands finished ones to the exporter"""
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0):
+        """Initialize tracer"""
+        self.exporter = exporter or NoopExporter()
+        self.sample_rate = sample_rate
+
+    def trace(self, name: str, traceparent: Optional[str] = None, **attributes) -> Trace:
+        """Context manager tracing the code in the block; continues the caller's trace if traceparent is given"""
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            return Trace(name, parent[0], parent[1], parent[2], attributes, self.exporter)
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        return Trace(name, sampled=sampled, attributes=attributes, exporter=self.exporter)
+
+    def shutdown(self):
+        self.exporter.shutdown()
+
+
+class TracingMiddleware:
+    """Traces each HTTP request and adds a Server-Timing header with the phases finished before the response"""
+
+    def __init__(self, app, tracer: Tracer, server_timing: bool = True):
+        self.app = app
+        self.tracer = tracer
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        with self.tracer.trace(f"{scope['method']} {scope['path']}", traceparent,
+                               **{"http.method": scope["method"], "http.target": scope["path"]}) as trace:
+            async def traced_send(message):
+                if message["type"] == "http.response.start":
+                    trace.root.set(**{"http.status_code": message["status"]})
+                    if self.server_timing:
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (b"server-timing", server_timing(trace.timings()).encode("latin-1"))
+                        ]
+                await send(message)
+
+            await self.app(scope, receive, traced_send)
+            # Name the trace after the route template once routing has happened
+            route = scope.get("route")
+            if route is not None:
+                trace.root.name = f"{scope['method']} {route.path}"
+
+
+def create_tracer(exporter: str = "none", service_name: str = "red-ai-backend", sample_rate: float = 1.0) -> Tracer:
+    """Factory function to create a tracer"""
+    return Tracer(create_exporter(exporter, service_name), sample_rate=sample_rate)
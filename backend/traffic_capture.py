@@ -0,0 +1,326 @@
+"""
+Traffic Capture for RED AI
+Opt-in ASGI middleware that records sanitized request shapes and arrival times for offline replay
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import secrets
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Requests that are never recorded
+EXCLUDED_PATHS = ("/health", "/livez", "/readyz", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+# Field names whose string values are enums rather than user content and are kept as-is
+DEFAULT_VALUE_FIELDS = (
+    "style", "room_type", "priority", "category", "interaction_type", "size", "quality", "budget_range"
+)
+
+# Strings in captured bodies are replaced by these markers
+TEXT_MARKER = "$str"
+BASE64_MARKER = "$b64"
+FILE_MARKER = "$file"
+
+_BASE64_RE = re.compile(r"^(data:[\w/+.-]+;base64,)?[A-Za-z0-9+/=\r\n]+$")
+_FILLER = "Bright scandinavian living room with a large window, oak floor and linen sofa. "
+
+
+def _string_shape(value: str) -> Dict[str, int]:
+    """Length marker for a string; long base64 strings (images) are marked separately"""
+    if len(value) >= 256 and _BASE64_RE.match(value[:1024]):
+        return {BASE64_MARKER: len(value)}
+    return {TEXT_MARKER: len(value)}
+
+
+def json_shape(value: Any, value_fields: Iterable[str] = DEFAULT_VALUE_FIELDS, key: Optional[str] = None) -> Any:
+    """Structure of a JSON value with user strings replaced by their length"""
+    if isinstance(value, dict):
+        return {k: json_shape(v, value_fields, k) for k, v in value.items()}
+    if isinstance(value, list):
+        return [json_shape(v, value_fields, key) for v in value]
+    if isinstance(value, str):
+        return value if key in value_fields else _string_shape(value)
+    return value
+
+
+def text_chars(shape: Any) -> int:
+    """Total length of the free-text strings in a shape (prompt size)"""
+    if isinstance(shape, dict):
+        if TEXT_MARKER in shape and len(shape) == 1:
+            return shape[TEXT_MARKER]
+        return sum(text_chars(v) for v in shape.values())
+    if isinstance(shape, list):
+        return sum(text_chars(v) for v in shape)
+    return 0
+
+
+def _multipart_shape(body: bytes, boundary: bytes, value_fields: Iterable[str]) -> Dict[str, Any]:
+    """Field names and sizes of a multipart form; file contents are never kept"""
+    fields = {}
+    for part in body.split(b"--" + boundary)[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, content = part.partition(b"\r\n\r\n")
+        content = content[:-2] if content.endswith(b"\r\n") else content
+        headers = head.decode("latin-1")
+        name = re.search(r'name="([^"]*)"', headers)
+        if name is None:
+            continue
+        content_type = re.search(r"content-type:\s*([^\r\n;]+)", headers, re.IGNORECASE)
+        if 'filename="' in headers:
+            fields[name.group(1)] = {
+                FILE_MARKER: len(content),
+                "type": content_type.group(1).strip() if content_type else "application/octet-stream"
+            }
+        else:
+            fields[name.group(1)] = json_shape(content.decode("utf-8", "replace"), value_fields, name.group(1))
+    return fields
+
+
+def body_shape(content_type: str, body: bytes, value_fields: Iterable[str] = DEFAULT_VALUE_FIELDS
+               ) -> Tuple[Optional[str], Any]:
+    """(encoding, shape) of a request body, or (None, None) if it cannot be described"""
+    if not body:
+        return None, None
+    media_type = content_type.split(";")[0].strip().lower()
+    try:
+        if media_type == "application/json":
+            return "json", json_shape(json.loads(body), value_fields)
+        if media_type == "application/x-www-form-urlencoded":
+            pairs = parse_qsl(body.decode("utf-8"), keep_blank_values=True)
+            return "form", {k: json_shape(v, value_fields, k) for k, v in pairs}
+        if media_type == "multipart/form-data":
+            boundary = re.search(r'boundary="?([^";]+)"?', content_type)
+            if boundary:
+                return "multipart", _multipart_shape(body, boundary.group(1).encode(), value_fields)
+    except (ValueError, UnicodeDecodeError):
+        pass
+    return None, None
+
+
+def _sanitize_params(params: Dict[str, str], value_fields: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Keep numeric and enum-like parameter values; everything else becomes None"""
+    return {k: v if (k in value_fields or v.isdigit()) else None for k, v in params.items()}
+
+
+class TrafficRecorder:
+    """Buffers capture records in memory and appends them to a per-process JSONL file"""
+
+    def __init__(self, directory: str, sample_rate: float = 1.0, max_body: int = 10 * 1024 * 1024,
+                 flush_interval: float = 1.0, max_buffer: int = 10000,
+                 value_fields: Iterable[str] = DEFAULT_VALUE_FIELDS):
+        """Initialize traffic recorder"""
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_body = max_body
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.value_fields = frozenset(value_fields)
+        self.path = os.path.join(directory, f"traffic-{os.getpid()}-{int(time.time())}.jsonl")
+        # Per-process salt: user ids are pseudonymous within one capture and unlinkable across captures
+        self._salt = secrets.token_bytes(16)
+        self._buffer: List[Dict[str, Any]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self.stats = {"captured": 0, "dropped": 0, "written": 0}
+
+    async def start(self):
+        """Create the capture directory and start the flush loop"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush loop and write remaining records"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        await self.flush()
+
+    def should_capture(self, scope) -> bool:
+        """Sampling decision for a request"""
+        if scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PATHS):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def pseudonym(self, user_id: str) -> str:
+        """Salted hash standing in for a user id"""
+        return hashlib.sha256(self._salt + user_id.encode()).hexdigest()[:12]
+
+    def record(self, record: Dict[str, Any]):
+        """Queue a record; dropped if the writer fell behind"""
+        if len(self._buffer) >= self.max_buffer:
+            self.stats["dropped"] += 1
+            return
+        self._buffer.append(record)
+        self.stats["captured"] += 1
+
+    async def flush(self):
+        """Append buffered records to the capture file"""
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        lines = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._append, lines)
+        self.stats["written"] += len(records)
+
+    def _append(self, lines: str):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    async def _flush_loop(self):
+        """Flush records periodically"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except OSError as e:
+                logger.warning("traffic_capture.write_failed", error=str(e))
+
+
+class TrafficCaptureMiddleware:
+    """Records method, route template, sanitized body shape, sizes, status and timing of sampled requests"""
+
+    def __init__(self, app, recorder: TrafficRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if not self.recorder.should_capture(scope):
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.time()
+        started = time.perf_counter()
+        chunks: List[bytes] = []
+        size = {"request": 0, "response": 0, "status": 0}
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                size["request"] += len(body)
+                if size["request"] <= self.recorder.max_body:
+                    chunks.append(body)
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                size["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                size["response"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            self.recorder.record(self._build_record(scope, arrived, started, chunks, size))
+
+    def _build_record(self, scope, arrived: float, started: float, chunks: List[bytes],
+                      size: Dict[str, int]) -> Dict[str, Any]:
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        content_type = headers.get("content-type", "")
+        encoding, shape = None, None
+        if size["request"] <= self.recorder.max_body:
+            encoding, shape = body_shape(content_type, b"".join(chunks), self.recorder.value_fields)
+
+        # Route template rather than the concrete path: ids and names in paths stay out of the capture
+        route = scope.get("route")
+        query = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+        user_id = headers.get("x-user-id")
+        return {
+            "ts": round(arrived, 4),
+            "method": scope["method"],
+            "route": getattr(route, "path", None) or "<unmatched>",
+            "path_params": _sanitize_params(scope.get("path_params", {}), self.recorder.value_fields),
+            "query": _sanitize_params(query, self.recorder.value_fields),
+            "content_type": content_type.split(";")[0].strip() or None,
+            "accept": headers.get("accept"),
+            "user": self.recorder.pseudonym(user_id) if user_id else None,
+            "body_size": size["request"],
+            "encoding": encoding,
+            "shape": shape,
+            "text_chars": text_chars(shape),
+            "status": size["status"],
+            "response_size": size["response"],
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+
+def create_traffic_recorder(directory: str, sample_rate: float = 1.0, max_body: int = 10 * 1024 * 1024
+                            ) -> TrafficRecorder:
+    """Factory function to create a traffic recorder"""
+    return TrafficRecorder(directory, sample_rate=sample_rate, max_body=max_body)
+
+
+# ==================== REPLAY ====================
+
+def load_captures(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """Records of one or more capture files (e.g. one per worker) merged in arrival order"""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+def _synthesize_value(shape: Any, rng: random.Random) -> Any:
+    """Value with the same structure and string lengths as a captured shape"""
+    if isinstance(shape, dict):
+        if len(shape) == 1 and TEXT_MARKER in shape:
+            return (_FILLER * (shape[TEXT_MARKER] // len(_FILLER) + 1))[:shape[TEXT_MARKER]]
+        if len(shape) == 1 and BASE64_MARKER in shape:
+            raw = rng.randbytes(shape[BASE64_MARKER] * 3 // 4)
+            return base64.b64encode(raw).decode()[:shape[BASE64_MARKER]]
+        return {k: _synthesize_value(v, rng) for k, v in shape.items()}
+    if isinstance(shape, list):
+        return [_synthesize_value(v, rng) for v in shape]
+    return shape
+
+
+def synthesize_request(record: Dict[str, Any], rng: random.Random, users: Dict[str, str]
+                       ) -> Tuple[str, str, Dict[str, Any]]:
+    """(method, path, httpx request kwargs) reproducing a captured request with synthetic content"""
+    path = record["route"]
+    for name, value in record["path_params"].items():
+        path = path.replace("{" + name + "}", value if value is not None else "1")
+    query = {k: v if v is not None else "replay" for k, v in record["query"].items()}
+    if query:
+        path += "?" + urlencode(query)
+
+    headers = {}
+    if record.get("accept"):
+        headers["accept"] = record["accept"]
+    if record.get("user"):
+        headers["x-user-id"] = users.setdefault(record["user"], f"replay-user-{len(users) + 1}")
+
+    kwargs: Dict[str, Any] = {"headers": headers}
+    encoding, shape = record.get("encoding"), record.get("shape")
+    if encoding == "json":
+        kwargs["json"] = _synthesize_value(shape, rng)
+    elif encoding == "form":
+        kwargs["data"] = _synthesize_value(shape, rng)
+    elif encoding == "multipart":
+        data, files = {}, {}
+        for name, field in shape.items():
+            if isinstance(field, dict) and FILE_MARKER in field:
+                files[name] = (f"{name}.bin", rng.randbytes(field[FILE_MARKER]), field["type"])
+            else:
+                data[name] = _synthesize_value(field, rng)
+        kwargs["data"], kwargs["files"] = data, files
+    elif record.get("body_size"):
+        kwargs["content"] = rng.randbytes(record["body_size"])
+        if record.get("content_type"):
+            headers["content-type"] = record["content_type"]
+    return record["method"], path, kwargs
@@ -0,0 +1,282 @@
+"""
+Usage Ledger for RED AI
+Attributes Azure OpenAI token usage to users and enforces per-plan quotas against the totals
+in the database, which every worker writes to; plans are stored there too, set by billing
+"""
+
+import asyncio
+import contextvars
+import time
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column, Date, DateTime, Integer, MetaData, String, Table, create_engine, func, select
+)
+from sqlalchemy.exc import IntegrityError
+
+from core.exceptions import QuotaExceededError
+from logging_config import get_logger
+
+# Daily and monthly token limits per plan (None = unlimited)
+PLAN_LIMITS: Dict[str, Dict[str, Optional[int]]] = {
+    "free": {"daily": 20000, "monthly": 200000},
+    "pro": {"daily": 200000, "monthly": 3000000},
+    "studio": {"daily": 1000000, "monthly": 20000000},
+    "admin": {"daily": None, "monthly": None},
+}
+
+# Usage that no request or job claimed; quota checks never use this bucket
+ANONYMOUS_USER = "anonymous"
+
+logger = get_logger(__name__)
+
+metadata = MetaData()
+
+token_usage = Table(
+    "token_usage",
+    metadata,
+    Column("user_id", String(128), primary_key=True),
+    Column("endpoint", String(128), primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("prompt_tokens", Integer, nullable=False, default=0),
+    Column("completion_tokens", Integer, nullable=False, default=0),
+    Column("requests", Integer, nullable=False, default=0),
+)
+
+# Plan of each paying user, written by billing; users without a row have the default plan
+user_plans = Table(
+    "user_plans",
+    metadata,
+    Column("user_id", String(128), primary_key=True),
+    Column("plan", String(32), nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+# (user_id, endpoint) of the request or job currently calling Azure OpenAI
+usage_context: contextvars.ContextVar = contextvars.ContextVar("usage_context", default=None)
+
+
+class UsageLedger:
+    """Token usage in the database, shared by all workers, with batched writes.
+
+    Quota checks read a user's plan and daily and monthly totals from the database (cached for
+    totals_ttl seconds) and add what this worker recorded but has not written yet. Other
+    workers' usage therefore counts after their next flush, not once per worker.
+    """
+
+    def __init__(self, database_url: str, flush_interval: float = 10.0, flush_batch_size: int = 500,
+                 default_plan: str = "free", totals_ttl: float = 2.0, admin_users: Iterable[str] = ()):
+        """Initialize usage ledger"""
+        connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+        self.engine = create_engine(database_url, connect_args=connect_args, pool_pre_ping=True)
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.default_plan = default_plan
+        self.totals_ttl = totals_ttl
+        # Operators from the configuration; unlimited whatever billing says
+        self.admin_users = frozenset(admin_users)
+        # user_id -> (read at, day, plan, tokens today, tokens this month) as stored in the database
+        self._totals: Dict[str, Tuple[float, date, str, int, int]] = {}
+        # user_id -> {day: tokens} recorded by this worker and not written yet
+        self._unflushed: Dict[str, Dict[date, int]] = {}
+        # (user_id, endpoint, day) -> [prompt, completion, requests] not yet written
+        self._pending: Dict[Tuple[str, str, date], List[int]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self):
+        """Create the table and start the flush loop"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, metadata.create_all, self.engine)
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush loop and write remaining counters"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        await self.flush()
+        self.engine.dispose()
+
+    # ==================== QUOTAS ====================
+
+    async def set_plan(self, user_id: str, plan: str):
+        """Assign a plan to a user (billing, on a subscription change); every worker sees it
+        within totals_ttl seconds"""
+        if plan not in PLAN_LIMITS:
+            raise ValueError(f"Unknown plan: {plan}")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write_plan, user_id, plan)
+        self._totals.pop(user_id, None)
+
+    def _write_plan(self, user_id: str, plan: str):
+        with self.engine.begin() as conn:
+            key = user_plans.c.user_id == user_id
+            values = {"plan": plan, "updated_at": datetime.now()}
+            if not conn.execute(user_plans.update().where(key).values(**values)).rowcount:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(user_plans.insert().values(user_id=user_id, **values))
+                except IntegrityError:
+                    # Another worker inserted the row first
+                    conn.execute(user_plans.update().where(key).values(**values))
+
+    async def get_plan(self, user_id: str) -> str:
+        """Plan of a user"""
+        plan, _, _ = await self._account(user_id)
+        return plan
+
+    def _read_account(self, user_id: str, today: date) -> Tuple[Optional[str], int, int]:
+        """Stored plan of a user and tokens stored today and this month"""
+        with self.engine.connect() as conn:
+            plan = conn.execute(select(user_plans.c.plan).where(user_plans.c.user_id == user_id)).scalar()
+            rows = conn.execute(
+                select(token_usage.c.day, func.sum(token_usage.c.prompt_tokens + token_usage.c.completion_tokens))
+                .where((token_usage.c.user_id == user_id) & (token_usage.c.day >= today.replace(day=1)))
+                .group_by(token_usage.c.day)
+            ).all()
+        return (plan,
+                sum(int(tokens or 0) for day, tokens in rows if day == today),
+                sum(int(tokens or 0) for _, tokens in rows))
+
+    async def _account(self, user_id: str) -> Tuple[str, int, int]:
+        """Plan of a user and tokens used today and this month by all workers"""
+        today = date.today()
+        cached = self._totals.get(user_id)
+        if cached is None or cached[1] != today or time.monotonic() - cached[0] > self.totals_ttl:
+            loop = asyncio.get_running_loop()
+            plan, daily, monthly = await loop.run_in_executor(None, self._read_account, user_id, today)
+            if plan not in PLAN_LIMITS:
+                plan = self.default_plan
+            cached = self._totals[user_id] = (time.monotonic(), today, plan, daily, monthly)
+        _, _, plan, daily, monthly = cached
+        if user_id in self.admin_users:
+            plan = "admin"
+        for day, tokens in self._unflushed.get(user_id, {}).items():
+            if day == today:
+                daily += tokens
+            if (day.year, day.month) == (today.year, today.month):
+                monthly += tokens
+        return plan, daily, monthly
+
+    async def check_quota(self, user_id: str):
+        """Check that the user (or the client IP of an anonymous request) may make another Azure call"""
+        plan, daily, monthly = await self._account(user_id)
+        limits = PLAN_LIMITS[plan]
+        if limits["daily"] is not None and daily >= limits["daily"]:
+            raise QuotaExceededError("Daily token", daily, limits["daily"])
+        if limits["monthly"] is not None and monthly >= limits["monthly"]:
+            raise QuotaExceededError("Monthly token", monthly, limits["monthly"])
+
+    async def get_usage(self, user_id: str) -> Dict:
+        """Current usage and limits of a user"""
+        plan, daily, monthly = await self._account(user_id)
+        limits = PLAN_LIMITS[plan]
+
+        def period(used: int, limit: Optional[int]) -> Dict:
+            return {
+                "used": used,
+                "limit": limit,
+                "remaining": None if limit is None else max(0, limit - used)
+            }
+
+        return {
+            "user_id": user_id,
+            "plan": plan,
+            "daily": period(daily, limits["daily"]),
+            "monthly": period(monthly, limits["monthly"])
+        }
+
+    # ==================== RECORDING ====================
+
+    def record(self, user_id: Optional[str], endpoint: str, prompt_tokens: int, completion_tokens: int):
+        """Add token usage to the next batch written to the database"""
+        user_id = user_id or ANONYMOUS_USER
+        today = date.today()
+        unflushed = self._unflushed.setdefault(user_id, {})
+        unflushed[today] = unflushed.get(today, 0) + prompt_tokens + completion_tokens
+
+        entry = self._pending.setdefault((user_id, endpoint, today), [0, 0, 0])
+        entry[0] += prompt_tokens
+        entry[1] += completion_tokens
+        entry[2] += 1
+
+        if len(self._pending) >= self.flush_batch_size and not self._flush_lock.locked():
+            asyncio.ensure_future(self.flush())
+
+    def record_current(self, prompt_tokens: int, completion_tokens: int):
+        """Attribute usage to the user and endpoint of the current request or job"""
+        user_id, endpoint = usage_context.get() or (None, "unknown")
+        self.record(user_id, endpoint, prompt_tokens, completion_tokens)
+
+    async def flush(self):
+        """Write pending counters to the database in one transaction"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._write_batch, batch)
+            except Exception as e:
+                logger.warning("usage.flush_failed", pending=len(batch), error=str(e))
+                for key, (prompt, completion, requests) in batch.items():
+                    entry = self._pending.setdefault(key, [0, 0, 0])
+                    entry[0] += prompt
+                    entry[1] += completion
+                    entry[2] += requests
+                return
+            # The written tokens are part of the stored totals now; read them again on the next check
+            for (user_id, _, day), (prompt, completion, _) in batch.items():
+                unflushed = self._unflushed[user_id]
+                unflushed[day] -= prompt + completion
+                if not unflushed[day]:
+                    del unflushed[day]
+                if not unflushed:
+                    del self._unflushed[user_id]
+                self._totals.pop(user_id, None)
+
+    def _write_batch(self, batch: Dict[Tuple[str, str, date], List[int]]):
+        """Increment usage rows, inserting the ones that do not exist yet"""
+        with self.engine.begin() as conn:
+            for (user_id, endpoint, day), (prompt, completion, requests) in batch.items():
+                key = (
+                    (token_usage.c.user_id == user_id)
+                    & (token_usage.c.endpoint == endpoint)
+                    & (token_usage.c.day == day)
+                )
+                updated = conn.execute(
+                    token_usage.update().where(key).values(
+                        prompt_tokens=token_usage.c.prompt_tokens + prompt,
+                        completion_tokens=token_usage.c.completion_tokens + completion,
+                        requests=token_usage.c.requests + requests
+                    )
+                ).rowcount
+                if not updated:
+                    try:
+                        with conn.begin_nested():
+                            conn.execute(token_usage.insert().values(
+                                user_id=user_id, endpoint=endpoint, day=day,
+                                prompt_tokens=prompt, completion_tokens=completion, requests=requests
+                            ))
+                    except IntegrityError:
+                        # Another worker inserted the row first
+                        conn.execute(
+                            token_usage.update().where(key).values(
+                                prompt_tokens=token_usage.c.prompt_tokens + prompt,
+                                completion_tokens=token_usage.c.completion_tokens + completion,
+                                requests=token_usage.c.requests + requests
+                            )
+                        )
+
+    async def _flush_loop(self):
+        """Flush counters periodically"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            # Forget totals of users who made no request lately
+            expired = time.monotonic() - self.totals_ttl
+            self._totals = {user_id: totals for user_id, totals in self._totals.items() if totals[0] >= expired}
@@ -88,6 +88,33 @@ export function useCredits() {
     }
   }, [isLoaded, user])
 
+  // Sync credits with the backend usage ledger (token quota) when it is reachable; the
+  // Next.js route signs the request to the backend with the Clerk user
+  useEffect(() => {
+    if (!isLoaded || !user) return
+
+    let cancelled = false
+    fetch('/api/credits', { cache: 'no-store' })
+      .then(response => (response.ok ? response.json() : null))
+      .then(usage => {
+        // credits are in this hook's unit: a generation costs generation_cost of them
+        if (cancelled || !usage || typeof usage.credits !== 'number') return
+        const cost = typeof usage.generation_cost === 'number' ? usage.generation_cost : GENERATION_COST
+        setState(prev => ({
+          ...prev,
+          credits: usage.credits,
+          canGenerate: usage.credits >= cost
+        }))
+      })
+      .catch(() => {
+        // Backend unavailable - keep locally tracked credits
+      })
+
+    return () => {
+      cancelled = true
+    }
+  }, [isLoaded, user])
+
   // Save credits to localStorage whenever they change
   useEffect(() => {
     if (typeof window !== 'undefined' && user?.id) {
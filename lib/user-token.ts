@@ -0,0 +1,21 @@
+/**
+ * Signed user tokens for the FastAPI backend (server only)
+ * Format matches src/backend/core/identity.py: <user_id in base64url>.<expiry, unix>.<HMAC-SHA256 in hex>
+ */
+
+import { createHmac } from 'crypto'
+
+const DEFAULT_TTL_SECONDS = 3600
+
+export function signUserToken(userId: string, ttlSeconds: number = DEFAULT_TTL_SECONDS): string | null {
+  const secret = process.env.USER_TOKEN_SECRET
+  if (!secret) return null
+
+  const encoded = Buffer.from(userId, 'utf-8').toString('base64url')
+  const payload = `${encoded}.${Math.floor(Date.now() / 1000) + ttlSeconds}`
+  const signature = createHmac('sha256', secret).update(payload).digest('hex')
+  return `${payload}.${signature}`
+}
+
+// Backend address as seen from the Next.js server (docker: http://backend:8000)
+export const BACKEND_URL = process.env.BACKEND_URL || process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
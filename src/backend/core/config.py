@@ -61,11 +61,23 @@ class Settings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_PERIOD: int = 60
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory или redis
+
+    # Идентификация клиента: X-User-Id, X-Real-IP и X-Forwarded-For принимаются только от этих
+    # прокси (через запятую); за nginx здесь должен быть его адрес, иначе все клиенты делят его лимит
+    TRUSTED_PROXIES: str = ""
+    USER_TOKEN_SECRET: str = ""  # подпись токенов пользователей, которые выпускает Next.js
     
     # Логирование
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
     
+    # Мониторинг event loop (гистограмма задержки и стеки блокирующих вызовов на /metrics)
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.1
+    LOOP_BLOCK_THRESHOLD: float = 0.1
+    
     # Email
     EMAIL_HOST: Optional[str] = None
     EMAIL_PORT: int = 587
@@ -0,0 +1,118 @@
+"""
+Red.AI Client Identity
+Кто отправил запрос: IP клиента, пользователь из подписанного токена или от доверенного прокси
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import ipaddress
+import time
+from typing import Iterable, List, Optional, Sequence, Union
+from urllib.parse import parse_qs
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_networks(values: Iterable[str]) -> List[Network]:
+    """Адреса и подсети прокси (127.0.0.1, 172.16.0.0/12)"""
+    return [ipaddress.ip_network(value.strip(), strict=False) for value in values if value.strip()]
+
+
+def _is_trusted(address: str, trusted: Sequence[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted)
+
+
+def header(scope, name: bytes) -> Optional[str]:
+    """Значение заголовка запроса (name в нижнем регистре)"""
+    for key, value in scope.get("headers") or []:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def peer_address(scope) -> str:
+    """Адрес, с которого пришло соединение"""
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def from_trusted_proxy(scope, trusted: Sequence[Network]) -> bool:
+    """Соединение открыл доверенный прокси (nginx, Next.js)"""
+    return _is_trusted(peer_address(scope), trusted)
+
+
+def client_ip(scope, trusted: Sequence[Network]) -> str:
+    """IP клиента.
+
+    За доверенным прокси это X-Real-IP или самый правый адрес X-Forwarded-For, не
+    принадлежащий прокси: левые записи клиент может подставить сам. Иначе - адрес соединения,
+    заголовки не учитываются.
+    """
+    peer = peer_address(scope)
+    if not _is_trusted(peer, trusted):
+        return peer
+    real_ip = (header(scope, b"x-real-ip") or "").strip()
+    if real_ip:
+        return real_ip
+    for hop in reversed((header(scope, b"x-forwarded-for") or "").split(",")):
+        hop = hop.strip()
+        if hop and not _is_trusted(hop, trusted):
+            return hop
+    return peer
+
+
+def forwarded_user(scope, trusted: Sequence[Network]) -> Optional[str]:
+    """X-User-Id, если его выставил доверенный прокси (Next.js после проверки сессии Clerk)"""
+    if not from_trusted_proxy(scope, trusted):
+        return None
+    return (header(scope, b"x-user-id") or "").strip() or None
+
+
+def _signature(payload: str, secret: str) -> str:
+    return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+def sign_user_token(user_id: str, secret: str, ttl: float = 3600, now: Optional[float] = None) -> str:
+    """Токен пользователя: <user_id в base64url>.<срок, unix>.<HMAC-SHA256 в hex>.
+
+    Выпускает Next.js после проверки сессии Clerk тем же секретом; браузер передает его в
+    Authorization: Bearer, а WebSocket - в ?token=.
+    """
+    encoded = base64.urlsafe_b64encode(user_id.encode()).decode().rstrip("=")
+    payload = f"{encoded}.{int((now or time.time()) + ttl)}"
+    return f"{payload}.{_signature(payload, secret)}"
+
+
+def verify_user_token(token: str, secret: str, now: Optional[float] = None) -> Optional[str]:
+    """user_id из действующего токена; None, если подпись неверна, срок истек или секрета нет"""
+    parts = token.split(".")
+    if not secret or len(parts) != 3:
+        return None
+    encoded, expires, signature = parts
+    if not hmac.compare_digest(signature.encode(), _signature(f"{encoded}.{expires}", secret).encode()):
+        return None
+    try:
+        if int(expires) < (now or time.time()):
+            return None
+        return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode() or None
+    except (ValueError, binascii.Error):
+        return None
+
+
+def authenticated_user(scope, trusted: Sequence[Network], token_secret: str) -> Optional[str]:
+    """Пользователь запроса: из токена, если он передан (неверный токен - аноним), иначе
+    X-User-Id от доверенного прокси"""
+    authorization = header(scope, b"authorization") or ""
+    if authorization[:7].lower() == "bearer ":
+        token = authorization[7:].strip()
+    else:
+        token = parse_qs((scope.get("query_string") or b"").decode("latin-1")).get("token", [""])[0]
+    if token:
+        return verify_user_token(token, token_secret)
+    return forwarded_user(scope, trusted)
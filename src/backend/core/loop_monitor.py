@@ -0,0 +1,195 @@
+"""
+Red.AI Event Loop Monitor
+Гистограмма задержки event loop и поиск блокирующих вызовов (стек снимается из отдельного потока)
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы в секундах (как у Prometheus histogram)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_STDLIB_DIR = os.path.dirname(os.__file__)
+
+
+def _frame_label(code) -> str:
+    """Имя функции и место определения для логов и метрик"""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_app_code(filename: str) -> bool:
+    """Код приложения, а не стандартной библиотеки или зависимостей"""
+    return not filename.startswith(_STDLIB_DIR) and "site-packages" not in filename and not filename.startswith("<")
+
+
+class LagHistogram:
+    """Накопительная гистограмма задержек"""
+
+    def __init__(self, buckets: Sequence[float] = LAG_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """Учесть одно измерение"""
+        index = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def cumulative(self) -> List[int]:
+        """Число измерений <= каждой границы; последний элемент — +Inf"""
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+@dataclass
+class BlockedCall:
+    """Блокировка event loop, замеченная watchdog-потоком"""
+    function: str
+    stack: List[str]
+    detected_after: float
+    duration: Optional[float] = None
+    at: float = field(default_factory=time.time)
+
+
+class LoopMonitor:
+    """Heartbeat-задача измеряет задержку loop; watchdog-поток снимает стек, если loop заблокирован дольше порога"""
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1, max_stack: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_stack = max_stack
+        self.histogram = LagHistogram()
+        self.blocked_calls: Counter = Counter()
+        self.blocked_seconds: Counter = Counter()
+        self.last_block: Optional[BlockedCall] = None
+        self._pending: Optional[BlockedCall] = None
+        self._last_beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    async def start(self):
+        """Запуск внутри работающего event loop"""
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.ensure_future(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        """Остановка heartbeat и watchdog"""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = max(0.0, now - started - self.interval)
+            self.histogram.observe(lag)
+            pending, self._pending = self._pending, None
+            if pending is not None:
+                pending.duration = lag
+                self.blocked_calls[pending.function] += 1
+                self.blocked_seconds[pending.function] += lag
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopped.wait(min(self.threshold / 2, 0.05)):
+            beat = self._last_beat
+            stalled = time.monotonic() - beat - self.interval
+            # Один снимок на каждую блокировку
+            if stalled < self.threshold or beat == reported_beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            reported_beat = beat
+            blocked = self._capture(frame, stalled)
+            self.last_block = self._pending = blocked
+            logger.warning(
+                "Event loop blocked for %.0f ms in %s\n%s",
+                stalled * 1000, blocked.function, "\n".join(f"  {line}" for line in blocked.stack)
+            )
+
+    def _capture(self, frame, stalled: float) -> BlockedCall:
+        """Стек потока event loop (от внешнего вызова к внутреннему) и виновная функция приложения"""
+        stack, culprit = [], None
+        while frame is not None:
+            code = frame.f_code
+            if culprit is None and _is_app_code(code.co_filename):
+                culprit = _frame_label(code)
+            stack.append(f"{_frame_label(code)} line {frame.f_lineno}")
+            frame = frame.f_back
+        function = culprit or stack[0].rsplit(" line ", 1)[0]
+        return BlockedCall(function=function, stack=list(reversed(stack[:self.max_stack])), detected_after=stalled)
+
+    def stats(self) -> Dict:
+        """Сводка для health-эндпоинтов"""
+        histogram = self.histogram
+        return {
+            "lag_samples": histogram.count,
+            "lag_mean_ms": round(histogram.sum / histogram.count * 1000, 2) if histogram.count else 0.0,
+            "lag_max_ms": round(histogram.max * 1000, 2),
+            "blocked_calls": dict(self.blocked_calls.most_common(10)),
+        }
+
+    def prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        histogram = self.histogram
+        lines = [
+            "# HELP event_loop_lag_seconds Delay of the event loop heartbeat beyond its interval",
+            "# TYPE event_loop_lag_seconds histogram",
+        ]
+        for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.cumulative()):
+            lines.append(f'event_loop_lag_seconds_bucket{{le="{bound}"}} {count}')
+        lines.append(f"event_loop_lag_seconds_sum {histogram.sum:.6f}")
+        lines.append(f"event_loop_lag_seconds_count {histogram.count}")
+        lines.append("# HELP event_loop_blocked_total Event loop blocks over the threshold by blocking function")
+        lines.append("# TYPE event_loop_blocked_total counter")
+        for function, count in self.blocked_calls.items():
+            lines.append(f'event_loop_blocked_total{{function="{_escape(function)}"}} {count}')
+        lines.append("# HELP event_loop_blocked_seconds_total Time the event loop was blocked by blocking function")
+        lines.append("# TYPE event_loop_blocked_seconds_total counter")
+        for function, seconds in self.blocked_seconds.items():
+            lines.append(f'event_loop_blocked_seconds_total{{function="{_escape(function)}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
@@ -0,0 +1,29 @@
+"""
+Red.AI Middleware
+Подключение middleware приложения
+"""
+
+from fastapi import FastAPI
+
+from .config import settings
+from .rate_limit import RateLimit, RateLimitMiddleware, create_rate_limiter
+
+
+def setup_middleware(app: FastAPI):
+    """Подключение middleware к приложению"""
+    if settings.RATE_LIMIT_ENABLED:
+        trusted_proxies = [proxy.strip() for proxy in settings.TRUSTED_PROXIES.split(",") if proxy.strip()]
+        limiter = create_rate_limiter(
+            settings.RATE_LIMIT_BACKEND,
+            settings.REDIS_URL,
+            password=settings.REDIS_PASSWORD
+        )
+        app.add_middleware(
+            RateLimitMiddleware,
+            limiter=limiter,
+            default_limit=RateLimit(settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_PERIOD),
+            trust_forwarded=bool(trusted_proxies),
+            trusted_proxies=trusted_proxies,
+            user_token_secret=settings.USER_TOKEN_SECRET
+        )
+        app.add_event_handler("shutdown", limiter.close)
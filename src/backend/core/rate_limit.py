@@ -0,0 +1,241 @@
+"""
+Red.AI Rate Limiting
+GCRA rate limiter (per user / IP / маршрут) в виде ASGI middleware
+"""
+
+import logging
+import time
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+from .exceptions import RateLimitError
+from .identity import authenticated_user, client_ip, parse_networks
+
+# Redis опционален - без него используется in-process backend
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Лимит: requests запросов за period секунд"""
+    requests: int
+    period: int
+
+    @property
+    def interval(self) -> float:
+        """Интервал эмиссии GCRA"""
+        return self.period / self.requests
+
+
+@dataclass
+class RateLimitResult:
+    """Результат проверки лимита"""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float = 0.0
+
+
+def _result(limit: RateLimit, allowed: bool, reset_after: float, retry_after: float) -> RateLimitResult:
+    """Сборка результата из состояния GCRA"""
+    remaining = int((limit.period - reset_after) / limit.interval + 1e-9) if allowed else 0
+    return RateLimitResult(
+        allowed=allowed,
+        limit=limit.requests,
+        remaining=max(0, remaining),
+        reset_after=max(0.0, reset_after),
+        retry_after=max(0.0, retry_after)
+    )
+
+
+class InMemoryRateLimiter:
+    """GCRA в памяти процесса: O(1) на проверку, одно число на ключ"""
+
+    def __init__(self, max_keys: int = 100000):
+        self._tat: Dict[str, float] = {}
+        self.max_keys = max_keys
+
+    async def hit(self, key: str, limit: RateLimit) -> RateLimitResult:
+        """Учесть запрос и вернуть решение"""
+        now = time.monotonic()
+        tat = self._tat.get(key, now)
+        if tat < now:
+            tat = now
+
+        new_tat = tat + limit.interval
+        allow_at = new_tat - limit.period
+        if now < allow_at:
+            return _result(limit, False, tat - now, allow_at - now)
+
+        if len(self._tat) >= self.max_keys and key not in self._tat:
+            self._evict(now)
+        self._tat[key] = new_tat
+        return _result(limit, True, new_tat - now, 0.0)
+
+    def _evict(self, now: float):
+        """Удаление ключей, лимит которых полностью восстановился"""
+        expired = [k for k, tat in self._tat.items() if tat <= now]
+        for k in expired:
+            del self._tat[k]
+        if len(self._tat) >= self.max_keys:
+            self._tat.clear()
+
+    async def close(self):
+        """Освобождение ресурсов (не требуется)"""
+
+
+# Атомарный GCRA на стороне Redis; числа возвращаются строками, т.к. Lua числа усекаются до целых
+GCRA_LUA = """
+local period = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - period
+if now < allow_at then
+  return {0, tostring(tat - now), tostring(allow_at - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, tostring(new_tat - now), '0'}
+"""
+
+
+class RedisRateLimiter:
+    """GCRA в Redis: общий лимит для всех воркеров и инстансов"""
+
+    def __init__(self, redis_url: str, password: Optional[str] = None, prefix: str = "redai:rl:"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is not installed")
+        self.redis = aioredis.from_url(redis_url, password=password)
+        self.prefix = prefix
+        self._script = self.redis.register_script(GCRA_LUA)
+        self._last_error_at = 0.0
+
+    async def hit(self, key: str, limit: RateLimit) -> RateLimitResult:
+        """Учесть запрос и вернуть решение"""
+        try:
+            allowed, reset_after, retry_after = await self._script(
+                keys=[self.prefix + key], args=[limit.period, limit.interval]
+            )
+        except Exception as e:
+            # При недоступности Redis пропускаем запросы, а не роняем API
+            now = time.monotonic()
+            if now - self._last_error_at > 60:
+                logger.warning("Rate limiter Redis error, failing open: %s", e)
+                self._last_error_at = now
+            return RateLimitResult(allowed=True, limit=limit.requests, remaining=limit.requests, reset_after=0.0)
+        return _result(limit, bool(int(allowed)), float(reset_after), float(retry_after))
+
+    async def close(self):
+        """Закрытие подключения к Redis"""
+        await self.redis.close()
+
+
+def create_rate_limiter(backend: str = "memory", redis_url: Optional[str] = None,
+                        password: Optional[str] = None):
+    """Создание rate limiter для выбранного backend"""
+    if backend == "redis":
+        if REDIS_AVAILABLE and redis_url:
+            return RedisRateLimiter(redis_url, password=password)
+        logger.warning("Redis rate limiter unavailable, using in-process limiter")
+    return InMemoryRateLimiter()
+
+
+class RateLimitMiddleware:
+    """ASGI middleware: лимит на пару (пользователь или IP, маршрут)"""
+
+    def __init__(
+        self,
+        app,
+        limiter,
+        default_limit: RateLimit,
+        route_limits: Sequence[Tuple[str, RateLimit]] = (),
+        exempt_paths: Sequence[str] = ("/health", "/livez", "/readyz", "/docs", "/redoc", "/openapi.json"),
+        trust_forwarded: bool = False,
+        trusted_proxies: Sequence[str] = ("127.0.0.1", "::1"),
+        user_token_secret: str = ""
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.default_limit = default_limit
+        # Более длинные префиксы проверяются первыми
+        self.route_limits: List[Tuple[str, RateLimit]] = sorted(route_limits, key=lambda r: -len(r[0]))
+        self.exempt_paths = tuple(exempt_paths)
+        # Заголовки X-User-Id, X-Real-IP и X-Forwarded-For принимаются только от этих адресов
+        self.trusted_proxies = parse_networks(trusted_proxies) if trust_forwarded else []
+        self.user_token_secret = user_token_secret
+        self._route_template = lru_cache(maxsize=4096)(self._match_route)
+
+    def _match_route(self, method: str, path: str) -> str:
+        """Шаблон маршрута (/api/jobs/{job_id}), чтобы id не создавали отдельные лимиты"""
+        # Роутер лежит под остальными middleware (CORS, ExceptionMiddleware)
+        router = self.app
+        while router is not None and not hasattr(router, "routes"):
+            router = getattr(router, "app", None)
+        if router is not None:
+            scope = {"type": "http", "method": method, "path": path}
+            for route in router.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    return getattr(route, "path", path)
+        return path
+
+    def _client_id(self, scope) -> str:
+        """Идентификатор клиента: пользователь (токен или доверенный прокси), иначе IP"""
+        user_id = authenticated_user(scope, self.trusted_proxies, self.user_token_secret)
+        if user_id:
+            return "u:" + user_id
+        return "ip:" + client_ip(scope, self.trusted_proxies)
+
+    def _limit_for(self, route: str) -> RateLimit:
+        """Лимит для маршрута"""
+        for prefix, limit in self.route_limits:
+            if route.startswith(prefix):
+                return limit
+        return self.default_limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_template(scope["method"], scope["path"])
+        limit = self._limit_for(route)
+        result = await self.limiter.hit(f"{self._client_id(scope)}:{scope['method']}:{route}", limit)
+
+        rate_headers = [
+            (b"ratelimit-limit", str(result.limit).encode()),
+            (b"ratelimit-remaining", str(result.remaining).encode()),
+            (b"ratelimit-reset", str(math.ceil(result.reset_after)).encode()),
+            (b"ratelimit-policy", f"{limit.requests};w={limit.period}".encode()),
+        ]
+
+        if not result.allowed:
+            error = RateLimitError()
+            response = JSONResponse(status_code=error.status_code, content={"detail": error.detail})
+            response.raw_headers.extend(rate_headers)
+            response.raw_headers.append((b"retry-after", str(math.ceil(result.retry_after)).encode()))
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + rate_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
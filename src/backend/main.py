@@ -5,7 +5,7 @@ Red.AI Backend - FastAPI Application
 
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 import os
@@ -16,6 +16,7 @@ from core.config import settings
 from core.database import get_db
 from core.exceptions import RedAIException
 from core.middleware import setup_middleware
+from core.loop_monitor import LoopMonitor
 from api.v1.router import api_router
 
 # Создание приложения FastAPI
@@ -27,6 +28,16 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Подключение middleware (до CORS, чтобы ответы 429 тоже получали CORS заголовки)
+setup_middleware(app)
+
+# Мониторинг задержки event loop и блокирующих вызовов
+loop_monitor = None
+if settings.LOOP_MONITOR_ENABLED:
+    loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_BLOCK_THRESHOLD)
+    app.add_event_handler("startup", loop_monitor.start)
+    app.add_event_handler("shutdown", loop_monitor.stop)
+
 # Настройка CORS
 app.add_middleware(
     CORSMiddleware,
@@ -36,9 +47,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Подключение middleware
-setup_middleware(app)
-
 # Подключение роутеров
 app.include_router(api_router, prefix="/api/v1")
 
@@ -59,6 +67,12 @@ async def health_check():
         "environment": settings.ENVIRONMENT
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики event loop в формате Prometheus"""
+    body = loop_monitor.prometheus() if loop_monitor is not None else ""
+    return Response(content=body, media_type="text/plain; version=0.0.4")
+
 @app.get("/info")
 async def app_info():
     """Информация о приложении"""